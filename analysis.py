@@ -0,0 +1,203 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse, stats
+
+
+def vectorized_mode(values, keys):
+    """
+    Smallest most frequent value of `values` within each group of `keys`.
+
+    Matches `Series.mode().values[0]` per group, which returns the
+    smallest of the tied modes.
+    Args:
+        values (pd.Series): Values to take the mode of.
+        keys (pd.Series): Group labels aligned with values.
+    Returns:
+        pd.Series: Mode per group, indexed by group label.
+    """
+    frequencies = pd.DataFrame({'key': keys.to_numpy(), 'value': values.to_numpy()})
+    frequencies = frequencies.groupby(['key', 'value'], observed=True).size().reset_index(name='n')
+    frequencies = frequencies.sort_values(['key', 'n', 'value'], ascending=[True, False, True])
+    return frequencies.drop_duplicates('key').set_index('key')['value']
+
+
+def component_month_totals(interaction_counts, components):
+    """
+    Total interactions per (Component, Month) in a single groupby pass.
+    Args:
+        interaction_counts (pd.DataFrame): User_ID/Component/Month/Interaction_Count table.
+        components (list): Components to keep.
+    Returns:
+        pd.DataFrame: Component, Month and Interactions columns.
+    """
+    filtered_data = interaction_counts[interaction_counts['Component'].isin(components)]
+    totals = filtered_data.groupby(['Component', 'Month'], observed=True)['Interaction_Count'].sum()
+    return totals.rename('Interactions').reset_index()
+
+
+def semester_statistics(totals, components):
+    """
+    Semester mean/median/mode per component: the distribution of its monthly totals.
+    Args:
+        totals (pd.DataFrame): Output of component_month_totals.
+        components (list): Components in output order; ones without totals get NaN.
+    Returns:
+        pd.DataFrame: Component, mean, median and mode columns.
+    """
+    grouped = totals.groupby('Component', observed=True)['Interactions']
+    semester_stats_df = grouped.agg(['mean', 'median'])
+    semester_stats_df['mode'] = vectorized_mode(totals['Interactions'], totals['Component'])
+    semester_stats_df = semester_stats_df.reindex(pd.Index(components, dtype=object)).astype(float)
+    return semester_stats_df.rename_axis('Component').reset_index()
+
+
+def monthly_statistics(totals, components):
+    """
+    Monthly mean/median/mode per component; each (Component, Month) cell holds a single total.
+
+    Months are listed in order of the first selected component that has
+    them, then components in selection order.
+    Args:
+        totals (pd.DataFrame): Output of component_month_totals.
+        components (list): Components in output order.
+    Returns:
+        pd.DataFrame: Month, Component, mean, median and mode columns.
+    """
+    if totals.empty:
+        return pd.DataFrame()
+    rank = pd.Series(np.arange(len(components)), index=pd.Index(components, dtype=object))
+    monthly = totals.assign(_rank=totals['Component'].astype(object).map(rank).to_numpy())
+    monthly['_month_rank'] = monthly.groupby('Month', observed=True)['_rank'].transform('min')
+    monthly = monthly.sort_values(['_month_rank', 'Month', '_rank'], ignore_index=True)
+    return pd.DataFrame({
+        'Month': monthly['Month'],
+        'Component': monthly['Component'],
+        'mean': monthly['Interactions'].astype(float),
+        'median': monthly['Interactions'].astype(float),
+        'mode': monthly['Interactions'],
+    })
+
+
+def statistics_from_totals(totals, components):
+    """
+    Semester and monthly mean/median/mode from per-(Component, Month) totals.
+    Args:
+        totals (pd.DataFrame): Output of component_month_totals.
+        components (list): Components in output order.
+    Returns:
+        tuple: (semester_stats_df, monthly_stats_df)
+    """
+    return semester_statistics(totals, components), monthly_statistics(totals, components)
+
+
+def compute_statistics(interaction_counts, target_components):
+    """
+    Semester and monthly mean/median/mode of interactions per component.
+    Args:
+        interaction_counts (pd.DataFrame): User_ID/Component/Month/Interaction_Count table.
+        target_components (list): Components to report on, in output order.
+    Returns:
+        tuple: (semester_stats_df, monthly_stats_df)
+    """
+    components = list(dict.fromkeys(target_components))
+    totals = component_month_totals(interaction_counts, components)
+    return statistics_from_totals(totals, components)
+
+
+def codes_and_labels(column):
+    """
+    Integer codes and labels of a column, reusing categorical codes when available.
+    Args:
+        column (pd.Series): Column to encode.
+    Returns:
+        tuple: (codes np.ndarray, labels pd.Index); missing values get code -1.
+    """
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.cat.codes.to_numpy(), pd.Index(column.cat.categories)
+    codes, labels = pd.factorize(column, sort=True)
+    return codes, pd.Index(labels)
+
+
+class InteractionMatrix:
+    """
+    Sparse users x components contingency table of interaction counts.
+
+    Built once from integer codes and shared by the correlation heatmap and
+    the chi-square test, so no dense pivot or crosstab is materialised.
+    Only users and components with at least one interaction are kept, as
+    pivot_table and crosstab do.
+    """
+
+    def __init__(self, matrix, users, components):
+        self.matrix = matrix
+        self.users = users
+        self.components = components
+
+    @classmethod
+    def from_counts(cls, interaction_counts, components):
+        """
+        Build the matrix from the interaction count table.
+        Args:
+            interaction_counts (pd.DataFrame): User_ID/Component/Month/Interaction_Count table.
+            components (list): Components to keep.
+        Returns:
+            InteractionMatrix: Counts summed over months.
+        """
+        filtered_data = interaction_counts[interaction_counts['Component'].isin(components)]
+        filtered_data = filtered_data[filtered_data['User_ID'].notna()]
+        user_codes, users = codes_and_labels(filtered_data['User_ID'])
+        component_codes, component_labels = codes_and_labels(filtered_data['Component'])
+
+        # Compact both code spaces to the labels actually present
+        user_codes, user_index = pd.factorize(user_codes, sort=True)
+        component_codes, component_index = pd.factorize(component_codes, sort=True)
+        matrix = sparse.coo_matrix(
+            (filtered_data['Interaction_Count'].to_numpy(dtype=np.float64), (user_codes, component_codes)),
+            shape=(len(user_index), len(component_index))
+        ).tocsr()
+        return cls(matrix, users[user_index], component_labels[component_index].rename('Component'))
+
+    def correlation(self):
+        """
+        Pearson correlation between component columns, as DataFrame.corr on the dense pivot.
+        Returns:
+            pd.DataFrame: Components x components correlation matrix.
+        """
+        n = self.matrix.shape[0]
+        sums = np.asarray(self.matrix.sum(axis=0)).ravel()
+        gram = (self.matrix.T @ self.matrix).toarray()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            covariance = (gram - np.outer(sums, sums) / n) / (n - 1)
+            std = np.sqrt(np.clip(np.diag(covariance), 0, None))
+            correlation = covariance / np.outer(std, std)
+        correlation[:, std == 0] = np.nan
+        correlation[std == 0, :] = np.nan
+        np.fill_diagonal(correlation, np.where(std > 0, 1.0, np.nan))
+        correlation = np.clip(correlation, -1.0, 1.0)
+        return pd.DataFrame(correlation, index=self.components, columns=self.components)
+
+    def chi_square(self):
+        """
+        Chi-square test of independence between users and components.
+
+        Computed from the non-zero cells only. The 2x2 case keeps SciPy's
+        Yates continuity correction by using chi2_contingency.
+        Returns:
+            tuple: (chi2 statistic, p-value, degrees of freedom)
+        """
+        rows, columns = self.matrix.shape
+        dof = max(rows - 1, 0) * max(columns - 1, 0)
+        if dof == 0:
+            return 0.0, 1.0, 0
+        if dof == 1:
+            chi2, p_value, dof, _ = stats.chi2_contingency(self.matrix.toarray())
+            return chi2, p_value, dof
+
+        total = self.matrix.sum()
+        row_sums = np.asarray(self.matrix.sum(axis=1)).ravel()
+        column_sums = np.asarray(self.matrix.sum(axis=0)).ravel()
+        coo = self.matrix.tocoo()
+        # sum((O - E)^2 / E) == total * (sum(O^2 / (r * c)) - 1)
+        ratio = (coo.data ** 2 / (row_sums[coo.row] * column_sums[coo.col])).sum()
+        chi2 = total * (ratio - 1.0)
+        return chi2, stats.chi2.sf(chi2, dof), dof
@@ -1,85 +1,366 @@
-import mysql.connector                                                        
-  from mysql.connector import Error                                             
-  import pandas as pd                                                           
-                                                                                
-  # Function to connect to MySQL database                                       
-  def connect_to_mysql():                                                       
-      try:                                                                      
-          connection = mysql.connector.connect(                                 
-              host='your_host',                                                 
-              user='your_username',                                             
-              password='your_password',                                         
-              database='your_database'                                          
-          )                                                                     
-          if connection.is_connected():                                         
-              print('Connected to MySQL database')                              
-          return connection                                                     
-      except Error as e:                                                        
-          print(f'Error: {e}')                                                  
-          return None                                                           
-                                                                                
-  # Function to create a table                                                  
-  def create_table(connection, create_table_sql):                               
-      try:                                                                      
-          cursor = connection.cursor()                                          
-          cursor.execute(create_table_sql)                                      
-          print('Table created successfully')                                   
-      except Error as e:                                                        
-          print(f'Error: {e}')                                                  
-                                                                                
-  # Function to insert data into a table                                        
-  def insert_data(connection, df, table_name):                                  
-      try:                                                                      
-          cursor = connection.cursor()                                          
-          for i, row in df.iterrows():                                          
-              sql = f"INSERT INTO {table_name} VALUES {tuple(row)}"             
-              cursor.execute(sql)                                               
-          connection.commit()                                                   
-          print(f'Data inserted successfully into {table_name}')                
-      except Error as e:                                                        
-          print(f'Error: {e}')                                                  
-                                                                                
-  # Main execution                                                              
-  if __name__ == "__main__":                                                    
-      connection = connect_to_mysql()                                           
-                                                                                
-      # Define table schemas (Adjust column types and names as needed)          
-      user_log_table_sql = '''                                                  
-      CREATE TABLE IF NOT EXISTS USER_LOG (                                     
-          user_id INT,                                                          
-          date DATE,                                                            
-          time TIME                                                             
-      )'''                                                                      
-                                                                                
-      activity_log_table_sql = '''                                              
-      CREATE TABLE IF NOT EXISTS ACTIVITY_LOG (                                 
-          component VARCHAR(255),                                               
-          action VARCHAR(255)                                                   
-      )'''                                                                      
-                                                                                
-      component_codes_table_sql = '''                                           
-      CREATE TABLE IF NOT EXISTS COMPONENT_CODES (                              
-          component VARCHAR(255),                                               
-          code VARCHAR(255)                                                     
-      )'''                                                                      
-                                                                                
-      # Create tables                                                           
-      create_table(connection, user_log_table_sql)                              
-      create_table(connection, activity_log_table_sql)                          
-      create_table(connection, component_codes_table_sql)                       
-                                                                                
-      # Load cleaned CSV files                                                  
-      user_log_df = pd.read_csv('USER_LOG_cleaned.csv')                         
-      activity_log_df = pd.read_csv('ACTIVITY_LOG_cleaned.csv')                 
-      component_codes_df = pd.read_csv('COMPONENT_CODES_cleaned.csv')           
-                                                                                
-      # Insert data into tables                                                 
-      insert_data(connection, user_log_df, 'USER_LOG')                          
-      insert_data(connection, activity_log_df, 'ACTIVITY_LOG')                  
-      insert_data(connection, component_codes_df, 'COMPONENT_CODES')            
-  '''                                                                           
-                                                                                
-  # Append the extended code to the script                                      
-  with open('backup_to_mysql.py', 'a') as file:                                 
-      file.write(extended_code)                                                 
-                                 
\ No newline at end of file
+import argparse
+import sqlite3
+
+import pandas as pd
+
+from pipeline import DATE_FORMAT, USER_COLUMN, parse_timestamps, parse_times
+
+DEFAULT_BATCH_SIZE = 1000
+STATE_TABLE = 'BACKUP_STATE'
+# Date layout of the *_cleaned.csv files; raw exports use pipeline.DATE_FORMAT
+ISO_DATE_FORMAT = '%Y-%m-%d'
+# Raised by table_rows when a frame does not fit its table schema
+CONVERSION_ERRORS = (KeyError, TypeError, ValueError)
+
+# Table name -> [(column, SQL type, source DataFrame column)]
+TABLE_SCHEMAS = {
+    'USER_LOG': [
+        ('user_id', 'VARCHAR(255)', 'User_ID'),
+        ('date', 'DATE', 'Date'),
+        ('time', 'TIME', 'Time'),
+    ],
+    'ACTIVITY_LOG': [
+        ('user_id', 'VARCHAR(255)', 'User_ID'),
+        ('component', 'VARCHAR(255)', 'Component'),
+        ('action', 'VARCHAR(255)', 'Action'),
+        ('target', 'VARCHAR(255)', 'Target'),
+    ],
+    'COMPONENT_CODES': [
+        ('component', 'VARCHAR(255)', 'Component'),
+        ('code', 'VARCHAR(255)', 'Code'),
+    ],
+}
+
+
+def database_errors():
+    """Exception types raised by the supported database drivers."""
+    try:
+        from mysql.connector import Error
+    except ImportError:
+        return (sqlite3.Error,)
+    return (sqlite3.Error, Error)
+
+
+# Function to connect to MySQL database
+def connect_to_mysql(host='your_host', user='your_username', password='your_password',
+                     database='your_database'):
+    try:
+        import mysql.connector
+        connection = mysql.connector.connect(
+            host=host,
+            user=user,
+            password=password,
+            database=database
+        )
+        if connection.is_connected():
+            print('Connected to MySQL database')
+        return connection
+    except (ImportError, *database_errors()) as e:
+        print(f'Error: {e}')
+        return None
+
+
+# Function to open the embedded SQLite stand-in
+def connect_to_sqlite(path='backup.sqlite3'):
+    try:
+        connection = sqlite3.connect(path)
+        print(f'Connected to SQLite database {path}')
+        return connection
+    except sqlite3.Error as e:
+        print(f'Error: {e}')
+        return None
+
+
+def placeholder(connection):
+    """Parameter marker for the connection's driver."""
+    return '?' if isinstance(connection, sqlite3.Connection) else '%s'
+
+
+def create_table_sql(table_name):
+    """CREATE TABLE statement for one of TABLE_SCHEMAS."""
+    columns = ',\n    '.join(f'{name} {sql_type}' for name, sql_type, _ in TABLE_SCHEMAS[table_name])
+    return f'CREATE TABLE IF NOT EXISTS {table_name} (\n    {columns}\n)'
+
+
+# Function to create a table
+def create_table(connection, create_table_sql):
+    try:
+        cursor = connection.cursor()
+        cursor.execute(create_table_sql)
+        connection.commit()
+        print('Table created successfully')
+    except database_errors() as e:
+        print(f'Error: {e}')
+
+
+def parse_dates(column):
+    """
+    Parse Date strings in either the export or the ISO layout.
+
+    Each layout is parsed with its own fixed format, so ISO dates from the
+    cleaned CSV files are never read day first.
+    Args:
+        column (pd.Series): Strings such as '04/09/2023 00:00' or '2023-09-04'.
+    Returns:
+        pd.Series: datetime64 days; missing values are NaT.
+    """
+    iso = column.astype(str).str.match(r'\d{4}-\d{2}-\d{2}')
+    days = pd.Series(pd.NaT, index=column.index, dtype='datetime64[ns]')
+    for rows, date_format in [(iso, ISO_DATE_FORMAT), (~iso, DATE_FORMAT)]:
+        if rows.any():
+            days[rows], _ = parse_timestamps(column[rows], date_format=date_format)
+    return days
+
+
+def table_rows(df, table_name):
+    """
+    Select and convert DataFrame columns to match a table schema.
+
+    Accepts cleaned frames (User_ID, datetime Date), cleaned CSV files
+    (yyyy-mm-dd Date strings) or raw exports (User Full Name *Anonymized,
+    dd/mm/yyyy Date strings).
+    Args:
+        df (pd.DataFrame): Frame to back up.
+        table_name (str): Key of TABLE_SCHEMAS.
+    Returns:
+        pd.DataFrame: Object columns in schema order, with None for missing values.
+    """
+    df = df.rename(columns={USER_COLUMN: 'User_ID'})
+    rows = {}
+    for name, sql_type, source in TABLE_SCHEMAS[table_name]:
+        column = df[source]
+        if sql_type == 'DATE':
+            if not pd.api.types.is_datetime64_any_dtype(column):
+                column = parse_dates(column)
+            column = column.dt.strftime('%Y-%m-%d')
+        elif sql_type == 'TIME':
+            # Same time parsing as the pipeline, so 'HH:MM' times are stored as 'HH:MM:00'
+            column = parse_times(column).map(
+                lambda value: None if pd.isna(value) else str(value).split()[-1][:8])
+        else:
+            column = column.astype(object)
+        rows[name] = column.astype(object)
+    rows = pd.DataFrame(rows)
+    return rows.where(rows.notna(), None)
+
+
+def insert_rows(cursor, rows, table_name, marker, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Run parameterized executemany batches without committing.
+    Args:
+        cursor: Database cursor.
+        rows (pd.DataFrame): Output of table_rows.
+        table_name (str): Key of TABLE_SCHEMAS.
+        marker (str): Parameter marker, see placeholder.
+        batch_size (int): Rows per executemany call.
+    """
+    columns = [name for name, _, _ in TABLE_SCHEMAS[table_name]]
+    markers = ', '.join([marker] * len(columns))
+    sql = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({markers})"
+    for start in range(0, len(rows), batch_size):
+        batch = rows.iloc[start:start + batch_size]
+        cursor.executemany(sql, list(batch.itertuples(index=False, name=None)))
+
+
+# Function to insert data into a table
+def insert_data(connection, df, table_name, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Bulk insert a DataFrame with parameterized executemany batches.
+
+    All batches run in a single transaction that is rolled back on error.
+    Args:
+        connection: MySQL or SQLite connection.
+        df (pd.DataFrame): Frame to back up.
+        table_name (str): Key of TABLE_SCHEMAS.
+        batch_size (int): Rows per executemany call.
+    Returns:
+        int: Rows inserted.
+    """
+    try:
+        rows = table_rows(df, table_name)
+    except CONVERSION_ERRORS as e:
+        print(f'Error converting {table_name}: {e}')
+        return 0
+    try:
+        insert_rows(connection.cursor(), rows, table_name, placeholder(connection), batch_size)
+        connection.commit()
+        print(f'{len(rows)} rows inserted into {table_name}')
+        return len(rows)
+    except database_errors() as e:
+        connection.rollback()
+        print(f'Error: {e}')
+        return 0
+
+
+def read_high_water(connection, table_name):
+    """
+    High-water mark stored for a table by the last incremental backup.
+
+    USER_LOG marks are 'YYYY-MM-DD HH:MM:SS' timestamps; tables without a
+    timestamp use the number of rows already backed up.
+    Args:
+        connection: MySQL or SQLite connection.
+        table_name (str): Key of TABLE_SCHEMAS.
+    Returns:
+        str: Stored mark, or None if the table was never backed up.
+    """
+    cursor = connection.cursor()
+    cursor.execute(
+        f'SELECT high_water FROM {STATE_TABLE} WHERE table_name = {placeholder(connection)}',
+        (table_name,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def users_at_mark(connection, high_water):
+    """
+    User IDs whose USER_LOG rows were backed up with exactly the high-water timestamp.
+    Args:
+        connection: MySQL or SQLite connection.
+        high_water (str): 'YYYY-MM-DD HH:MM:SS' mark, or None.
+    Returns:
+        set: User IDs stored at the mark.
+    """
+    if high_water is None:
+        return set()
+    marker = placeholder(connection)
+    date, time = high_water.split(' ', 1)
+    cursor = connection.cursor()
+    cursor.execute(
+        f"SELECT user_id FROM USER_LOG WHERE date = {marker} AND COALESCE(time, '00:00:00') = {marker}",
+        (date, time))
+    return {row[0] for row in cursor.fetchall()}
+
+
+def new_rows(rows, table_name, high_water, stored_at_mark=()):
+    """
+    Rows of a converted frame that are past the high-water mark.
+
+    Marks have one-second resolution, so USER_LOG rows with the mark's own
+    timestamp are kept unless that user's row was stored with it.
+    Args:
+        rows (pd.DataFrame): Output of table_rows.
+        table_name (str): Key of TABLE_SCHEMAS.
+        high_water (str): Output of read_high_water.
+        stored_at_mark (set): Output of users_at_mark.
+    Returns:
+        tuple: (rows to insert, new high-water mark)
+    """
+    if table_name == 'USER_LOG':
+        stamps = rows['date'].fillna('') + ' ' + rows['time'].fillna('00:00:00')
+        if high_water is not None:
+            at_mark = (stamps == high_water) & ~rows['user_id'].isin(list(stored_at_mark))
+            keep = ((stamps > high_water) | at_mark).to_numpy()
+            rows, stamps = rows[keep], stamps[keep]
+        return rows, stamps.max() if len(stamps) else high_water
+
+    # Append-only exports: skip the rows already written
+    offset = int(high_water) if high_water is not None else 0
+    return rows.iloc[offset:], str(max(offset, len(rows)))
+
+
+def incremental_backup(connection, frames, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Back up only rows newer than each table's stored high-water mark.
+
+    Rows and the updated mark for a table are committed together.
+    Args:
+        connection: MySQL or SQLite connection.
+        frames (dict): DataFrames keyed by table name.
+        batch_size (int): Rows per executemany call.
+    Returns:
+        dict: Rows inserted per table.
+    """
+    marker = placeholder(connection)
+    create_table(connection, f'''CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+    table_name VARCHAR(64) PRIMARY KEY,
+    high_water VARCHAR(32)
+)''')
+    inserted = {}
+    for table_name, df in frames.items():
+        create_table(connection, create_table_sql(table_name))
+        try:
+            high_water = read_high_water(connection, table_name)
+            stored_at_mark = users_at_mark(connection, high_water) if table_name == 'USER_LOG' else set()
+            rows, high_water = new_rows(table_rows(df, table_name), table_name, high_water, stored_at_mark)
+            cursor = connection.cursor()
+            insert_rows(cursor, rows, table_name, marker, batch_size)
+            cursor.execute(
+                f'REPLACE INTO {STATE_TABLE} (table_name, high_water) VALUES ({marker}, {marker})',
+                (table_name, high_water))
+            connection.commit()
+            inserted[table_name] = len(rows)
+            print(f'{len(rows)} new rows inserted into {table_name}')
+        except (*CONVERSION_ERRORS, *database_errors()) as e:
+            # A frame that does not convert only skips its own table
+            connection.rollback()
+            inserted[table_name] = 0
+            print(f'Error: {e}')
+    return inserted
+
+
+def load_tables(connection):
+    """
+    Reload backed-up tables with one bulk read per table.
+
+    Columns and Date formatting are mapped back to the raw export layout
+    so the frames can go through the normal cleaning pipeline.
+    Args:
+        connection: MySQL or SQLite connection.
+    Returns:
+        dict: 'activity', 'user' and 'component' DataFrames.
+    """
+    frames = {}
+    for key, table_name in [('activity', 'ACTIVITY_LOG'), ('user', 'USER_LOG'),
+                            ('component', 'COMPONENT_CODES')]:
+        schema = TABLE_SCHEMAS[table_name]
+        columns = ', '.join(name for name, _, _ in schema)
+        df = pd.read_sql(f'SELECT {columns} FROM {table_name}', connection)
+        df.columns = [source for _, _, source in schema]
+        if 'Date' in df:
+            df['Date'] = pd.to_datetime(df['Date'].astype(str)).dt.strftime('%d/%m/%Y')
+        if 'Time' in df:
+            # MySQL returns TIME as timedelta
+            df['Time'] = df['Time'].map(
+                lambda value: str(value).split()[-1][:8] if value is not None else None)
+        frames[key] = df.rename(columns={'User_ID': USER_COLUMN})
+    return frames
+
+
+def backup_tables(connection, frames, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Create the tables if needed and back up each frame.
+    Args:
+        connection: MySQL or SQLite connection.
+        frames (dict): DataFrames keyed by table name.
+        batch_size (int): Rows per executemany call.
+    """
+    for table_name, df in frames.items():
+        create_table(connection, create_table_sql(table_name))
+        insert_data(connection, df, table_name, batch_size)
+
+
+# Main execution
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Back up cleaned logs to MySQL or SQLite.')
+    parser.add_argument('--sqlite', metavar='PATH', help='Use an embedded SQLite database instead of MySQL')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only insert rows newer than the last backup')
+    args = parser.parse_args()
+
+    connection = connect_to_sqlite(args.sqlite) if args.sqlite else connect_to_mysql()
+    if connection is None:
+        raise SystemExit(1)
+
+    # Load cleaned CSV files and insert data into tables
+    frames = {
+        'USER_LOG': pd.read_csv('USER_LOG_cleaned.csv'),
+        'ACTIVITY_LOG': pd.read_csv('ACTIVITY_LOG_cleaned.csv'),
+        'COMPONENT_CODES': pd.read_csv('COMPONENT_CODES_cleaned.csv'),
+    }
+    if args.incremental:
+        incremental_backup(connection, frames, args.batch_size)
+    else:
+        backup_tables(connection, frames, args.batch_size)
+    connection.close()
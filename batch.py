@@ -0,0 +1,164 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from analysis import InteractionMatrix, compute_statistics
+from pipeline import aggregate_interactions, clean_activity_log, clean_user_log
+from plotting import render_heatmap
+from schema import apply_schema, downcast_counts
+
+COHORT_FILES = {
+    'activity': 'ACTIVITY_LOG.csv',
+    'user': 'USER_LOG.csv',
+    'component': 'COMPONENT_CODES.csv',
+}
+STATISTICS_COMPONENTS = ['Quiz', 'Lecture', 'Assignment', 'Attendence', 'Survey']
+CORRELATION_COMPONENTS = ['Assignment', 'Quiz', 'Lecture', 'Book', 'Project', 'Course']
+SUMMARY_COLUMNS = ['cohort', 'status', 'users', 'user_log_rows', 'activity_log_rows',
+                   'interaction_rows', 'interactions', 'chi2', 'p_value', 'dof', 'seconds']
+
+
+def find_cohorts(input_dir):
+    """
+    Find cohort directories holding ACTIVITY_LOG, USER_LOG and COMPONENT_CODES CSVs.
+
+    Each sub-directory of input_dir with all three files is one cohort;
+    input_dir itself counts as a cohort when it holds them directly.
+    Args:
+        input_dir (str): Directory of course exports.
+    Returns:
+        dict: Cohort name -> {'activity', 'user', 'component'} paths.
+    """
+    candidates = [(os.path.basename(os.path.abspath(input_dir)), input_dir)]
+    candidates += [
+        (name, os.path.join(input_dir, name))
+        for name in sorted(os.listdir(input_dir))
+        if os.path.isdir(os.path.join(input_dir, name))
+    ]
+    cohorts = {}
+    for name, directory in candidates:
+        paths = {key: os.path.join(directory, file_name) for key, file_name in COHORT_FILES.items()}
+        if all(os.path.isfile(path) for path in paths.values()):
+            cohorts[name] = paths
+    return cohorts
+
+
+def process_cohort(name, paths, output_dir, statistics_components=STATISTICS_COMPONENTS,
+                   correlation_components=CORRELATION_COMPONENTS):
+    """
+    Run clean -> merge -> stats -> heatmap for one cohort and write its outputs.
+    Args:
+        name (str): Cohort name, used as the output sub-directory.
+        paths (dict): Output of find_cohorts for this cohort.
+        output_dir (str): Root output directory.
+        statistics_components (list): Components for mean/median/mode.
+        correlation_components (list): Components for the heatmap and chi-square.
+    Returns:
+        dict: Summary row for the cohort.
+    """
+    started = time.perf_counter()
+    summary = {'cohort': name}
+    try:
+        cohort_dir = os.path.join(output_dir, name)
+        os.makedirs(cohort_dir, exist_ok=True)
+
+        # Load and clean
+        activity_df = pd.read_csv(paths['activity'])
+        user_df = pd.read_csv(paths['user'])
+        component_df = pd.read_csv(paths['component'])
+        activity_df, user_df, _ = apply_schema(activity_df, user_df, component_df)
+        activity_log = clean_activity_log(activity_df)
+        user_log = clean_user_log(user_df)
+
+        # Merge and count
+        interaction_counts = downcast_counts(aggregate_interactions(user_log, activity_log))
+        interaction_counts.to_csv(os.path.join(cohort_dir, 'interaction_counts.csv'), index=False)
+
+        # Statistics
+        semester_stats_df, monthly_stats_df = compute_statistics(interaction_counts, statistics_components)
+        semester_stats_df.to_csv(os.path.join(cohort_dir, 'semester_statistics.csv'), index=False)
+        monthly_stats_df.to_csv(os.path.join(cohort_dir, 'monthly_statistics.csv'), index=False)
+
+        # Correlation heatmap and chi-square
+        interaction_matrix = InteractionMatrix.from_counts(interaction_counts, correlation_components)
+        correlation_matrix = interaction_matrix.correlation()
+        correlation_matrix.to_csv(os.path.join(cohort_dir, 'correlation.csv'))
+        if not correlation_matrix.empty:
+            with open(os.path.join(cohort_dir, 'heatmap.png'), 'wb') as handle:
+                handle.write(render_heatmap(correlation_matrix))
+        chi2, p_value, dof = interaction_matrix.chi_square()
+
+        summary.update({
+            'status': 'ok',
+            'users': user_log['User_ID'].nunique(),
+            'user_log_rows': len(user_log),
+            'activity_log_rows': len(activity_log),
+            'interaction_rows': len(interaction_counts),
+            'interactions': int(interaction_counts['Interaction_Count'].sum()),
+            'chi2': chi2,
+            'p_value': p_value,
+            'dof': dof,
+        })
+    except Exception as e:
+        summary.update({'status': f"error: {str(e)}"})
+    summary['seconds'] = round(time.perf_counter() - started, 3)
+    return summary
+
+
+def run_batch(input_dir, output_dir, workers=None, statistics_components=STATISTICS_COMPONENTS,
+              correlation_components=CORRELATION_COMPONENTS):
+    """
+    Process every cohort under input_dir on a process pool.
+
+    Per-cohort outputs go to output_dir/<cohort>/. A combined summary.csv
+    and semester_statistics.csv (with a Cohort column) are written to
+    output_dir.
+    Args:
+        input_dir (str): Directory of course exports, see find_cohorts.
+        output_dir (str): Root output directory.
+        workers (int): Process pool size; None uses the CPU count.
+        statistics_components (list): Components for mean/median/mode.
+        correlation_components (list): Components for the heatmap and chi-square.
+    Returns:
+        pd.DataFrame: Combined summary, one row per cohort.
+    """
+    cohorts = find_cohorts(input_dir)
+    os.makedirs(output_dir, exist_ok=True)
+
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(process_cohort, name, paths, output_dir,
+                            statistics_components, correlation_components)
+            for name, paths in cohorts.items()
+        ]
+        for future in as_completed(futures):
+            summary = future.result()
+            print(f"{summary['cohort']}: {summary['status']} ({summary['seconds']}s)")
+            rows.append(summary)
+
+    summary_df = pd.DataFrame(rows, columns=SUMMARY_COLUMNS).sort_values('cohort', ignore_index=True)
+    summary_df.to_csv(os.path.join(output_dir, 'summary.csv'), index=False)
+
+    # Combined semester statistics across cohorts
+    semester_frames = []
+    for name in summary_df.loc[summary_df['status'] == 'ok', 'cohort']:
+        frame = pd.read_csv(os.path.join(output_dir, name, 'semester_statistics.csv'))
+        semester_frames.append(frame.assign(Cohort=name))
+    if semester_frames:
+        pd.concat(semester_frames, ignore_index=True).to_csv(
+            os.path.join(output_dir, 'semester_statistics.csv'), index=False)
+    return summary_df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Run the analysis pipeline for many course exports.')
+    parser.add_argument('input_dir', help='Directory with one sub-directory of CSV exports per cohort')
+    parser.add_argument('output_dir', help='Directory for per-cohort outputs and the combined summary')
+    parser.add_argument('--workers', type=int, default=None, help='Process pool size (default: CPU count)')
+    args = parser.parse_args()
+
+    run_batch(args.input_dir, args.output_dir, args.workers)
@@ -0,0 +1,226 @@
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import pandas as pd
+
+from main import DataAnalysisApp
+from pipeline import DTYPE_BACKENDS
+from plotting import heatmap_renderer
+from schema import format_bytes, memory_usage
+from synthetic import write_logs
+
+STATISTICS_COMPONENTS = ['Quiz', 'Lecture', 'Assignment', 'Attendence', 'Survey']
+CORRELATION_COMPONENTS = ['Quiz', 'Lecture', 'Assignment', 'Attendence', 'Survey']
+STAGES = ['load_csv_files', 'clean_and_merge_data', 'generate_statistics', 'generate_correlation_heatmap']
+DEFAULT_TOLERANCE = 0.25
+
+
+def check_result(stage, result):
+    """Raise if an app method returned one of its error messages instead of a result."""
+    message = result[0] if isinstance(result, tuple) else None
+    if isinstance(message, str) and message.startswith(('Error', 'Please')):
+        raise RuntimeError(f"{stage} failed: {message}")
+
+
+def run_stages(paths, on_stage, dtype_backend='numpy'):
+    """
+    Run the app pipeline once on a fresh app, calling on_stage around each step.
+    Args:
+        paths (dict): 'activity', 'user' and 'component' CSV paths.
+        on_stage (callable): Context manager factory taking the stage name.
+        dtype_backend (str): The app's dtype backend, see pipeline.DTYPE_BACKENDS.
+    Returns:
+        DataAnalysisApp: The app after the run.
+    """
+    # No disk cache, no shared datasets and no memoized heatmaps, so every run does the full work
+    app = DataAnalysisApp(cache_dir=None, shared_datasets=None, dtype_backend=dtype_backend)
+    heatmap_renderer.results.clear()
+    steps = {
+        'load_csv_files': lambda: app.load_csv_files(paths['activity'], paths['user'], paths['component']),
+        'clean_and_merge_data': app.clean_and_merge_data,
+        'generate_statistics': lambda: app.generate_statistics(STATISTICS_COMPONENTS),
+        'generate_correlation_heatmap': lambda: app.generate_correlation_heatmap(CORRELATION_COMPONENTS),
+    }
+    for stage in STAGES:
+        with on_stage(stage):
+            result = steps[stage]()
+        check_result(stage, result)
+    return app
+
+
+class StageTimer:
+    """Records the wall time of each stage; keeps the fastest of several runs."""
+
+    def __init__(self):
+        self.seconds = {}
+
+    @contextmanager
+    def __call__(self, stage):
+        started = time.perf_counter()
+        yield
+        elapsed = time.perf_counter() - started
+        self.seconds[stage] = min(elapsed, self.seconds.get(stage, elapsed))
+
+
+class StagePeakMemory:
+    """Records the tracemalloc peak of each stage, relative to its starting allocation."""
+
+    def __init__(self):
+        self.peak_bytes = {}
+
+    @contextmanager
+    def __call__(self, stage):
+        tracemalloc.reset_peak()
+        start, _ = tracemalloc.get_traced_memory()
+        yield
+        _, peak = tracemalloc.get_traced_memory()
+        self.peak_bytes[stage] = peak - start
+
+
+def run_benchmark(users=1000, days=90, events_per_user=50, seed=0, repeat=3, dtype_backend='numpy'):
+    """
+    Time each app stage on generated logs and measure its peak memory.
+
+    Timings are the best of `repeat` untraced runs; peak memory comes from
+    one extra run under tracemalloc, which would otherwise skew the timings.
+    Args:
+        users (int): Number of synthetic users.
+        days (int): Days covered by the user log.
+        events_per_user (int): Activity rows and logins per user.
+        seed (int): Random seed.
+        repeat (int): Timed runs per stage.
+        dtype_backend (str): The app's dtype backend, see pipeline.DTYPE_BACKENDS.
+    Returns:
+        dict: Configuration, environment, per-stage 'seconds' and 'peak_bytes', and
+            'loaded_bytes', the deep memory use of the loaded logs.
+    """
+    config = {'users': users, 'days': days, 'events_per_user': events_per_user, 'seed': seed, 'repeat': repeat,
+              'dtype_backend': dtype_backend}
+    with tempfile.TemporaryDirectory(prefix='benchmark-') as directory:
+        paths = write_logs(directory, users=users, days=days, events_per_user=events_per_user, seed=seed)
+
+        timer = StageTimer()
+        for _ in range(repeat):
+            app = run_stages(paths, timer, dtype_backend)
+        # tracemalloc does not see Arrow's memory pool, so also compare the loaded frames directly
+        loaded_bytes = memory_usage(app.original_data['activity'], app.original_data['user'])
+
+        memory = StagePeakMemory()
+        tracemalloc.start()
+        try:
+            run_stages(paths, memory, dtype_backend)
+        finally:
+            tracemalloc.stop()
+
+    return {
+        'config': config,
+        'environment': {'python': platform.python_version(), 'pandas': pd.__version__,
+                        'platform': platform.platform()},
+        'stages': {
+            stage: {'seconds': round(timer.seconds[stage], 6), 'peak_bytes': memory.peak_bytes[stage]}
+            for stage in STAGES
+        },
+        'loaded_bytes': loaded_bytes,
+    }
+
+
+def compare_results(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Stages that got slower or use more memory than the baseline allows.
+    Args:
+        results (dict): Output of run_benchmark.
+        baseline (dict): Earlier output of run_benchmark, e.g. loaded from JSON.
+        tolerance (float): Allowed relative increase, 0.25 is 25%.
+    Returns:
+        list: (stage, metric, baseline value, new value) tuples for each regression.
+    """
+    if results['config'] != baseline['config']:
+        print(f"Warning: baseline was recorded with {baseline['config']}, not {results['config']}")
+    regressions = []
+    for stage, figures in results['stages'].items():
+        before = baseline['stages'].get(stage)
+        if before is None:
+            continue
+        for metric in ['seconds', 'peak_bytes']:
+            if figures[metric] > before[metric] * (1 + tolerance):
+                regressions.append((stage, metric, before[metric], figures[metric]))
+    return regressions
+
+
+def format_results(results):
+    """One line per stage with time and peak memory."""
+    lines = [f"{stage:30} {figures['seconds']:9.3f}s {format_bytes(figures['peak_bytes']):>10}"
+             for stage, figures in results['stages'].items()]
+    if 'loaded_bytes' in results:
+        lines.append(f"{'loaded logs':30} {'':10} {format_bytes(results['loaded_bytes']):>10}")
+    return "\n".join(lines)
+
+
+def format_comparison(results, other):
+    """
+    Per-stage time and memory of two runs side by side, e.g. the numpy and pyarrow backends.
+    Args:
+        results (dict): Output of run_benchmark.
+        other (dict): Output of run_benchmark on the same input.
+    Returns:
+        str: One line per stage with both values and the relative change.
+    """
+    def change(before, after):
+        return f"{(after - before) / before:+.0%}" if before else "n/a"
+
+    names = (results['config']['dtype_backend'], other['config']['dtype_backend'])
+    lines = [f"{'':30} {names[0]:>10} {names[1]:>10} {'change':>7}"]
+    for stage, figures in results['stages'].items():
+        seconds = (figures['seconds'], other['stages'][stage]['seconds'])
+        lines.append(f"{stage:30} {seconds[0]:9.3f}s {seconds[1]:9.3f}s {change(*seconds):>7}")
+    loaded = (results['loaded_bytes'], other['loaded_bytes'])
+    lines.append(f"{'loaded logs':30} {format_bytes(loaded[0]):>10} {format_bytes(loaded[1]):>10} "
+                 f"{change(*loaded):>7}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the load, clean/merge, statistics and heatmap stages.')
+    parser.add_argument('--users', type=int, default=1000, help='Number of synthetic users')
+    parser.add_argument('--days', type=int, default=90, help='Days covered by the user log')
+    parser.add_argument('--events-per-user', type=int, default=50, help='Activity rows and logins per user')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per stage')
+    parser.add_argument('--save', help='Write the results as a JSON baseline to this path')
+    parser.add_argument('--compare', help='Compare against a JSON baseline and exit 1 on regressions')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Allowed relative slowdown or memory growth when comparing')
+    parser.add_argument('--dtype-backend', choices=DTYPE_BACKENDS, default='numpy', help='App dtype backend')
+    parser.add_argument('--compare-backends', action='store_true',
+                        help='Also run the other dtype backend on the same input and print both')
+    args = parser.parse_args()
+
+    results = run_benchmark(args.users, args.days, args.events_per_user, args.seed, args.repeat,
+                            args.dtype_backend)
+    print(format_results(results))
+
+    if args.compare_backends:
+        other_backend = next(backend for backend in DTYPE_BACKENDS if backend != args.dtype_backend)
+        other = run_benchmark(args.users, args.days, args.events_per_user, args.seed, args.repeat, other_backend)
+        print(format_comparison(results, other))
+
+    if args.save:
+        with open(args.save, 'w') as handle:
+            json.dump(results, handle, indent=2)
+        print(f"Saved baseline to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)
+        regressions = compare_results(results, baseline, args.tolerance)
+        for stage, metric, before, after in regressions:
+            print(f"Regression in {stage} {metric}: {before} -> {after}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against the baseline.")
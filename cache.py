@@ -0,0 +1,263 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+
+import pandas as pd
+
+# Bump when the cleaned frames or the interaction table change shape so that
+# entries written by older code are not reused
+CACHE_VERSION = 3
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+DEFAULT_CACHE_MAX_BYTES = 1 << 30
+
+
+def file_path(file):
+    """
+    Path of an uploaded file, which Gradio passes as a path or a tempfile wrapper.
+    Args:
+        file (str or file-like): Uploaded file.
+    Returns:
+        str: Path on disk.
+    """
+    return getattr(file, 'name', file)
+
+
+def content_hash(*files):
+    """
+    SHA-256 over the contents of the given files, in order.
+    Args:
+        *files (str or file-like): Files to hash.
+    Returns:
+        str: Hex digest.
+    """
+    digest = hashlib.sha256(f'v{CACHE_VERSION}'.encode())
+    for file in files:
+        with open(file_path(file), 'rb') as handle:
+            size = 0
+            for block in iter(lambda: handle.read(1 << 20), b''):
+                digest.update(block)
+                size += len(block)
+        # Length suffix keeps (ab, c) and (a, bc) apart
+        digest.update(size.to_bytes(8, 'little'))
+    return digest.hexdigest()
+
+
+def frame_fingerprint(frame):
+    """
+    Content fingerprint of a DataFrame, independent of its index.
+    Args:
+        frame (pd.DataFrame): Frame to fingerprint.
+    Returns:
+        str: Hex digest.
+    """
+    digest = hashlib.sha256(','.join(map(str, frame.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def combine_fingerprints(*fingerprints):
+    """Fingerprint of data built from parts with the given fingerprints, in order."""
+    return hashlib.sha256('|'.join(fingerprints).encode()).hexdigest()
+
+
+def read_frame(path):
+    """
+    Read a Parquet file written by DataFrame.to_parquet, keeping Arrow-backed columns.
+
+    pandas cannot rebuild a column from a stored ArrowDtype name such as
+    'dictionary<values=string, ...>[pyarrow]', so columns that were Arrow
+    backed when written are mapped back to ArrowDtype by their Arrow type.
+    Args:
+        path (str): Parquet file.
+    Returns:
+        pd.DataFrame: The frame, with other columns restored as pandas stores them.
+    """
+    import pyarrow.parquet as pq
+
+    table = pq.read_table(path)
+    columns = (table.schema.pandas_metadata or {}).get('columns', [])
+    arrow_types = {}
+    for column in columns:
+        if str(column.get('numpy_type')).endswith('[pyarrow]'):
+            arrow_type = table.schema.field(column['name']).type
+            arrow_types[arrow_type] = pd.ArrowDtype(arrow_type)
+    return table.to_pandas(types_mapper=arrow_types.get)
+
+
+class DatasetCache:
+    """
+    On-disk Parquet cache of cleaned frames, keyed by input content hash.
+
+    Each entry is a directory holding one Parquet file per frame. Entries
+    are evicted least recently used first once the cache grows past
+    max_bytes.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _entry(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def get(self, key):
+        """
+        Load a cached entry.
+        Args:
+            key (str): Content hash.
+        Returns:
+            dict: Frames by name, or None on a miss.
+        """
+        entry = self._entry(key)
+        if not os.path.isdir(entry):
+            return None
+        try:
+            frames = {
+                name[:-len('.parquet')]: read_frame(os.path.join(entry, name))
+                for name in os.listdir(entry) if name.endswith('.parquet')
+            }
+        except Exception:
+            # A damaged entry is treated as a miss and rebuilt
+            shutil.rmtree(entry, ignore_errors=True)
+            return None
+        # Touch the entry so eviction sees it as recently used
+        os.utime(entry)
+        return frames
+
+    def put(self, key, frames):
+        """
+        Store frames under key, then evict old entries over the size budget.
+        Args:
+            key (str): Content hash.
+            frames (dict): DataFrames by name.
+        """
+        # Write into a temporary directory and rename so readers never see a partial entry
+        staging = tempfile.mkdtemp(dir=self.cache_dir, prefix='.tmp-')
+        try:
+            for name, frame in frames.items():
+                frame.to_parquet(os.path.join(staging, f'{name}.parquet'))
+            entry = self._entry(key)
+            shutil.rmtree(entry, ignore_errors=True)
+            os.replace(staging, entry)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        for key in os.listdir(self.cache_dir):
+            entry = self._entry(key)
+            if key.startswith('.') or not os.path.isdir(entry):
+                continue
+            size = sum(
+                os.path.getsize(os.path.join(entry, name)) for name in os.listdir(entry)
+            )
+            entries.append((os.path.getmtime(entry), size, entry))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+
+class SharedDataset(dict):
+    """Processed frames by name; a dict subclass so the registry can hold it weakly."""
+
+
+class SharedDatasets:
+    """
+    In-process registry of processed datasets shared read-only between sessions.
+
+    Sessions that load the same inputs get the same frames instead of a
+    copy each. Datasets are held weakly and dropped once no session refers
+    to them. Callers must not modify the shared frames.
+    """
+
+    def __init__(self):
+        self._datasets = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Shared dataset for key.
+        Args:
+            key (str): Content hash.
+        Returns:
+            SharedDataset: Frames by name, or None if no session holds them.
+        """
+        with self._lock:
+            return self._datasets.get(key)
+
+    def put(self, key, frames):
+        """
+        Register frames under key unless another session got there first.
+        Args:
+            key (str): Content hash.
+            frames (dict): DataFrames by name.
+        Returns:
+            SharedDataset: The registered dataset, which callers should use.
+        """
+        with self._lock:
+            dataset = self._datasets.get(key)
+            if dataset is None:
+                dataset = SharedDataset(frames)
+                self._datasets[key] = dataset
+            return dataset
+
+
+shared_datasets = SharedDatasets()
+
+
+class LRUCache:
+    """Thread-safe in-memory mapping that evicts the least recently used entry past max_entries."""
+
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def setdefault(self, key, factory):
+        """Return the entry for key, creating it with factory() under the lock if missing."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            value = self._entries[key] = factory()
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return value
+
+    def pop(self, key, default=None):
+        with self._lock:
+            return self._entries.pop(key, default)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
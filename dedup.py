@@ -0,0 +1,160 @@
+import os
+import tempfile
+import weakref
+
+import numpy as np
+import pandas as pd
+
+# Sorted hash runs kept before they are merged into one
+MAX_RUNS = 8
+DEFAULT_MAX_MEMORY_BYTES = 64 << 20
+
+
+def key_hashes(frame, keys):
+    """
+    64-bit fingerprints of the key columns of each row.
+
+    Uses pandas' stable hashing, so categorical and plain string columns
+    with the same values get the same fingerprints, across runs as well.
+    Args:
+        frame (pd.DataFrame): Rows to fingerprint.
+        keys (list): Key columns, as passed to drop_duplicates.
+    Returns:
+        np.ndarray: uint64 fingerprint per row.
+    """
+    return pd.util.hash_pandas_object(frame[keys], index=False).to_numpy(dtype=np.uint64)
+
+
+def key_tuples(frame, keys):
+    """Key tuples of each row, with missing values normalised so they compare equal."""
+    key_frame = frame[keys].astype(object)
+    key_frame = key_frame.where(key_frame.notna(), None)
+    return list(key_frame.itertuples(index=False, name=None))
+
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class HashDeduplicator:
+    """
+    Drops rows whose key columns were seen before, across chunks, appends and runs.
+
+    Keeps only 8 bytes per distinct key: sorted uint64 runs that are merged
+    as they pile up. Past max_memory_bytes the merged run is spilled to a
+    .npy file in spill_dir and memory-mapped. Two different keys hashing
+    to the same fingerprint would wrongly count as a duplicate; exact mode
+    rules that out by also keeping the key tuples, at the memory cost of
+    the old set of tuples.
+    """
+
+    def __init__(self, keys, exact=False, spill_dir=None, max_memory_bytes=DEFAULT_MAX_MEMORY_BYTES):
+        self.keys = keys
+        self.exact = exact
+        self.spill_dir = spill_dir
+        self.max_memory_bytes = max_memory_bytes
+        self.rows = 0
+        self.duplicates = 0
+        self._runs = []
+        self._spill_file = None
+        self._tuples = set() if exact else None
+        self._loaded = []
+
+    def __len__(self):
+        return sum(len(run) for run in self._runs)
+
+    def contains(self, hashes, runs=None):
+        """Boolean mask of fingerprints already seen."""
+        seen = np.zeros(len(hashes), dtype=bool)
+        for run in self._runs if runs is None else runs:
+            if len(run) == 0:
+                continue
+            positions = np.searchsorted(run, hashes)
+            positions[positions == len(run)] = 0
+            seen |= run[positions] == hashes
+        return seen
+
+    def drop_seen(self, frame):
+        """
+        Rows of frame whose keys were not seen before, keeping the first of repeats within frame.
+        Args:
+            frame (pd.DataFrame): Rows to deduplicate.
+        Returns:
+            pd.DataFrame: New rows; their keys are remembered.
+        """
+        hashes = key_hashes(frame, self.keys)
+        seen = self.contains(hashes)
+        if self.exact:
+            # Fingerprint hits only count once the key tuple matches too; fingerprints
+            # loaded from a saved run have no tuples and are trusted
+            tuples = key_tuples(frame, self.keys)
+            trusted = self.contains(hashes, self._loaded)
+            for position in np.flatnonzero(seen & ~trusted):
+                seen[position] = tuples[position] in self._tuples
+            mask = ~seen & ~frame.duplicated(subset=self.keys).to_numpy()
+            self._tuples.update(tuples[position] for position in np.flatnonzero(mask))
+        else:
+            mask = ~seen & ~pd.Series(hashes).duplicated().to_numpy()
+        self.add(hashes[mask])
+        self.rows += len(frame)
+        self.duplicates += int(len(frame) - mask.sum())
+        return frame[mask]
+
+    def add(self, hashes):
+        """Remember fingerprints."""
+        if len(hashes) == 0:
+            return
+        self._runs.append(np.unique(hashes))
+        if len(self._runs) > MAX_RUNS:
+            self.compact()
+
+    def compact(self):
+        """Merge the sorted runs into one, spilling it to disk when it outgrows max_memory_bytes."""
+        merged = np.unique(np.concatenate(self._runs)) if self._runs else np.empty(0, dtype=np.uint64)
+        if self.spill_dir is not None and merged.nbytes > self.max_memory_bytes:
+            merged = self._spill(merged)
+        self._runs = [merged]
+
+    def _spill(self, hashes):
+        os.makedirs(self.spill_dir, exist_ok=True)
+        handle, path = tempfile.mkstemp(dir=self.spill_dir, prefix='seen-', suffix='.npy')
+        os.close(handle)
+        np.save(path, hashes)
+        # The previous spill file is merged into this one; each is removed with its deduplicator
+        if self._spill_file is not None:
+            self._spill_file()
+        self._spill_file = weakref.finalize(self, remove_file, path)
+        self._runs = []
+        return np.load(path, mmap_mode='r')
+
+    def save(self, path):
+        """
+        Write the seen fingerprints to an .npy file so a later run can continue deduplicating.
+        Args:
+            path (str): Output path.
+        """
+        self.compact()
+        np.save(path, np.asarray(self._runs[0]))
+
+    @classmethod
+    def load(cls, path, keys, **options):
+        """
+        Deduplicator that treats the fingerprints saved at path as already seen.
+        Args:
+            path (str): File written by save.
+            keys (list): Key columns.
+            **options: Other HashDeduplicator arguments.
+        Returns:
+            HashDeduplicator: Loaded deduplicator.
+        """
+        deduplicator = cls(keys, **options)
+        deduplicator._runs = [np.load(path, mmap_mode='r')]
+        deduplicator._loaded = list(deduplicator._runs)
+        return deduplicator
+
+    def report(self):
+        """Rows checked and duplicates dropped so far."""
+        return {'rows': self.rows, 'duplicates': self.duplicates, 'distinct_keys': len(self)}
@@ -0,0 +1,233 @@
+import numpy as np
+import pandas as pd
+
+from dedup import HashDeduplicator
+from pipeline import (ACTIVITY_KEYS, COUNT_KEYS, USER_KEYS, clean_activity_log, clean_user_log, count_activities,
+                      count_logins, join_counts)
+from schema import align_categories, downcast_counts
+
+
+def plain_index(counts):
+    """
+    Counts with categorical index levels turned into plain object levels.
+
+    Aggregates from different loads carry different categories; plain
+    levels let them be added together without re-encoding.
+    Args:
+        counts (pd.Series): Counts indexed by a MultiIndex.
+    Returns:
+        pd.Series: Same counts as int64.
+    """
+    levels = [
+        counts.index.get_level_values(level).astype(object)
+        if isinstance(counts.index.levels[level].dtype, pd.CategoricalDtype)
+        else counts.index.get_level_values(level)
+        for level in range(counts.index.nlevels)
+    ]
+    return pd.Series(counts.to_numpy(dtype='int64'), index=pd.MultiIndex.from_arrays(levels), name=counts.name)
+
+
+def add_counts(running, delta):
+    """Sum two count Series on their index, dropping entries that reach zero."""
+    total = running.add(delta, fill_value=0)
+    return total[total != 0].astype('int64')
+
+
+def seen_keys(frame, keys, **options):
+    """
+    Deduplicator that has seen every row of a cleaned log.
+    Args:
+        frame (pd.DataFrame): Cleaned log.
+        keys (list): Deduplication key columns.
+        **options: HashDeduplicator arguments such as exact or spill_dir.
+    Returns:
+        HashDeduplicator: Deduplicator for rows appended to the log.
+    """
+    deduplicator = HashDeduplicator(keys, **options)
+    deduplicator.drop_seen(frame)
+    return deduplicator
+
+
+class UserCounts:
+    """
+    Counts indexed by (User_ID, key) whose rows are read and replaced one user at a time.
+
+    The initial counts are kept as they are, grouped by user, with each
+    user's row range in a dict. Users changed since then live in a small
+    patch Series, so reading or updating the rows of a few users costs as
+    much as those rows, not the whole index. The patch is folded back into
+    the grouped counts once it outgrows them.
+    """
+
+    def __init__(self, counts):
+        self._group(counts)
+
+    def _group(self, counts):
+        codes, users = pd.factorize(counts.index.get_level_values(0))
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(users) + 1))
+        self.base = counts.iloc[order]
+        self.ranges = dict(zip(users, zip(bounds[:-1], bounds[1:])))
+        self.patch = counts.iloc[:0]
+        self.patched = set()
+
+    def rows(self, users):
+        """
+        Counts of the given users.
+        Args:
+            users (iterable): User IDs.
+        Returns:
+            pd.Series: Their counts, indexed by (User_ID, key).
+        """
+        ranges = [self.ranges[user] for user in users if user not in self.patched and user in self.ranges]
+        positions = np.concatenate([np.arange(*bounds) for bounds in ranges]) if ranges else np.empty(0, dtype=int)
+        rows = self.base.iloc[positions]
+        patched = [user for user in users if user in self.patched]
+        if patched:
+            rows = pd.concat([rows, self.patch[self.patch.index.get_level_values(0).isin(patched)]])
+        return rows
+
+    def add(self, delta):
+        """
+        Add counts, touching only the users in delta.
+        Args:
+            delta (pd.Series): Counts indexed by (User_ID, key).
+        Returns:
+            list: Users whose counts changed.
+        """
+        users = list(pd.unique(delta.index.get_level_values(0)))
+        updated = add_counts(self.rows(users), delta)
+        kept = self.patch[~self.patch.index.get_level_values(0).isin(users)]
+        self.patch = pd.concat([kept, updated])
+        self.patched.update(users)
+        if len(self.patch) > len(self.base):
+            self._group(self.counts())
+        return users
+
+    def counts(self):
+        """All counts as one Series."""
+        kept = self.base[~self.base.index.get_level_values(0).isin(list(self.patched))]
+        return pd.concat([kept, self.patch])
+
+
+class IncrementalAggregates:
+    """
+    Running aggregates of the cleaned logs that new log rows can be added to.
+
+    Keeps per-(User_ID, Month) logins and per-(User_ID, Component)
+    activities as UserCounts, plus a HashDeduplicator per log for the keys
+    seen so far. Appending rows re-cleans and counts only the new rows,
+    then recomputes the interaction rows of the users they touch. Those
+    rows replace the users' earlier rows in a patch; the full interaction
+    count table is only put back together when it is read, so the work
+    of an append follows the size of the delta, not of the semester.
+    """
+
+    def __init__(self, logins, activities, interaction_counts, activity_seen, user_seen):
+        """
+        Args:
+            logins (pd.Series): Login counts indexed by (User_ID, Month), see count_logins.
+            activities (pd.Series): Activity counts indexed by (User_ID, Component), see count_activities.
+            interaction_counts (pd.DataFrame): Interaction counts joined from the two.
+            activity_seen (HashDeduplicator): Has seen every activity row counted so far.
+            user_seen (HashDeduplicator): Has seen every user log row counted so far.
+        """
+        self.logins = UserCounts(plain_index(logins))
+        self.activities = UserCounts(plain_index(activities))
+        self.activity_seen = activity_seen
+        self.user_seen = user_seen
+        self._interaction_counts = interaction_counts
+        # Users whose rows in _interaction_counts are replaced by the rows in _patch
+        self._replaced = set()
+        self._patch = None
+
+    @classmethod
+    def from_logs(cls, activity_log, user_log, interaction_counts, **dedup_options):
+        """
+        Build the aggregates from already cleaned logs.
+        Args:
+            activity_log (pd.DataFrame): Cleaned activity log.
+            user_log (pd.DataFrame): Cleaned user log.
+            interaction_counts (pd.DataFrame): Interaction counts of the two logs.
+            **dedup_options: HashDeduplicator arguments such as exact or spill_dir.
+        Returns:
+            IncrementalAggregates: Aggregates ready for append.
+        """
+        return cls(
+            count_logins(user_log),
+            count_activities(activity_log),
+            interaction_counts,
+            seen_keys(activity_log, ACTIVITY_KEYS, **dedup_options),
+            seen_keys(user_log, USER_KEYS, **dedup_options),
+        )
+
+    @property
+    def interaction_counts(self):
+        """The interaction count table with every append applied, sorted as aggregate_interactions."""
+        if self._patch is not None:
+            base = self._interaction_counts
+            kept = base[~base['User_ID'].isin(list(self._replaced)).to_numpy()]
+            kept, patch = align_categories(kept, self._patch)
+            combined = pd.concat([kept, patch], ignore_index=True).sort_values(COUNT_KEYS, ignore_index=True)
+            self._interaction_counts = downcast_counts(combined)
+            self._replaced = set()
+            self._patch = None
+        return self._interaction_counts
+
+    def append(self, activity_rows=None, user_rows=None):
+        """
+        Add raw ACTIVITY_LOG and USER_LOG rows to the aggregates.
+
+        Rows are cleaned as in clean_and_merge_data and deduplicated against
+        every row seen before on the same key columns.
+        Args:
+            activity_rows (pd.DataFrame): New raw activity log rows, or None.
+            user_rows (pd.DataFrame): New raw user log rows, or None.
+        Returns:
+            dict: 'activity' and 'user' new cleaned rows, their 'activity_duplicates'
+                and 'user_duplicates' counts, the 'users' updated and their
+                'interaction_counts', all of their interaction rows after the append.
+        """
+        activity_log, activity_duplicates = self._new_rows(activity_rows, clean_activity_log, self.activity_seen)
+        user_log, user_duplicates = self._new_rows(user_rows, clean_user_log, self.user_seen)
+
+        users = []
+        if activity_log is not None and not activity_log.empty:
+            users += self.activities.add(plain_index(count_activities(activity_log)))
+        if user_log is not None and not user_log.empty:
+            users += self.logins.add(plain_index(count_logins(user_log)))
+        users = list(dict.fromkeys(users))
+
+        return {
+            'activity': activity_log,
+            'user': user_log,
+            'activity_duplicates': activity_duplicates,
+            'user_duplicates': user_duplicates,
+            'users': users,
+            'interaction_counts': self._update_users(users),
+        }
+
+    def _new_rows(self, rows, clean, seen):
+        # Clean, then drop rows already in the logs or earlier in this delta
+        if rows is None or rows.empty:
+            return None, 0
+        cleaned = seen.drop_seen(clean(rows))
+        return cleaned, len(rows) - len(cleaned)
+
+    def _update_users(self, users):
+        # Recompute the interaction rows of the touched users from their counts alone
+        logins = self.logins.rows(users).rename('Logins').rename_axis(['User_ID', 'Month'])
+        activities = self.activities.rows(users).rename('Activities').rename_axis(['User_ID', 'Component'])
+        new_rows = join_counts(logins, activities)
+        if not users:
+            return new_rows
+
+        # They replace the users' earlier rows, whether those are in the table or in the patch
+        if self._patch is None:
+            patch = new_rows
+        else:
+            kept = self._patch[~self._patch['User_ID'].isin(users).to_numpy()]
+            patch = pd.concat([kept, new_rows], ignore_index=True)
+        self._patch = patch
+        self._replaced.update(users)
+        return new_rows
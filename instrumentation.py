@@ -0,0 +1,164 @@
+import cProfile
+import json
+import logging
+import os
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+import pandas as pd
+
+DEFAULT_MAX_RECORDS = 1000
+DEFAULT_PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.profiles')
+TRACEMALLOC_TOP = 25
+RECORD_COLUMNS = ['stage', 'table', 'seconds', 'rows_in', 'rows_out', 'memory_delta', 'status', 'started']
+
+logger = logging.getLogger('instrumentation')
+
+
+def memory_in_use():
+    """
+    Bytes in use by the process for memory deltas.
+
+    Uses tracemalloc when it is tracing, which counts pandas and NumPy
+    buffers exactly, and the resident set size otherwise.
+    Returns:
+        int: Bytes, or None when neither source is available.
+    """
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[0]
+    try:
+        with open('/proc/self/statm') as handle:
+            return int(handle.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def log_record(record):
+    """Default sink: one JSON log line per stage record."""
+    logger.info(json.dumps(record, default=str))
+
+
+class Instrumentation:
+    """
+    Records wall time, rows in and out and memory delta for each pipeline stage.
+
+    Records are kept in memory for the Diagnostics tab and passed to each
+    sink, a callable taking the record dict. One run can be profiled with
+    cProfile and tracemalloc by arming request_profile.
+    """
+
+    def __init__(self, sinks=None, max_records=DEFAULT_MAX_RECORDS, profile_dir=DEFAULT_PROFILE_DIR):
+        self.sinks = [log_record] if sinks is None else list(sinks)
+        self.records = deque(maxlen=max_records)
+        self.profile_dir = profile_dir
+        self.profiles = []
+        self._profile_next = False
+
+    @contextmanager
+    def stage(self, name, rows_in=None, table=None):
+        """
+        Time a stage; set record['rows_out'] inside the block.
+        Args:
+            name (str): Stage name, e.g. 'load', 'dedup' or 'render'.
+            rows_in (int): Input rows, if known.
+            table (str): Which log or table the stage works on.
+        Yields:
+            dict: The stage record.
+        """
+        record = {'stage': name, 'table': table, 'rows_in': rows_in, 'rows_out': None, 'status': 'ok',
+                  'started': time.strftime('%Y-%m-%d %H:%M:%S')}
+        memory_before = memory_in_use()
+        started = time.perf_counter()
+        try:
+            yield record
+        except BaseException as e:
+            # Also covers a cancelled background job, which is not an Exception
+            record['status'] = f"error: {str(e)}"
+            raise
+        finally:
+            record['seconds'] = round(time.perf_counter() - started, 6)
+            memory_after = memory_in_use()
+            record['memory_delta'] = (
+                None if memory_before is None or memory_after is None else memory_after - memory_before)
+            self.emit(record)
+
+    def emit(self, record):
+        """Keep a record and pass it to every sink."""
+        self.records.append(record)
+        for sink in self.sinks:
+            try:
+                sink(record)
+            except Exception as e:
+                print(f"Error in instrumentation sink: {e}")
+
+    def summary(self):
+        """
+        Stage records as a table, most recent first.
+        Returns:
+            pd.DataFrame: One row per recorded stage.
+        """
+        records = pd.DataFrame(list(reversed(self.records)), columns=RECORD_COLUMNS)
+        return records.astype({'rows_in': 'Int64', 'rows_out': 'Int64', 'memory_delta': 'Int64'})
+
+    def clear(self):
+        self.records.clear()
+
+    def request_profile(self):
+        """Profile the next run passed to profiling()."""
+        self._profile_next = True
+
+    def profiling(self, label):
+        """
+        Context manager that profiles the block if a profile was requested.
+        Args:
+            label (str): Name of the profiled run, used in the dump file names.
+        Returns:
+            context manager: Profiles at most one run per request_profile call.
+        """
+        if not self._profile_next:
+            return nullcontext()
+        self._profile_next = False
+        return self._profile(label)
+
+    @contextmanager
+    def _profile(self, label):
+        # tracemalloc may already be running, e.g. under the benchmark
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            snapshot = tracemalloc.take_snapshot()
+            if started_tracing:
+                tracemalloc.stop()
+            self.profiles.append(self._write_profile(label, profiler, snapshot))
+
+    def _write_profile(self, label, profiler, snapshot):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        prefix = os.path.join(self.profile_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{label}")
+        profiler.dump_stats(f'{prefix}.pstats')
+        with open(f'{prefix}.tracemalloc.txt', 'w') as handle:
+            for statistic in snapshot.statistics('lineno')[:TRACEMALLOC_TOP]:
+                handle.write(f"{statistic}\n")
+        print(f"Profile written to {prefix}.pstats and {prefix}.tracemalloc.txt")
+        return prefix
+
+
+class NullInstrumentation(Instrumentation):
+    """Instrumentation that records nothing, for callers outside the app."""
+
+    def __init__(self):
+        super().__init__(sinks=[], max_records=0)
+
+    @contextmanager
+    def stage(self, name, rows_in=None, table=None):
+        yield {}
+
+
+null_instrumentation = NullInstrumentation()
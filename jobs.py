@@ -0,0 +1,215 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+DEFAULT_JOB_WORKERS = 2
+DEFAULT_JOB_TIMEOUT = 30 * 60
+DEFAULT_MAX_JOBS = 100
+DEFAULT_POLL_SECONDS = 1.0
+JOB_COLUMNS = ['job_id', 'label', 'status', 'stage', 'rows', 'seconds', 'error']
+ACTIVE_STATUSES = ('queued', 'running')
+
+
+class JobCancelled(BaseException):
+    """
+    Raised inside a job at its next progress report once it is cancelled or times out.
+
+    Derives from BaseException, as asyncio.CancelledError does, so the
+    catch-all error handling of the app methods does not swallow it.
+    """
+
+
+def no_progress(stage, rows=None):
+    """Default progress callback for callers outside a job."""
+
+
+class Job:
+    """
+    One background run with its progress, result and cancellation flag.
+
+    Python threads cannot be stopped from outside, so cancelling and
+    timeouts are cooperative: the running function passes report as its
+    progress callback, and report raises JobCancelled once the job was
+    cancelled or ran past its timeout.
+    """
+
+    def __init__(self, label, timeout=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.label = label
+        self.timeout = timeout
+        self.status = 'queued'
+        self.stage = None
+        # Rows processed so far per stage, e.g. {'parse activity': 120000}
+        self.rows = {}
+        self.result = None
+        self.error = None
+        self.started = None
+        self.finished = None
+        self.future = None
+        self._cancel_reason = None
+        self._cancel = threading.Event()
+
+    @property
+    def done(self):
+        return self.status not in ACTIVE_STATUSES
+
+    def report(self, stage, rows=None):
+        """
+        Progress callback for the running function.
+        Args:
+            stage (str): Current stage, e.g. 'parse activity' or 'merge'.
+            rows (int): Rows processed in the stage so far, if known.
+        Raises:
+            JobCancelled: The job was cancelled or timed out.
+        """
+        self.stage = stage
+        if rows is not None:
+            self.rows[stage] = rows
+        self.check()
+
+    def check(self):
+        """Raise JobCancelled if the job was cancelled or is past its timeout."""
+        if self.timeout is not None and self.started is not None and time.time() - self.started > self.timeout:
+            self.cancel('timed out')
+        if self._cancel.is_set():
+            raise JobCancelled(self._cancel_reason)
+
+    def cancel(self, reason='cancelled'):
+        """
+        Ask the job to stop; a queued job is dropped right away.
+        Args:
+            reason (str): Final status, 'cancelled' or 'timed out'.
+        Returns:
+            bool: False if the job had already finished.
+        """
+        if self.done:
+            return False
+        if self._cancel_reason is None:
+            self._cancel_reason = reason
+        self._cancel.set()
+        if self.future is not None and self.future.cancel():
+            self._finish(reason)
+        return True
+
+    def run(self, function, *args, **kwargs):
+        """Call function(*args, progress=self.report, **kwargs) on the worker and keep its outcome."""
+        if self._cancel.is_set():
+            self._finish(self._cancel_reason)
+            return
+        self.status = 'running'
+        self.started = time.time()
+        try:
+            result = function(*args, progress=self.report, **kwargs)
+        except JobCancelled as e:
+            self._finish(str(e))
+        except Exception as e:
+            self.error = str(e)
+            self._finish('failed')
+        else:
+            self.result = result
+            self._finish('done')
+
+    def _finish(self, status):
+        self.status = status
+        self.finished = time.time()
+
+    def seconds(self):
+        if self.started is None:
+            return None
+        return round((self.finished or time.time()) - self.started, 1)
+
+    def describe(self):
+        """One-line status such as 'Load files: running, parse activity 120000 rows (3.2s)'."""
+        if self.status == 'running' and self._cancel.is_set():
+            status = f"stopping ({self._cancel_reason})"
+        else:
+            status = self.status
+        text = f"{self.label}: {status}"
+        if self.stage is not None and not self.done:
+            rows = self.rows.get(self.stage)
+            text += f", {self.stage}" + (f" {rows} rows" if rows is not None else "")
+        if self.started is not None:
+            text += f" ({self.seconds()}s)"
+        if self.error:
+            text += f": {self.error}"
+        return text
+
+    def snapshot(self):
+        return {
+            'job_id': self.id, 'label': self.label, 'status': self.status, 'stage': self.stage,
+            'rows': self.rows.get(self.stage), 'seconds': self.seconds(), 'error': self.error,
+        }
+
+
+class JobManager:
+    """
+    Runs long app actions on a background thread pool and tracks them by job ID.
+
+    Submitting returns at once, so a request handler does not hold a
+    server worker while files are parsed and merged. Finished jobs are
+    forgotten, oldest first, once more than max_jobs are kept.
+    """
+
+    def __init__(self, max_workers=DEFAULT_JOB_WORKERS, timeout=DEFAULT_JOB_TIMEOUT, max_jobs=DEFAULT_MAX_JOBS):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self.timeout = timeout
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, label, function, *args, timeout=None, **kwargs):
+        """
+        Queue function(*args, progress=job.report, **kwargs) on the pool.
+        Args:
+            label (str): Name shown in status messages.
+            function (callable): Work to run; must accept a progress keyword.
+            timeout (float): Seconds the job may run, or None for the manager default.
+        Returns:
+            Job: The queued job.
+        """
+        job = Job(label, self.timeout if timeout is None else timeout)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        job.future = self.executor.submit(job.run, function, *args, **kwargs)
+        return job
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[:max(0, len(self._jobs) - self.max_jobs)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+        # A job stuck between progress reports is still flagged once past its timeout
+        if job is not None and not job.done and job.timeout is not None and job.started is not None:
+            if time.time() - job.started > job.timeout:
+                job.cancel('timed out')
+        return job
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        return job is not None and job.cancel()
+
+    def summary(self, job_ids=None):
+        """
+        Tracked jobs as a table, most recent first.
+        Args:
+            job_ids (iterable): Jobs to include, or None for all.
+        Returns:
+            pd.DataFrame: One row per job.
+        """
+        with self._lock:
+            jobs = list(self._jobs.values())
+        if job_ids is not None:
+            job_ids = set(job_ids)
+            jobs = [job for job in jobs if job.id in job_ids]
+        return pd.DataFrame([job.snapshot() for job in reversed(jobs)], columns=JOB_COLUMNS)
+
+
+job_manager = JobManager()
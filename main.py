@@ -1,27 +1,310 @@
 import io
+import logging
+import os
+from contextlib import nullcontext
 from PIL import Image
 import gradio as gr
 import pandas as pd
-import numpy as np
-import seaborn as sns
-import matplotlib.pyplot as plt
+
+from analysis import InteractionMatrix
+from backup_to_mysql import connect_to_sqlite, load_tables
+from cache import (DEFAULT_CACHE_DIR, DEFAULT_CACHE_MAX_BYTES, DatasetCache, LRUCache, combine_fingerprints,
+                   content_hash, frame_fingerprint, shared_datasets)
+from dedup import HashDeduplicator
+from incremental import IncrementalAggregates
+from instrumentation import Instrumentation
+from jobs import DEFAULT_POLL_SECONDS, job_manager, no_progress
+from pagination import DEFAULT_PAGE_SIZE, FILTER_OPERATORS, display_frame, format_page_info, page, preview, table_view
+from pipeline import (ACTIVITY_KEYS, DEFAULT_CHUNKSIZE, DTYPE_BACKENDS, USER_KEYS, aggregate_interactions,
+                      clean_activity_log, clean_user_log, explode_merge, join_counts, read_csv, stream_log_counts)
+from plotting import heatmap_renderer
+from rollup import RollupCube
+from schema import align_categories, apply_schema, downcast_counts, format_bytes, format_memory_report, memory_usage
+from shared_arrays import ArrayStore
+from sql_backend import SQLiteBackend
+from stats_engine import StatisticsEngine
+from store import DEFAULT_STORE_PATH, ProcessedStore
+
+DEFAULT_CONCURRENCY_LIMIT = 4
+DEFAULT_RESULT_CACHE_SIZE = 32
+DEFAULT_VIEW_CACHE_SIZE = 8
+TABLES = ['Activity log', 'User log', 'Component codes', 'Interaction counts',
+          'Semester statistics', 'Monthly statistics']
 
 class DataAnalysisApp:
-    def __init__(self):
+    def __init__(self, legacy_merge=False, chunksize=DEFAULT_CHUNKSIZE,
+                 cache_dir=DEFAULT_CACHE_DIR, cache_max_bytes=DEFAULT_CACHE_MAX_BYTES,
+                 shared_datasets=shared_datasets, result_cache_size=DEFAULT_RESULT_CACHE_SIZE,
+                 instrumentation=None, exact_dedup=False, backend='pandas', sqlite_path=None,
+                 jobs=job_manager, job_timeout=None, arrays_dir=None, dtype_backend='numpy',
+                 stats_executor='serial', stats_workers=None):
+        # legacy_merge keeps the exploded User_ID merge in merged_data
+        self.legacy_merge = legacy_merge
+        # Rows per chunk when streaming large logs
+        self.chunksize = chunksize
+        # Streaming and appends dedupe on 64-bit key fingerprints; exact_dedup also compares the keys
+        self.dedup_options = {
+            'exact': exact_dedup,
+            'spill_dir': os.path.join(cache_dir, 'dedup') if cache_dir else None,
+        }
+        # backend='sqlite' cleans, merges and counts in an on-disk SQLite database, for logs larger than RAM
+        if backend not in ('pandas', 'sqlite'):
+            raise ValueError(f"Unknown backend: {backend}")
+        self.backend = SQLiteBackend(sqlite_path, chunksize) if backend == 'sqlite' else None
+        # dtype_backend='pyarrow' parses with the multithreaded Arrow reader and keeps Arrow-backed
+        # columns through cleaning and counting instead of converting them to categoricals
+        if dtype_backend not in DTYPE_BACKENDS:
+            raise ValueError(f"Unknown dtype backend: {dtype_backend}")
+        self.dtype_backend = dtype_backend
+        # Cleaned frames are cached on disk by input content hash; cache_dir=None disables it.
+        # They get their own sub-directory, as eviction treats every directory in it as an entry
+        self.cache = DatasetCache(os.path.join(cache_dir, 'datasets'), cache_max_bytes) if cache_dir else None
+        # Encoded interaction arrays that worker processes memory-map instead of copying; under cache_dir by default
+        if arrays_dir is None and cache_dir:
+            arrays_dir = os.path.join(cache_dir, 'arrays')
+        self.arrays = ArrayStore(arrays_dir) if arrays_dir else None
+        self.arrays_path = None
+        # stats_executor='thread' or 'process' aggregates the statistics per component on the
+        # worker pools all sessions share
+        self.stats_engine = StatisticsEngine(stats_executor, stats_workers)
+        # Processed datasets are shared read-only between app instances by content hash
+        self.shared_datasets = shared_datasets
+        # Analysis results keyed by data fingerprint and component selection
+        self.results = LRUCache(result_cache_size)
+        # Sorted and filtered table views for paging
+        self.views = LRUCache(DEFAULT_VIEW_CACHE_SIZE)
+        # Per-stage timing, row counts and memory deltas
+        self.instrumentation = instrumentation or Instrumentation()
+        # Loading and processing run as background jobs; job_timeout=None uses the manager's default
+        self.jobs = jobs
+        self.job_timeout = job_timeout
+        self.job_ids = []
+        self.dataset_key = None
+        self.data_fingerprint = None
+        self.dataset = None
         self.original_data = None
         self.processed_data = None
+        self.semester_stats_df = None
+        self.monthly_stats_df = None
+        self.cleaned_data = None
+        # Cleaned rows appended since cleaned_data was last put together
+        self.appended_logs = {'activity': [], 'user': []}
+        self.merged_data = None
+        self.interaction_counts = None
+        # Running aggregates for append_logs, seeded by streaming or built on the first append
+        self.aggregates = None
+        # Opened ProcessedStore; statistics and heatmaps then query it instead of in-memory frames
+        self.store = None
+        # User x Component x Month rollup of interaction_counts that the analysis tabs query
+        self.rollup = None
+    
+    @property
+    def interaction_counts(self):
+        # After appends the aggregates put the table back together when it is read
+        if self.aggregates is not None:
+            return self.aggregates.interaction_counts
+        return self._interaction_counts
+    
+    @interaction_counts.setter
+    def interaction_counts(self, interaction_counts):
+        self._interaction_counts = interaction_counts
+    
+    @property
+    def merged_data(self):
+        # Only legacy_merge keeps a merged frame of its own; otherwise it is the interaction counts
+        if self._merged_data is not None:
+            return self._merged_data
+        return self.interaction_counts
+    
+    @merged_data.setter
+    def merged_data(self, merged_data):
+        self._merged_data = merged_data
+    
+    def _reset_processed_data(self):
+        self.dataset = None
+        self.aggregates = None
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+        self.cleaned_data = None
+        self.appended_logs = {'activity': [], 'user': []}
+        self.merged_data = None
+        self.interaction_counts = None
+        self.rollup = None
+        self.arrays_path = None
+        self.data_fingerprint = None
+        self.results.clear()
+        self.views.clear()
+    
+    def _set_interaction_counts(self, interaction_counts, fingerprint=None):
+        # New data invalidates every memoized result
+        self.interaction_counts = interaction_counts
         self.merged_data = None
+        with self.instrumentation.stage('rollup', len(interaction_counts)) as record:
+            self.rollup = RollupCube.from_counts(interaction_counts)
+            record['rows_out'] = len(self.rollup)
+        self.data_fingerprint = fingerprint or self.dataset_key or frame_fingerprint(interaction_counts)
+        self.results.clear()
+        self.views.clear()
+        # Written on the first request that runs on process workers, see _shared_arrays_path
+        self.arrays_path = None
+    
+    def _publish_arrays(self, interaction_counts):
+        if self.arrays is None:
+            return None
+        try:
+            with self.instrumentation.stage('arrays', len(interaction_counts)) as record:
+                path = self.arrays.publish(self.data_fingerprint, interaction_counts)
+                record['rows_out'] = len(interaction_counts)
+            return path
+        except Exception as e:
+            print(f"Error writing shared arrays: {e}")
+            return None
+    
+    def _shared_arrays_path(self, components, rows):
+        # Only process workers read the arrays, so they are published when a request first needs them,
+        # again after an append, and again if another session sharing arrays_dir evicted them
+        if self.arrays is None or self.store is not None or not self.stats_engine.needs_arrays(components, rows):
+            return None
+        if self.arrays_path is None or not os.path.isdir(self.arrays_path):
+            self.arrays_path = self._publish_arrays(self.interaction_counts)
+        return self.arrays_path
+    
+    def _cleaned_logs(self):
+        # Appended rows are concatenated onto the cleaned logs only once the logs are read
+        if self.cleaned_data is None or not any(self.appended_logs.values()):
+            return self.cleaned_data
+        cleaned_data = dict(self.cleaned_data)
+        for key, new_rows in self.appended_logs.items():
+            if new_rows:
+                # Shared frames are never modified; the concatenation is a new frame
+                cleaned_data[key] = pd.concat(align_categories(cleaned_data[key], *new_rows), ignore_index=True)
+        self.cleaned_data = cleaned_data
+        self.appended_logs = {'activity': [], 'user': []}
+        return cleaned_data
+    
+    def _set_processed_data(self, dataset):
+        # Keep a reference so the shared dataset stays alive for this session
+        self.dataset = dataset
+        self.aggregates = None
+        self.cleaned_data = {'activity': dataset['activity'], 'user': dataset['user']}
+        self.appended_logs = {'activity': [], 'user': []}
+        self._set_interaction_counts(dataset['interactions'])
+        if self.legacy_merge:
+            self.merged_data = explode_merge(dataset['user'], dataset['activity'])
+    
+    def _cached_result(self, kind, components, compute, ordered=False):
+        """
+        Memoized analysis result for the current data and component selection.
+        Args:
+            kind (tuple): Result type and the parameters it depends on besides the components,
+                e.g. ('statistics', start_month, end_month).
+            components (list): Selected components.
+            compute (callable): Called with the de-duplicated component list on a miss.
+            ordered (bool): Whether the result depends on selection order.
+        Returns:
+            object: The cached or newly computed result.
+        """
+        components = list(dict.fromkeys(components))
+        key = (self.data_fingerprint, kind, tuple(sorted(components)))
+        if ordered:
+            key += (tuple(components),)
+        result = self.results.get(key)
+        if result is None:
+            result = compute(components)
+            self.results.put(key, result)
+        return result
+    
+    def _share_dataset(self, frames):
+        if self.shared_datasets is None or self.dataset_key is None:
+            return frames
+        return self.shared_datasets.put(self.dataset_key, frames)
     
-    def load_csv_files(self, activity_log, user_log, component_codes):
+    def _find_processed_data(self, activity_log, user_log, component_codes):
+        self.dataset_key = None
+        try:
+            self.dataset_key = content_hash(activity_log, user_log, component_codes)
+            # Frames parsed with another dtype backend are not interchangeable
+            if self.dtype_backend != 'numpy':
+                self.dataset_key = combine_fingerprints(self.dataset_key, self.dtype_backend)
+        except Exception as e:
+            print(f"Error hashing input files: {e}")
+            return None
+        
+        # Another session already holds this dataset in memory
+        if self.shared_datasets is not None:
+            dataset = self.shared_datasets.get(self.dataset_key)
+            if dataset is not None:
+                return dataset
+        
+        if self.cache is None:
+            return None
+        try:
+            frames = self.cache.get(self.dataset_key)
+        except Exception as e:
+            print(f"Error reading cache: {e}")
+            return None
+        return self._share_dataset(frames) if frames is not None else None
+    
+    def _store_processed_data(self, activity_log, user_log, interaction_counts):
+        dataset = self._share_dataset({
+            'activity': activity_log,
+            'user': user_log,
+            'interactions': interaction_counts
+        })
+        self._set_processed_data(dataset)
+        if self.cache is None or self.dataset_key is None:
+            return
+        try:
+            self.cache.put(self.dataset_key, dataset)
+        except Exception as e:
+            print(f"Error writing cache: {e}")
+    
+    def load_csv_files(self, activity_log, user_log, component_codes, progress=no_progress):
         try:
             # Validate file uploads
             if not all([activity_log, user_log, component_codes]):
                 return "Please upload all three CSV files.", None, None, None
             
-            # Read CSV files
-            activity_df = pd.read_csv(activity_log)
-            user_df = pd.read_csv(user_log)
+            self._reset_processed_data()
             component_df = pd.read_csv(component_codes)
+            if self.backend is not None:
+                progress('import')
+                return self._load_into_backend(activity_log, user_log, component_df)
+            
+            # A repeat upload skips parsing, cleaning and merging
+            dataset = self._find_processed_data(activity_log, user_log, component_codes)
+            if dataset is not None:
+                self.original_data = {'component': component_df}
+                self._set_processed_data(dataset)
+                return (
+                    "Files loaded from cache; cleaned and merged data is ready for analysis.",
+                    preview(dataset['activity']),
+                    preview(dataset['user']),
+                    preview(component_df)
+                )
+            
+            # Read CSV files
+            with self.instrumentation.stage('load', table=self.dtype_backend) as record:
+                activity_df = read_csv(activity_log, progress, 'parse activity', self.chunksize, self.dtype_backend)
+                user_df = read_csv(user_log, progress, 'parse user', self.chunksize, self.dtype_backend)
+                record['rows_out'] = len(activity_df) + len(user_df)
+            
+            if self.dtype_backend == 'pyarrow':
+                self.original_data = {'activity': activity_df, 'user': user_df, 'component': component_df}
+                return (
+                    f"Files loaded with the Arrow reader in {record['seconds']:.2f}s! "
+                    f"Memory: {format_bytes(memory_usage(activity_df, user_df))} in Arrow-backed columns",
+                    preview(activity_df),
+                    preview(user_df),
+                    preview(component_df)
+                )
+            
+            # Categorical identifiers and text so filters and groupbys run on integer codes
+            progress('schema', len(activity_df) + len(user_df))
+            with self.instrumentation.stage('schema', len(activity_df) + len(user_df)) as record:
+                activity_df, user_df, memory_report = apply_schema(activity_df, user_df, component_df)
+                record['rows_out'] = len(activity_df) + len(user_df)
             
             # Store original data
             self.original_data = {
@@ -31,173 +314,621 @@ class DataAnalysisApp:
             }
             
             return (
-                "Files loaded successfully!",
-                activity_df.head().to_html(),
-                user_df.head().to_html(),
-                component_df.head().to_html()
+                f"Files loaded successfully! {format_memory_report(memory_report)}",
+                preview(activity_df),
+                preview(user_df),
+                preview(component_df)
             )
         except Exception as e:
             return f"Error loading files: {str(e)}", None, None, None
     
-    def clean_and_merge_data(self):
+    def _load_into_backend(self, activity_log, user_log, component_df):
+        # The logs go straight into SQLite; only previews are read back
+        with self.instrumentation.stage('load', table='sqlite') as record:
+            rows = self.backend.import_csv('activity', activity_log) + self.backend.import_csv('user', user_log)
+            record['rows_out'] = rows
+        self.dataset_key = None
+        self.original_data = {'component': component_df, 'backend': True}
+        return (
+            f"Files loaded into {self.backend.path} ({rows} log rows).",
+            preview(self.backend.preview('activity')),
+            preview(self.backend.preview('user')),
+            preview(component_df)
+        )
+    
+    def load_from_database(self, connection):
         try:
-            if not self.original_data:
-                return "Please load the data first.", None
+            # One bulk read per backed-up table
+            with self.instrumentation.stage('load', table='backup') as record:
+                frames = load_tables(connection)
+                record['rows_out'] = len(frames['activity']) + len(frames['user'])
+            frames['activity'], frames['user'], _ = apply_schema(
+                frames['activity'], frames['user'], frames['component'])
             
-            # Load data
-            activity_log = self.original_data['activity'].copy()
-            user_log = self.original_data['user'].copy()
+            self.dataset_key = None
+            self._reset_processed_data()
+            self.original_data = frames
             
-            # Rename columns
-            activity_log = activity_log.rename(columns={'User Full Name *Anonymized': 'User_ID'})
-            user_log = user_log.rename(columns={'User Full Name *Anonymized': 'User_ID'})
+            return (
+                "Data reloaded from backup successfully!",
+                preview(frames['activity']),
+                preview(frames['user']),
+                preview(frames['component'])
+            )
+        except Exception as e:
+            return f"Error reloading backup: {str(e)}", None, None, None
+    
+    def reload_backup(self, sqlite_path):
+        connection = connect_to_sqlite(sqlite_path)
+        if connection is None:
+            return f"Could not open backup {sqlite_path}.", None, None, None
+        try:
+            return self.load_from_database(connection)
+        finally:
+            connection.close()
+    
+    def clean_and_merge_data(self, progress=no_progress):
+        try:
+            # Already cleaned for the current upload, e.g. restored from the cache
+            if self.cleaned_data is not None:
+                return "Data cleaned and merged successfully!", preview(self.merged_data)
             
-            # Remove 'System' and 'Folder' components
-            activity_log = activity_log[~activity_log['Component'].isin(['System', 'Folder'])]
+            if self.original_data and self.original_data.get('backend'):
+                progress('merge')
+                return self._clean_and_merge_in_backend()
             
-            # Convert date columns to datetime
-            user_log['Date'] = pd.to_datetime(user_log['Date'].str.split().str[0], format='%d/%m/%Y')
+            if not self.original_data or 'activity' not in self.original_data:
+                return "Please load the data first.", None
             
-            # Drop duplicates
-            activity_log = activity_log.drop_duplicates(subset=['User_ID', 'Component', 'Action', 'Target'])
-            user_log = user_log.drop_duplicates(subset=['Date', 'Time', 'User_ID'])
+            # Rename, filter, parse dates and drop duplicates
+            progress('clean activity', len(self.original_data['activity']))
+            activity_log = clean_activity_log(self.original_data['activity'], self.instrumentation)
+            progress('clean user', len(self.original_data['user']))
+            user_log = clean_user_log(self.original_data['user'], self.instrumentation)
+            
+            # Aggregate each side per user (and month) before joining
+            progress('merge', len(activity_log) + len(user_log))
+            with self.instrumentation.stage('merge', len(activity_log) + len(user_log)) as record:
+                interaction_counts = downcast_counts(aggregate_interactions(user_log, activity_log))
+                record['rows_out'] = len(interaction_counts)
+            progress('merged', len(interaction_counts))
+            self._store_processed_data(activity_log, user_log, interaction_counts)
+            return "Data cleaned and merged successfully!", preview(self.merged_data)
+        except Exception as e:
+            return f"Error during data processing: {str(e)}", None
+        
+    def _clean_and_merge_in_backend(self):
+        # Clean, dedup, merge and count in SQL; only the interaction table comes back
+        if self.interaction_counts is not None:
+            return "Data cleaned and merged successfully!", preview(self.merged_data)
+        with self.instrumentation.stage('merge', table='sqlite') as record:
+            counts = self.backend.clean_and_merge()
+            interaction_counts = self.backend.interaction_counts(self.original_data['component'])
+            record['rows_in'] = counts['activity'] + counts['user']
+            record['rows_out'] = len(interaction_counts)
+        self._reset_processed_data()
+        self._set_interaction_counts(interaction_counts)
+        return "Data cleaned and merged successfully!", preview(self.merged_data)
+        
+    def stream_csv_files(self, activity_log, user_log, component_codes, progress=no_progress):
+        try:
+            # Validate file uploads
+            if not all([activity_log, user_log, component_codes]):
+                return "Please upload all three CSV files.", None
             
-            # Merge data
-            merged_data = user_log.merge(activity_log, on='User_ID', how='left')
-            merged_data['Month'] = merged_data['Date'].dt.to_period('M')
+            # Clean, deduplicate and count the logs chunk by chunk
+            activity_dedup = HashDeduplicator(ACTIVITY_KEYS, **self.dedup_options)
+            user_dedup = HashDeduplicator(USER_KEYS, **self.dedup_options)
+            with self.instrumentation.stage('stream') as record:
+                logins, activities = stream_log_counts(
+                    activity_log, user_log, self.chunksize, activity_dedup, user_dedup, progress)
+                interaction_counts = downcast_counts(join_counts(logins, activities))
+                record['rows_in'] = activity_dedup.rows + user_dedup.rows
+                record['rows_out'] = len(interaction_counts)
             
-            self.merged_data = merged_data
-            return "Data cleaned and merged successfully!", merged_data.head().to_html()
+            # Only the small component table is kept; the raw logs are never held whole
+            self.original_data = {'component': pd.read_csv(component_codes)}
+            self.dataset_key = None
+            self._reset_processed_data()
+            self._set_interaction_counts(interaction_counts)
+            # The streamed counts and seen keys are all append_logs needs to update them
+            self.aggregates = IncrementalAggregates(logins, activities, interaction_counts, activity_dedup, user_dedup)
+            duplicates = activity_dedup.duplicates + user_dedup.duplicates
+            return (f"Data streamed and aggregated successfully! "
+                    f"{duplicates} rows repeated across chunks were dropped.", preview(interaction_counts))
         except Exception as e:
             return f"Error during data processing: {str(e)}", None
         
-    def generate_statistics(self, target_components):
+    def _submit_job(self, label, method, *args):
+        # One processing job per session at a time; they all replace the session's data
+        running = [job for job in map(self.jobs.get, self.job_ids) if job is not None and not job.done]
+        if running:
+            return f"Job {running[-1].id} is still running: {running[-1].describe()}", None
+        
+        def run(*args, progress):
+            # A requested profile covers the job itself, on the worker thread
+            with self.instrumentation.profiling(method.__name__):
+                return method(self, *args, progress=progress)
+        
+        job = self.jobs.submit(label, run, *args, timeout=self.job_timeout)
+        self.job_ids.append(job.id)
+        return f"Started job {job.id}: {job.describe()}", job.id
+    
+    def submit_load(self, activity_log, user_log, component_codes):
+        if not all([activity_log, user_log, component_codes]):
+            return "Please upload all three CSV files.", None
+        return self._submit_job("Load files", DataAnalysisApp.load_csv_files, activity_log, user_log, component_codes)
+    
+    def submit_clean_and_merge(self):
+        return self._submit_job("Clean and merge", DataAnalysisApp.clean_and_merge_data)
+    
+    def submit_stream(self, activity_log, user_log, component_codes):
+        if not all([activity_log, user_log, component_codes]):
+            return "Please upload all three CSV files.", None
+        return self._submit_job("Stream and aggregate", DataAnalysisApp.stream_csv_files,
+                                activity_log, user_log, component_codes)
+    
+    def job_status(self, job_id):
+        """
+        Progress of one of this session's jobs.
+        Args:
+            job_id (str): ID returned when the job was submitted.
+        Returns:
+            tuple: (status message, the method's outputs once it finished or None, whether the job is over)
+        """
+        job = self.jobs.get(job_id) if job_id in self.job_ids else None
+        if job is None:
+            return f"Unknown job {job_id}.", None, True
+        if job.status == 'done':
+            return job.describe(), job.result, True
+        return job.describe(), None, job.done
+    
+    def cancel_job(self, job_id):
+        if not job_id or job_id not in self.job_ids:
+            return "No job to cancel."
+        if not self.jobs.cancel(job_id):
+            return f"Job {job_id} already finished."
+        return f"Cancelling job {job_id}; it stops at its next progress update."
+    
+    def get_jobs(self):
+        return f"{len(self.job_ids)} jobs in this session.", self.jobs.summary(self.job_ids)
+    
+    def append_logs(self, activity_log, user_log):
         try:
-            if self.merged_data is None:
-                return "Please process data first.", None
+            if not activity_log and not user_log:
+                return "Please upload new activity or user log rows.", None
+            if self.aggregates is None and self.cleaned_data is None:
+                return "Please clean and merge the data first.", None
             
-            # Filter for target components
-            filtered_data = self.merged_data[self.merged_data['Component'].isin(target_components)]
-            
-            # Add Month column
-            filtered_data['Month'] = filtered_data['Date'].dt.to_period('M')
-            
-            # Overall semester statistics
-            semester_stats = {}
-            for component in target_components:
-                comp_data = filtered_data[filtered_data['Component'] == component]
-                semester_interactions = comp_data.groupby('Month').size()
-                semester_stats[component] = {
-                    'mean': semester_interactions.mean(),
-                    'median': semester_interactions.median(),
-                    'mode': semester_interactions.mode().values[0] if not semester_interactions.mode().empty else np.nan
-                }
-            
-            semester_stats_df = pd.DataFrame(semester_stats).T.reset_index().rename(columns={'index': 'Component'})
-            
-            # Monthly statistics
-            monthly_stats = {}
-            for component in target_components:
-                comp_data = filtered_data[filtered_data['Component'] == component]
-                
-                # Group by Month and compute metrics for each month
-                for month, month_data in comp_data.groupby('Month'):
-                    if month not in monthly_stats:
-                        monthly_stats[month] = {}
-                    
-                    # Count interactions for the month
-                    monthly_interactions = month_data.groupby('Component').size()
-                    
-                    # Compute statistics for this component in this month
-                    monthly_stats[month][component] = {
-                        'mean': monthly_interactions.mean(),
-                        'median': monthly_interactions.median(),
-                        'mode': monthly_interactions.mode().values[0] if len(monthly_interactions.mode()) > 0 else np.nan
-                    }
-
-            # Flatten the monthly statistics dictionary
-            flattened_stats = []
-            for month, components in monthly_stats.items():
-                for component, metrics in components.items():
-                    flattened_stats.append({'Month': month, 'Component': component, **metrics})
+            # Running aggregates are built once from the cleaned logs, then only updated
+            if self.aggregates is None:
+                self.aggregates = IncrementalAggregates.from_logs(
+                    self.cleaned_data['activity'], self.cleaned_data['user'], self.interaction_counts,
+                    **self.dedup_options)
             
-            monthly_stats_df = pd.DataFrame(flattened_stats)
+            activity_rows = read_csv(activity_log, dtype_backend=self.dtype_backend) if activity_log else None
+            user_rows = read_csv(user_log, dtype_backend=self.dtype_backend) if user_log else None
+            rows_in = sum(len(rows) for rows in [activity_rows, user_rows] if rows is not None)
+            with self.instrumentation.stage('append', rows_in) as record:
+                delta = self.aggregates.append(activity_rows, user_rows)
+                record['rows_out'] = len(delta['interaction_counts'])
             
-            # Return both semester and monthly statistics as HTML
-            semester_html = semester_stats_df.to_html()
-            monthly_html = monthly_stats_df.to_html()
-
-            data = "Semester statistics:\n\n" + semester_html + "Monthly statistics: \n\n\n" + monthly_html
-            return "Statistics generated successfully:", data
+            # Only the cells of the users the new rows touch change in the rollup
+            with self.instrumentation.stage('rollup', len(delta['interaction_counts'])) as record:
+                self.rollup = self.rollup.replace_users(delta['users'], delta['interaction_counts'])
+                record['rows_out'] = len(self.rollup)
+            
+            fingerprint = self.data_fingerprint
+            for key in ['activity', 'user']:
+                if delta[key] is not None and not delta[key].empty:
+                    fingerprint = combine_fingerprints(fingerprint, frame_fingerprint(delta[key]))
+                    # Streamed data has no cleaned logs to grow
+                    if self.cleaned_data is not None:
+                        self.appended_logs[key].append(delta[key])
+            
+            # The appended data no longer matches any uploaded files, results or shared arrays
+            self.dataset_key = None
+            self.dataset = None
+            self.data_fingerprint = fingerprint
+            self.results.clear()
+            self.views.clear()
+            self.arrays_path = None
+            if self.legacy_merge and self.cleaned_data is not None:
+                cleaned_data = self._cleaned_logs()
+                self.merged_data = explode_merge(cleaned_data['user'], cleaned_data['activity'])
+            
+            added = [len(delta[key]) if delta[key] is not None else 0 for key in ['activity', 'user']]
+            duplicates = delta['activity_duplicates'] + delta['user_duplicates']
+            return (
+                f"Appended {added[0]} activity rows and {added[1]} logins ({duplicates} duplicates dropped); "
+                f"{len(delta['users'])} users updated.",
+                preview(self.merged_data if self.legacy_merge else delta['interaction_counts'])
+            )
+        except Exception as e:
+            return f"Error appending logs: {str(e)}", None
+    
+    def save_to_store(self, path=DEFAULT_STORE_PATH):
+        try:
+            if self.interaction_counts is None:
+                return "Please process data first."
+            
+            # One transaction; the cleaned logs are saved when this session has them
+            cleaned_data = self._cleaned_logs() or {}
+            store = ProcessedStore(path)
+            try:
+                with self.instrumentation.stage('store', len(self.interaction_counts), 'sqlite') as record:
+                    written = store.save(self.interaction_counts, cleaned_data.get('activity'),
+                                         cleaned_data.get('user'), self.data_fingerprint)
+                    record['rows_out'] = sum(written.values())
+            finally:
+                store.close()
+            return (f"Saved {written['interaction_counts']} interaction rows, {written['activity_log']} activity "
+                    f"rows and {written['user_log']} logins to {path}.")
+        except Exception as e:
+            return f"Error saving processed data: {str(e)}"
+    
+    def open_store(self, path=DEFAULT_STORE_PATH):
+        try:
+            if not os.path.exists(path):
+                return f"Store {path} does not exist.", None
+            
+            # A file that is not a processed store fails here, before it replaces the session's data
+            store = ProcessedStore(path)
+            try:
+                fingerprint = store.fingerprint() or content_hash(path)
+                rows = store.count('interaction_counts')
+                first_rows = store.preview()
+            except Exception:
+                store.close()
+                raise
+            
+            # Nothing is loaded up front; each statistics or heatmap request queries the store
+            self.dataset_key = None
+            self._reset_processed_data()
+            self.original_data = None
+            self.store = store
+            self.data_fingerprint = fingerprint
+            return f"Opened processed store {path} ({rows} interaction rows).", preview(first_rows)
+        except Exception as e:
+            return f"Error opening store: {str(e)}", None
+    
+    def _has_data(self):
+        return self.rollup is not None or self.store is not None
+    
+    def _statistics_source(self):
+        # A store answers with one indexed GROUP BY over the selected components and months,
+        # otherwise a slice of the rollup's Component x Month totals
+        return self.store if self.store is not None else self.rollup
+    
+    def generate_statistics(self, target_components, start_month=None, end_month=None):
+        try:
+            if not self._has_data():
+                return "Please process data first.", None, None, None
+            months = month_range(start_month, end_month)
+            
+            def compute(components):
+                # Semester and monthly statistics from the (Component, Month) totals,
+                # split per component over the stats engine's pool for large data
+                if self.store is not None:
+                    rows_in = self.store.count('interaction_counts')
+                else:
+                    rows_in = len(self.rollup)
+                arrays_path = self._shared_arrays_path(components, rows_in)
+                mode = self.stats_engine.mode(components, rows_in, arrays_path)
+                with self.instrumentation.stage('stats', rows_in, mode) as record:
+                    semester_stats_df, monthly_stats_df = self.stats_engine.compute(
+                        self._statistics_source(), components, *months, rows=rows_in, arrays_path=arrays_path)
+                    record['rows_out'] = len(monthly_stats_df)
+                return semester_stats_df, monthly_stats_df
+            
+            # Repeat clicks with the same data and selection are served from the result cache
+            self.semester_stats_df, self.monthly_stats_df = self._cached_result(
+                ('statistics', *months), target_components, compute, ordered=True)
+            
+            # Only the first page of the monthly table is sent; the rest is paged on demand
+            monthly_info, monthly_page, _ = self.get_table_page('Monthly statistics')
+            return "Statistics generated successfully:", display_frame(self.semester_stats_df), monthly_info, monthly_page
         
         except Exception as e:
-            return f"Error generating statistics: {str(e)}", None
+            return f"Error generating statistics: {str(e)}", None, None, None
     
-    def generate_correlation_heatmap(self, target_components):
+    def _table(self, name):
+        # Cleaned logs replace the raw ones once available
+        if name in ('Activity log', 'User log'):
+            key = 'activity' if name == 'Activity log' else 'user'
+            frames = self._cleaned_logs() or self.original_data or {}
+            return frames.get(key)
+        if name == 'Component codes':
+            return (self.original_data or {}).get('component')
+        if name == 'Interaction counts':
+            return self.interaction_counts
+        if name == 'Semester statistics':
+            return self.semester_stats_df
+        if name == 'Monthly statistics':
+            return self.monthly_stats_df
+        raise ValueError(f"Unknown table: {name}")
+    
+    def get_table_columns(self, table):
+        """Column names of a table, empty while it is not available."""
         try:
-            if self.merged_data is None:
-                return "Please process data first.", None
+            frame = self._table(table)
+        except ValueError:
+            return []
+        return [] if frame is None else [str(column) for column in frame.columns]
+    
+    def get_table_page(self, table, number=1, page_size=DEFAULT_PAGE_SIZE, sort_by=None, descending=False,
+                       filter_column=None, filter_operator='==', filter_value=None):
+        """
+        One page of a loaded table or statistics result, sliced server-side.
+        Args:
+            table (str): One of TABLES.
+            number (int): 1-based page number.
+            page_size (int): Rows per page.
+            sort_by (str): Column to sort by, or None.
+            descending (bool): Sort direction.
+            filter_column (str): Column to filter on, or None for all rows.
+            filter_operator (str): One of FILTER_OPERATORS.
+            filter_value (str): Value to compare the column with.
+        Returns:
+            tuple: (info markdown, page pd.DataFrame, page number)
+        """
+        try:
+            frame = self._table(table)
+            if frame is None:
+                return f"{table} is not available yet.", None, 1
             
-            # Filter for target components
-            filtered_data = self.merged_data[self.merged_data['Component'].isin(target_components)]
+            # Reuse the sorted and filtered view while paging through it
+            sort_by = sort_by.strip() if sort_by else None
+            filter_value = str(filter_value).strip() if filter_value is not None else ''
+            where = (filter_column, filter_operator, filter_value) if filter_column and filter_value else None
+            key = (table, sort_by, descending, where)
+            cached = self.views.get(key)
+            if cached is not None and cached[0] is frame:
+                view = cached[1]
+            else:
+                view = table_view(frame, sort_by, not descending, where)
+                self.views.put(key, (frame, view))
             
-            # Create interaction matrix
-            interaction_matrix = filtered_data.pivot_table(
-                index='User_ID', columns='Component', aggfunc='size', fill_value=0)
+            rows, number, pages = page(view, number or 1, page_size or DEFAULT_PAGE_SIZE)
+            return format_page_info(table, number, pages, len(view), len(frame)), rows, number
+        except Exception as e:
+            return f"Error reading table: {str(e)}", None, number
+    
+    def generate_correlation_heatmap(self, target_components, start_month=None, end_month=None):
+        try:
+            if not self._has_data():
+                return "Please process data first.", None
+            months = month_range(start_month, end_month)
+            store = self.store
+            rollup = self.rollup
             
-            # Calculate correlation matrix
-            correlation_matrix = interaction_matrix.corr()
-            print(f"correlation_matrix: {correlation_matrix}")
+            def correlation(components):
+                # Sparse user x component interaction matrix, summed over the months in the range
+                if store is not None:
+                    interaction_matrix = InteractionMatrix.from_counts(
+                        store.user_component_counts(components, *months), components)
+                else:
+                    interaction_matrix = rollup.interaction_matrix(components, *months)
+                
+                # Calculate correlation matrix
+                return interaction_matrix.correlation()
             
-            # Plot heatmap
-            plt.figure(figsize=(10, 8))
-            sns.heatmap(correlation_matrix, annot=True, cmap='coolwarm')
-            plt.title("Component Interaction Correlation Heatmap")
-            plt.tight_layout()  # Adjust layout to prevent cut-off labels
-
-            save_path = "/home/kamikaze/Documents/projects/data-analysis-system/heatmap.png"
-            try:
-                plt.savefig(save_path, bbox_inches='tight')
-                print(f"Heatmap saved to {save_path}")
-            except Exception as e:
-                print(f"Error saving heatmap: {e}")
-            
-            # # Save plot as a temporary image.
-            # plt.savefig("./heatmap.png")
-            plt.close()
-            return save_path
+            def build_correlation():
+                return self._cached_result(('correlation', *months), target_components, correlation)
+            
+            # Rendered on the worker pool with the Agg canvas; repeat views come from the LRU
+            key = (self.data_fingerprint, frozenset(target_components), months)
+            rows_in = len(rollup) if rollup is not None else None
+            with self.instrumentation.stage('render', rows_in) as record:
+                png = heatmap_renderer.render(key, build_correlation)
+                record['rows_out'] = len(target_components)
+            return Image.open(io.BytesIO(png))
         except Exception as e:
             return f"Error generating heatmap: {str(e)}", None
+    
+    def get_diagnostics(self):
+        """
+        Stage timings for the Diagnostics tab.
+        Returns:
+            tuple: (summary markdown, per-stage records pd.DataFrame, most recent first)
+        """
+        records = self.instrumentation.summary()
+        if records.empty:
+            return "No stages recorded yet.", None
+        totals = records.groupby('stage', sort=False)['seconds'].agg(['count', 'sum'])
+        lines = [f"- **{row.Index}**: {row.count} runs, {row.sum:.3f}s total" for row in totals.itertuples()]
+        if self.instrumentation.profiles:
+            lines.append(f"\nLast profile: `{self.instrumentation.profiles[-1]}.pstats`")
+        return "\n".join(lines), display_frame(records)
+    
+    def clear_diagnostics(self):
+        self.instrumentation.clear()
+        return self.get_diagnostics()
+    
+    def request_profile(self):
+        # The next action of this session runs under cProfile and tracemalloc
+        self.instrumentation.request_profile()
+        return f"The next action will be profiled; dumps are written to {self.instrumentation.profile_dir}."
+
+
+def month_range(start_month=None, end_month=None):
+    """
+    Normalise optional month bounds from the interface.
+    Args:
+        start_month (str): First month such as '2023-09', blank for no bound.
+        end_month (str): Last month, blank for no bound.
+    Returns:
+        tuple: ('YYYY-MM' or None, 'YYYY-MM' or None)
+    """
+    return tuple(
+        str(pd.Period(month.strip(), freq='M')) if month and month.strip() else None
+        for month in (start_month, end_month)
+    )
+
+def session_handler(method, app_options, profile=True):
+    """
+    Wrap a DataAnalysisApp method as a Gradio handler with per-session state.
+
+    The first input and output of the handler is the session's app, created
+    on first use, so concurrent browser sessions never share mutable state.
+    Processed datasets are still shared read-only through SharedDatasets.
+    Args:
+        method (callable): Unbound DataAnalysisApp method.
+        app_options (dict): Keyword arguments for new DataAnalysisApp instances.
+        profile (bool): Whether a requested profile may cover this call; off for polling.
+    Returns:
+        callable: Handler taking (app, *inputs) and returning (app, *outputs).
+    """
+    def handler(app, *args):
+        if app is None:
+            app = DataAnalysisApp(**app_options)
+        # Profiles this call if the session asked for it
+        with app.instrumentation.profiling(method.__name__) if profile else nullcontext():
+            result = method(app, *args)
+        return (app, *result) if isinstance(result, tuple) else (app, result)
+    # Gradio derives API endpoint names from the function name
+    handler.__name__ = method.__name__
+    return handler
 
-def create_gradio_interface():
-    app = DataAnalysisApp()
+def create_gradio_interface(concurrency_limit=DEFAULT_CONCURRENCY_LIMIT, **app_options):
+    def generate_heatmap(app, components, start_month, end_month):
+        result = app.generate_correlation_heatmap(
+            [component.strip() for component in components.split(',')], start_month, end_month)
+        # Errors come back as (message, None) and are shown above the cleared image
+        if isinstance(result, tuple):
+            return result
+        return "Heatmap generated successfully.", result
+    
+    def show_page(app, table, number, page_size, sort_by, descending, *where):
+        return app.get_table_page(table, number, page_size, sort_by, descending, *where)
+    
+    def previous_page(app, table, number, page_size, sort_by, descending, *where):
+        return app.get_table_page(table, (number or 1) - 1, page_size, sort_by, descending, *where)
+    
+    def next_page(app, table, number, page_size, sort_by, descending, *where):
+        return app.get_table_page(table, (number or 1) + 1, page_size, sort_by, descending, *where)
+    
+    def filter_columns(app, table):
+        return gr.Dropdown(choices=app.get_table_columns(table))
+    
+    def job_outputs(app, job_id, count):
+        # Returns (job_id, *outputs); outputs are left untouched until the job has a result
+        if not job_id:
+            return (None,) + (gr.skip(),) * count
+        message, result, finished = app.job_status(job_id)
+        if result is not None:
+            return (None, *result)
+        return (None if finished else job_id, message) + (gr.skip(),) * (count - 1)
+    
+    def poll_load(app, job_id):
+        return job_outputs(app, job_id, 4)
+    
+    def poll_process(app, job_id):
+        return job_outputs(app, job_id, 2)
     
     with gr.Blocks() as demo:
         gr.Markdown("# Data Analysis Application")
+        session = gr.State()
+        # ID of the session's running load or processing job, polled by job_timer
+        load_job = gr.State()
+        process_job = gr.State()
+        job_timer = gr.Timer(DEFAULT_POLL_SECONDS)
         
         with gr.Tab("Load Data"):
             activity_file = gr.File(label="Upload Activity Log CSV")
             user_file = gr.File(label="Upload User Log CSV")
             component_file = gr.File(label="Upload Component Codes CSV")
-            load_btn = gr.Button("Load Files")
+            with gr.Row():
+                load_btn = gr.Button("Load Files")
+                cancel_load_btn = gr.Button("Cancel")
             load_output = gr.Markdown()
-            activity_preview = gr.HTML()
-            user_preview = gr.HTML()
-            component_preview = gr.HTML()
+            activity_preview = gr.Dataframe(label="Activity Log Preview")
+            user_preview = gr.Dataframe(label="User Log Preview")
+            component_preview = gr.Dataframe(label="Component Codes Preview")
             
+            # Files are parsed on a background job; the timer shows progress and then the previews
             load_btn.click(
-                app.load_csv_files, 
-                inputs=[activity_file, user_file, component_file],
-                outputs=[load_output, activity_preview, user_preview, component_preview]
+                session_handler(DataAnalysisApp.submit_load, app_options, profile=False), 
+                inputs=[session, activity_file, user_file, component_file],
+                outputs=[session, load_output, load_job]
+            )
+            cancel_load_btn.click(
+                session_handler(DataAnalysisApp.cancel_job, app_options, profile=False), 
+                inputs=[session, load_job],
+                outputs=[session, load_output]
+            )
+            job_timer.tick(
+                session_handler(poll_load, app_options, profile=False), 
+                inputs=[session, load_job],
+                outputs=[session, load_job, load_output, activity_preview, user_preview, component_preview],
+                concurrency_limit=None,
+                show_progress='hidden'
+            )
+            
+            backup_path = gr.Textbox(label="SQLite Backup Path", value="backup.sqlite3")
+            reload_btn = gr.Button("Reload from Backup")
+            reload_btn.click(
+                session_handler(DataAnalysisApp.reload_backup, app_options), 
+                inputs=[session, backup_path],
+                outputs=[session, load_output, activity_preview, user_preview, component_preview]
             )
         
         with gr.Tab("Clean and Merge Data"):
-            process_btn = gr.Button("Clean and Merge Data")
+            with gr.Row():
+                process_btn = gr.Button("Clean and Merge Data")
+                stream_btn = gr.Button("Stream and Aggregate Large Files")
+                cancel_process_btn = gr.Button("Cancel")
             process_output = gr.Markdown()
-            merged_preview = gr.HTML()
+            merged_preview = gr.Dataframe(label="Interaction Counts Preview")
             process_btn.click(
-                app.clean_and_merge_data, 
-                outputs=[process_output, merged_preview]
+                session_handler(DataAnalysisApp.submit_clean_and_merge, app_options, profile=False), 
+                inputs=[session],
+                outputs=[session, process_output, process_job]
+            )
+            stream_btn.click(
+                session_handler(DataAnalysisApp.submit_stream, app_options, profile=False), 
+                inputs=[session, activity_file, user_file, component_file],
+                outputs=[session, process_output, process_job]
+            )
+            cancel_process_btn.click(
+                session_handler(DataAnalysisApp.cancel_job, app_options, profile=False), 
+                inputs=[session, process_job],
+                outputs=[session, process_output]
+            )
+            job_timer.tick(
+                session_handler(poll_process, app_options, profile=False), 
+                inputs=[session, process_job],
+                outputs=[session, process_job, process_output, merged_preview],
+                concurrency_limit=None,
+                show_progress='hidden'
+            )
+        
+            
+            gr.Markdown("### Append new days of logs")
+            new_activity_file = gr.File(label="New Activity Log Rows CSV")
+            new_user_file = gr.File(label="New User Log Rows CSV")
+            append_btn = gr.Button("Append New Logs")
+            append_btn.click(
+                session_handler(DataAnalysisApp.append_logs, app_options), 
+                inputs=[session, new_activity_file, new_user_file],
+                outputs=[session, process_output, merged_preview]
+            )
+        
+            
+            gr.Markdown("### Processed data store")
+            store_path = gr.Textbox(label="SQLite Store Path", value=DEFAULT_STORE_PATH)
+            with gr.Row():
+                save_store_btn = gr.Button("Save Processed Data")
+                open_store_btn = gr.Button("Open Processed Store")
+            save_store_btn.click(
+                session_handler(DataAnalysisApp.save_to_store, app_options), 
+                inputs=[session, store_path],
+                outputs=[session, process_output]
+            )
+            open_store_btn.click(
+                session_handler(DataAnalysisApp.open_store, app_options), 
+                inputs=[session, store_path],
+                outputs=[session, process_output, merged_preview]
             )
         
         with gr.Tab("Generate Statistics"):
@@ -205,32 +936,110 @@ def create_gradio_interface():
                 label="Select Components", 
                 choices=['Quiz', 'Lecture', 'Assignment', 'Attendence', 'Survey']
             )
+            with gr.Row():
+                stats_start = gr.Textbox(label="From Month (YYYY-MM)")
+                stats_end = gr.Textbox(label="To Month (YYYY-MM)")
             stats_btn = gr.Button("Generate Statistics")
             stats_output = gr.Markdown()
-            stats_table = gr.HTML()
+            semester_table = gr.Dataframe(label="Semester Statistics")
+            monthly_info = gr.Markdown()
+            monthly_table = gr.Dataframe(label="Monthly Statistics")
             stats_btn.click(
-                app.generate_statistics, 
-                inputs=[components], 
-                outputs=[stats_output, stats_table]
+                session_handler(DataAnalysisApp.generate_statistics, app_options), 
+                inputs=[session, components, stats_start, stats_end], 
+                outputs=[session, stats_output, semester_table, monthly_info, monthly_table]
             )
         
+        with gr.Tab("Browse Tables"):
+            # Rows are sliced, sorted and filtered on the server; only one page is sent
+            table_name = gr.Dropdown(label="Table", choices=TABLES, value='Monthly statistics')
+            with gr.Row():
+                sort_column = gr.Textbox(label="Sort By Column")
+                sort_descending = gr.Checkbox(label="Descending")
+            with gr.Row():
+                filter_column = gr.Dropdown(label="Filter Column", choices=[], value=None)
+                filter_operator = gr.Dropdown(label="Operator", choices=list(FILTER_OPERATORS), value='==')
+                filter_value = gr.Textbox(label="Value", placeholder="e.g. Quiz, 10 or 2023-10")
+            with gr.Row():
+                page_number = gr.Number(label="Page", value=1, precision=0)
+                page_size = gr.Number(label="Rows Per Page", value=DEFAULT_PAGE_SIZE, precision=0)
+            with gr.Row():
+                previous_btn = gr.Button("Previous")
+                show_btn = gr.Button("Show")
+                next_btn = gr.Button("Next")
+            page_info = gr.Markdown()
+            page_table = gr.Dataframe()
+            
+            page_inputs = [session, table_name, page_number, page_size, sort_column, sort_descending,
+                           filter_column, filter_operator, filter_value]
+            page_outputs = [session, page_info, page_table, page_number]
+            show_btn.click(session_handler(show_page, app_options), inputs=page_inputs, outputs=page_outputs)
+            previous_btn.click(session_handler(previous_page, app_options), inputs=page_inputs, outputs=page_outputs)
+            next_btn.click(session_handler(next_page, app_options), inputs=page_inputs, outputs=page_outputs)
+            # The column choices follow the selected table and whatever has been computed since
+            for event in [table_name.change, filter_column.focus]:
+                event(session_handler(filter_columns, app_options, profile=False),
+                      inputs=[session, table_name], outputs=[session, filter_column])
+        
         with gr.Tab("Generate Heatmap"):
             gr.Markdown("### Generate a Heatmap with Component Correlations")
 
             # Textbox input for target components (comma-separated)
             components_input = gr.Textbox(label="Target Components", value="Quiz,Lecture,Assignment,Attendence,Survey")
+            with gr.Row():
+                heatmap_start = gr.Textbox(label="From Month (YYYY-MM)")
+                heatmap_end = gr.Textbox(label="To Month (YYYY-MM)")
+            heatmap_status = gr.Markdown()
             output = gr.Image(label="Correlation Heatmap")
             btn = gr.Button("Generate Heatmap")
 
             # Button click event
             btn.click(
-                fn=lambda components: app.generate_correlation_heatmap(components.split(',')),
-                inputs=components_input,
-                outputs=output
+                fn=session_handler(generate_heatmap, app_options),
+                inputs=[session, components_input, heatmap_start, heatmap_end],
+                outputs=[session, heatmap_status, output]
+            )
+
+        with gr.Tab("Diagnostics"):
+            gr.Markdown("### Time, rows and memory per pipeline stage")
+            with gr.Row():
+                refresh_btn = gr.Button("Refresh")
+                clear_btn = gr.Button("Clear")
+                profile_btn = gr.Button("Profile Next Action")
+            diagnostics_output = gr.Markdown()
+            diagnostics_table = gr.Dataframe()
+            refresh_btn.click(
+                session_handler(DataAnalysisApp.get_diagnostics, app_options),
+                inputs=[session],
+                outputs=[session, diagnostics_output, diagnostics_table]
+            )
+            clear_btn.click(
+                session_handler(DataAnalysisApp.clear_diagnostics, app_options),
+                inputs=[session],
+                outputs=[session, diagnostics_output, diagnostics_table]
+            )
+            profile_btn.click(
+                session_handler(DataAnalysisApp.request_profile, app_options),
+                inputs=[session],
+                outputs=[session, diagnostics_output]
+            )
+            
+            gr.Markdown("### Background jobs")
+            jobs_btn = gr.Button("Refresh Jobs")
+            jobs_output = gr.Markdown()
+            jobs_table = gr.Dataframe()
+            jobs_btn.click(
+                session_handler(DataAnalysisApp.get_jobs, app_options),
+                inputs=[session],
+                outputs=[session, jobs_output, jobs_table]
             )
 
+    # Sessions hold their own state, so several requests can run at once
+    demo.queue(default_concurrency_limit=concurrency_limit)
     return demo
 
 if __name__ == "__main__":
+    # Stage records are logged as JSON lines by the instrumentation logger
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(message)s')
     demo = create_gradio_interface()
     demo.launch(debug=True)
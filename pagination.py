@@ -0,0 +1,121 @@
+import math
+import operator
+
+import pandas as pd
+
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 500
+PREVIEW_ROWS = 5
+# Filter operator -> comparison; 'contains' matches a substring of the text value
+FILTER_OPERATORS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    'contains': None,
+}
+
+
+def page_count(rows, page_size):
+    """Number of pages needed for rows, at least one."""
+    return max(1, math.ceil(rows / page_size))
+
+
+def filter_mask(frame, column, operator, value):
+    """
+    Boolean mask of rows matching one filter condition, without evaluating any expression.
+
+    The value is converted to the column's type, so numeric, date and month
+    columns compare by value and text columns compare as strings.
+    Args:
+        frame (pd.DataFrame): Table to filter.
+        column (str): Column to compare.
+        operator (str): One of FILTER_OPERATORS.
+        value (str): Value typed in the browser.
+    Returns:
+        np.ndarray: True for matching rows; missing values never match.
+    """
+    if column not in frame:
+        raise ValueError(f"Unknown column: {column}")
+    if operator not in FILTER_OPERATORS:
+        raise ValueError(f"Unknown operator: {operator}")
+    values = frame[column]
+    if operator == 'contains':
+        return values.astype(str).str.contains(value, regex=False).to_numpy() & values.notna().to_numpy()
+
+    dtype = values.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        dtype = dtype.categories.dtype
+        values = values.astype(dtype)
+    if isinstance(dtype, pd.PeriodDtype):
+        value = pd.Period(value, freq=dtype.freq)
+    elif pd.api.types.is_datetime64_any_dtype(dtype):
+        value = pd.Timestamp(value)
+    elif pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype):
+        value = float(value)
+    else:
+        values = values.astype(str).where(values.notna())
+    mask = FILTER_OPERATORS[operator](values, value)
+    return mask.fillna(False).to_numpy(dtype=bool) & values.notna().to_numpy()
+
+
+def table_view(frame, sort_by=None, ascending=True, where=None):
+    """
+    Filtered and sorted view of a table, before slicing into pages.
+    Args:
+        frame (pd.DataFrame): Table to view.
+        sort_by (str): Column to sort by, or None to keep the table order.
+        ascending (bool): Sort direction.
+        where (tuple): (column, operator, value) condition to filter rows, see filter_mask, or None.
+    Returns:
+        pd.DataFrame: The view; frame itself when neither sort nor filter apply.
+    """
+    view = frame
+    if where:
+        view = view[filter_mask(view, *where)]
+    if sort_by:
+        if sort_by not in view:
+            raise ValueError(f"Unknown column: {sort_by}")
+        view = view.sort_values(sort_by, ascending=ascending, kind='stable')
+    return view
+
+
+def display_frame(frame):
+    """Copy of a small frame with categorical and period columns as strings, ready for the browser."""
+    frame = frame.copy()
+    for column in frame.columns:
+        dtype = frame[column].dtype
+        if isinstance(dtype, (pd.CategoricalDtype, pd.PeriodDtype)) or dtype == object:
+            frame[column] = frame[column].astype(object).map(lambda value: None if pd.isna(value) else str(value))
+    return frame
+
+
+def page(frame, number=1, page_size=DEFAULT_PAGE_SIZE):
+    """
+    One page of rows of a table.
+    Args:
+        frame (pd.DataFrame): Table or view to slice.
+        number (int): 1-based page number, clamped to the valid range.
+        page_size (int): Rows per page, clamped to 1..MAX_PAGE_SIZE.
+    Returns:
+        tuple: (rows pd.DataFrame, page number, page count)
+    """
+    page_size = min(max(int(page_size), 1), MAX_PAGE_SIZE)
+    pages = page_count(len(frame), page_size)
+    number = min(max(int(number), 1), pages)
+    start = (number - 1) * page_size
+    return display_frame(frame.iloc[start:start + page_size]), number, pages
+
+
+def preview(frame, rows=PREVIEW_ROWS):
+    """First rows of a table for the load and merge previews."""
+    return display_frame(frame.head(rows))
+
+
+def format_page_info(name, number, pages, rows, total_rows):
+    """Human readable position of a page in a table."""
+    if rows == total_rows:
+        return f"**{name}**: page {number} of {pages} ({total_rows} rows)"
+    return f"**{name}**: page {number} of {pages} ({rows} of {total_rows} rows match)"
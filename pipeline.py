@@ -0,0 +1,315 @@
+import numpy as np
+import pandas as pd
+
+from cache import file_path
+from dedup import HashDeduplicator
+from instrumentation import null_instrumentation
+from jobs import no_progress
+
+USER_COLUMN = 'User Full Name *Anonymized'
+EXCLUDED_COMPONENTS = ['System', 'Folder']
+ACTIVITY_KEYS = ['User_ID', 'Component', 'Action', 'Target']
+USER_KEYS = ['Date', 'Time', 'User_ID']
+COUNT_KEYS = ['User_ID', 'Component', 'Month']
+DATE_FORMAT = '%d/%m/%Y'
+DEFAULT_CHUNKSIZE = 100_000
+# 'numpy' keeps pandas' default columns; 'pyarrow' parses with the Arrow reader into Arrow-backed columns
+DTYPE_BACKENDS = ['numpy', 'pyarrow']
+# Distinct strings per column up to which the Arrow reader dictionary encodes it
+ARROW_DICT_MAX_CARDINALITY = 1 << 20
+
+
+def clean_activity_log(activity_log, instrumentation=null_instrumentation):
+    """
+    Rename, filter and deduplicate a raw ACTIVITY_LOG frame.
+    Args:
+        activity_log (pd.DataFrame): Raw activity log.
+        instrumentation (Instrumentation): Records the rename, filter and dedup stages.
+    Returns:
+        pd.DataFrame: Cleaned activity log.
+    """
+    # Rename columns
+    with instrumentation.stage('rename', len(activity_log), 'activity') as record:
+        activity_log = activity_log.rename(columns={USER_COLUMN: 'User_ID'})
+        record['rows_out'] = len(activity_log)
+
+    # Remove 'System' and 'Folder' components
+    with instrumentation.stage('filter', len(activity_log), 'activity') as record:
+        activity_log = activity_log[~activity_log['Component'].isin(EXCLUDED_COMPONENTS)]
+        record['rows_out'] = len(activity_log)
+
+    # Drop duplicates
+    with instrumentation.stage('dedup', len(activity_log), 'activity') as record:
+        activity_log = activity_log.drop_duplicates(subset=ACTIVITY_KEYS)
+        record['rows_out'] = len(activity_log)
+    return activity_log
+
+
+def parse_unique(values, parse):
+    """
+    Parse each distinct string once and broadcast the result back to every row.
+    Args:
+        values (pd.Series): Strings to parse, possibly with missing values.
+        parse (callable): Vectorized parser applied to the distinct strings.
+    Returns:
+        np.ndarray: Parsed values aligned with `values`; missing rows are NaT.
+    """
+    codes, uniques = pd.factorize(values)
+    parsed = np.asarray(parse(pd.Series(uniques, dtype=object)))
+    result = parsed[codes]
+    result[codes < 0] = np.array('NaT', dtype=parsed.dtype)
+    return result
+
+
+def parse_timestamps(dates, times=None, date_format=DATE_FORMAT):
+    """
+    Vectorized USER_LOG date/time parsing.
+
+    Only the date part of each Date string is used, as before. Logs repeat
+    the same few hundred dates and seconds-resolution times, so each
+    distinct string is parsed once with a fixed format.
+    Args:
+        dates (pd.Series): Date strings such as '21/11/2023' or '21/11/2023 00:00'.
+        times (pd.Series): Optional Time strings such as '13:05:00' or '13:05'.
+        date_format (str): strptime format of the date part.
+    Returns:
+        tuple: (day, timestamp) datetime64 Series; the timestamp falls back
+            to the day when the time is missing.
+    """
+    day = parse_unique(dates, lambda uniques: pd.to_datetime(
+        uniques.str.split().str[0], format=date_format))
+    day = pd.Series(day, index=dates.index, dtype='datetime64[ns]')
+    if times is None:
+        return day, day
+
+    time = parse_times(times)
+    return day, day + time.fillna(pd.Timedelta(0))
+
+
+def time_deltas(uniques):
+    # Accept 'HH:MM' as well as 'HH:MM:SS'
+    uniques = uniques.astype(str).str.strip()
+    uniques = uniques.where(uniques.str.count(':') != 1, uniques + ':00')
+    return pd.to_timedelta(uniques, errors='coerce')
+
+
+def parse_times(times):
+    """
+    Vectorized USER_LOG Time parsing.
+    Args:
+        times (pd.Series): Time strings such as '13:05:00' or '13:05', or time values.
+    Returns:
+        pd.Series: timedelta64 time of day; missing or unparseable times are NaT.
+    """
+    return pd.Series(parse_unique(times, time_deltas), index=times.index, dtype='timedelta64[ns]')
+
+
+def clean_user_log(user_log, instrumentation=null_instrumentation):
+    """
+    Rename, parse dates and deduplicate a raw USER_LOG frame.
+    Args:
+        user_log (pd.DataFrame): Raw user log.
+        instrumentation (Instrumentation): Records the rename, parse_dates and dedup stages.
+    Returns:
+        pd.DataFrame: Cleaned user log.
+    """
+    # Rename columns
+    with instrumentation.stage('rename', len(user_log), 'user') as record:
+        user_log = user_log.rename(columns={USER_COLUMN: 'User_ID'})
+        record['rows_out'] = len(user_log)
+
+    # Convert date columns to datetime and combine Date with Time
+    with instrumentation.stage('parse_dates', len(user_log), 'user') as record:
+        user_log['Date'], user_log['Timestamp'] = parse_timestamps(user_log['Date'], user_log.get('Time'))
+        record['rows_out'] = len(user_log)
+
+    # Drop duplicates
+    with instrumentation.stage('dedup', len(user_log), 'user') as record:
+        user_log = user_log.drop_duplicates(subset=USER_KEYS)
+        record['rows_out'] = len(user_log)
+    return user_log
+
+
+def count_logins(user_log):
+    """
+    Count cleaned USER_LOG rows per user and month.
+    Args:
+        user_log (pd.DataFrame): Cleaned user log.
+    Returns:
+        pd.Series: Login counts indexed by (User_ID, Month).
+    """
+    months = user_log['Timestamp'].dt.to_period('M').rename('Month')
+    return user_log.groupby([user_log['User_ID'], months], observed=True).size().rename('Logins')
+
+
+def count_activities(activity_log):
+    """
+    Count cleaned ACTIVITY_LOG rows per user and component.
+    Args:
+        activity_log (pd.DataFrame): Cleaned activity log.
+    Returns:
+        pd.Series: Activity counts indexed by (User_ID, Component).
+    """
+    return activity_log.groupby(['User_ID', 'Component'], observed=True).size().rename('Activities')
+
+
+def join_counts(logins, activities):
+    """
+    Join per-user login and activity counts into interaction counts.
+
+    The legacy merge pairs every login of a user with every activity of
+    that user, so the number of merged rows for a (User_ID, Component, Month)
+    is simply logins x activities. Joining the two aggregates gives the
+    same counts without building the exploded frame.
+    Args:
+        logins (pd.Series): Output of count_logins.
+        activities (pd.Series): Output of count_activities.
+    Returns:
+        pd.DataFrame: User_ID, Component, Month and Interaction_Count columns.
+    """
+    counts = logins.reset_index().merge(activities.reset_index(), on='User_ID', how='inner')
+    counts['Interaction_Count'] = counts['Logins'] * counts['Activities']
+    counts = counts.sort_values(COUNT_KEYS, ignore_index=True)
+    return counts[COUNT_KEYS + ['Interaction_Count']]
+
+
+def aggregate_interactions(user_log, activity_log):
+    """
+    Compute per-User/Component/Month interaction counts from cleaned logs.
+    Args:
+        user_log (pd.DataFrame): Cleaned user log.
+        activity_log (pd.DataFrame): Cleaned activity log.
+    Returns:
+        pd.DataFrame: Interaction counts, see join_counts.
+    """
+    return join_counts(count_logins(user_log), count_activities(activity_log))
+
+
+def explode_merge(user_log, activity_log):
+    """
+    Legacy many-to-many merge of the cleaned logs on User_ID.
+    Args:
+        user_log (pd.DataFrame): Cleaned user log.
+        activity_log (pd.DataFrame): Cleaned activity log.
+    Returns:
+        pd.DataFrame: One row per (login, activity) pair with a Month column.
+    """
+    merged_data = user_log.merge(activity_log, on='User_ID', how='left')
+    merged_data['Month'] = merged_data['Timestamp'].dt.to_period('M')
+    return merged_data
+
+
+def count_merged_interactions(merged_data):
+    """
+    Count interactions per user, component and month from an exploded merge.
+    Args:
+        merged_data (pd.DataFrame): Output of explode_merge.
+    Returns:
+        pd.DataFrame: Interaction counts, see join_counts.
+    """
+    return merged_data.groupby(COUNT_KEYS, observed=True).size().reset_index(name='Interaction_Count')
+
+
+def read_csv(path, progress=no_progress, stage='parse', chunksize=DEFAULT_CHUNKSIZE, dtype_backend='numpy'):
+    """
+    Read a whole CSV file, reporting the rows parsed so far after each chunk.
+    Args:
+        path (str): CSV file path or buffer.
+        progress (callable): Called as progress(stage, rows); no_progress reads in one call.
+        stage (str): Stage name passed to progress.
+        chunksize (int): Rows per chunk.
+        dtype_backend (str): One of DTYPE_BACKENDS.
+    Returns:
+        pd.DataFrame: The whole file.
+    """
+    if dtype_backend == 'pyarrow':
+        # Optional dependency, only needed for this backend
+        from pyarrow import csv
+        # Multithreaded Arrow reader; repeated strings are dictionary encoded while parsing, and
+        # empty fields become missing as with pandas. It has no chunked mode, so progress comes once
+        options = csv.ConvertOptions(strings_can_be_null=True, auto_dict_encode=True,
+                                     auto_dict_max_cardinality=ARROW_DICT_MAX_CARDINALITY)
+        frame = csv.read_csv(file_path(path), convert_options=options).to_pandas(types_mapper=pd.ArrowDtype)
+        progress(stage, len(frame))
+        return frame
+    if progress is no_progress:
+        return pd.read_csv(path)
+    chunks = []
+    rows = 0
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        chunks.append(chunk)
+        rows += len(chunk)
+        progress(stage, rows)
+    if not chunks:
+        return pd.read_csv(path, nrows=0)
+    return pd.concat(chunks, ignore_index=True)
+
+
+def stream_counts(path, clean, count, keys, chunksize=DEFAULT_CHUNKSIZE, deduplicator=None,
+                  progress=no_progress, stage='stream'):
+    """
+    Clean and count a CSV log chunk by chunk with bounded memory.
+    Args:
+        path (str): CSV file path or buffer.
+        clean (callable): clean_activity_log or clean_user_log.
+        count (callable): count_activities or count_logins.
+        keys (list): Deduplication key columns.
+        chunksize (int): Rows per chunk.
+        deduplicator (HashDeduplicator): Drops rows seen in earlier chunks; a new one by default.
+        progress (callable): Called as progress(stage, rows) after each chunk.
+        stage (str): Stage name passed to progress.
+    Returns:
+        pd.Series: Running counts over the whole file.
+    """
+    if deduplicator is None:
+        deduplicator = HashDeduplicator(keys)
+    running = None
+    rows = 0
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        rows += len(chunk)
+        progress(stage, rows)
+        chunk = deduplicator.drop_seen(clean(chunk))
+        counts = count(chunk)
+        running = counts if running is None else running.add(counts, fill_value=0)
+    if running is None:
+        # Header-only file: count an empty frame to keep the index levels
+        running = count(clean(pd.read_csv(path, nrows=0)))
+    return running.astype('int64')
+
+
+def stream_log_counts(activity_log, user_log, chunksize=DEFAULT_CHUNKSIZE, activity_dedup=None,
+                      user_dedup=None, progress=no_progress):
+    """
+    Per-user activity and login counts of CSV logs, read chunk by chunk.
+    Args:
+        activity_log (str): ACTIVITY_LOG CSV path or buffer.
+        user_log (str): USER_LOG CSV path or buffer.
+        chunksize (int): Rows per chunk.
+        activity_dedup (HashDeduplicator): Deduplicator for activity rows, e.g. to read its report.
+        user_dedup (HashDeduplicator): Deduplicator for user log rows.
+        progress (callable): Called as progress(stage, rows) with the rows read from each log.
+    Returns:
+        tuple: (logins, activities), as count_logins and count_activities.
+    """
+    activities = stream_counts(activity_log, clean_activity_log, count_activities, ACTIVITY_KEYS, chunksize,
+                               activity_dedup, progress, 'stream activity')
+    logins = stream_counts(user_log, clean_user_log, count_logins, USER_KEYS, chunksize, user_dedup,
+                           progress, 'stream user')
+    return logins, activities
+
+
+def stream_interaction_counts(activity_log, user_log, chunksize=DEFAULT_CHUNKSIZE, activity_dedup=None,
+                              user_dedup=None, progress=no_progress):
+    """
+    Interaction counts computed from CSV logs without loading them whole.
+    Args:
+        activity_log (str): ACTIVITY_LOG CSV path or buffer.
+        user_log (str): USER_LOG CSV path or buffer.
+        chunksize (int): Rows per chunk.
+        activity_dedup (HashDeduplicator): Deduplicator for activity rows, e.g. to read its report.
+        user_dedup (HashDeduplicator): Deduplicator for user log rows.
+        progress (callable): Called as progress(stage, rows) with the rows read from each log.
+    Returns:
+        pd.DataFrame: Interaction counts, see join_counts.
+    """
+    return join_counts(*stream_log_counts(activity_log, user_log, chunksize, activity_dedup, user_dedup, progress))
@@ -0,0 +1,83 @@
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import seaborn as sns
+from matplotlib.figure import Figure
+
+from cache import LRUCache
+
+HEATMAP_TITLE = "Component Interaction Correlation Heatmap"
+DEFAULT_RENDER_WORKERS = 2
+DEFAULT_RENDER_CACHE_ENTRIES = 64
+
+
+def render_heatmap(correlation_matrix, title=HEATMAP_TITLE, cmap='coolwarm'):
+    """
+    Render a correlation heatmap to PNG bytes.
+
+    Uses a standalone Figure with the Agg canvas instead of pyplot, so no
+    global figure state is shared and it is safe to call from worker
+    threads and processes.
+    Args:
+        correlation_matrix (pd.DataFrame): Square correlation matrix.
+        title (str): Plot title.
+        cmap (str): Colormap name.
+    Returns:
+        bytes: PNG image.
+    """
+    figure = Figure(figsize=(10, 8))
+    ax = figure.subplots()
+    sns.heatmap(correlation_matrix, annot=True, cmap=cmap, ax=ax)
+    ax.set_title(title)
+    figure.tight_layout()  # Adjust layout to prevent cut-off labels
+
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format='png', bbox_inches='tight')
+    return buffer.getvalue()
+
+
+def render_correlation_heatmap(build_correlation):
+    """Build the correlation matrix and render it; runs on a renderer worker."""
+    correlation_matrix = build_correlation()
+    if correlation_matrix.empty:
+        raise ValueError("No interactions found for the selected components.")
+    return render_heatmap(correlation_matrix)
+
+
+class HeatmapRenderer:
+    """
+    Renders heatmaps on a worker pool and memoizes the PNG bytes.
+
+    Results are kept in an LRU keyed by (dataset hash, component set).
+    Concurrent requests for the same key share one render.
+    """
+
+    def __init__(self, max_workers=DEFAULT_RENDER_WORKERS, max_entries=DEFAULT_RENDER_CACHE_ENTRIES):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='heatmap')
+        self.results = LRUCache(max_entries)
+
+    def render(self, key, build_correlation, timeout=None):
+        """
+        PNG bytes for key, rendering on the pool on a miss.
+        Args:
+            key (tuple): Memo key, or None to always render.
+            build_correlation (callable): Returns the correlation matrix to plot.
+            timeout (float): Seconds to wait for the render.
+        Returns:
+            bytes: PNG image.
+        """
+        if key is None:
+            return self.executor.submit(render_correlation_heatmap, build_correlation).result(timeout)
+
+        future = self.results.setdefault(
+            key, lambda: self.executor.submit(render_correlation_heatmap, build_correlation))
+        try:
+            return future.result(timeout)
+        except Exception:
+            # Do not memoize failures
+            if future.done():
+                self.results.pop(key)
+            raise
+
+
+heatmap_renderer = HeatmapRenderer()
@@ -0,0 +1,221 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from analysis import InteractionMatrix, codes_and_labels
+
+
+def grown(matrix, shape):
+    """csr_matrix padded with empty rows and columns up to shape."""
+    indptr = np.concatenate([matrix.indptr, np.full(shape[0] - matrix.shape[0], matrix.indptr[-1])])
+    return sparse.csr_matrix((matrix.data, matrix.indices, indptr), shape=shape)
+
+
+class RollupCube:
+    """
+    Interaction counts rolled up by User_ID x Component x Month, built once per dataset.
+
+    The cube holds one sparse users x components matrix per month, plus
+    two partial totals: a dense Component x Month table for the statistics
+    and a sparse User_ID x Component matrix over all months for the
+    heatmap. A component subset and month range is answered by slicing
+    these, without going back to the row-level interaction table.
+    """
+
+    def __init__(self, users, components, months, monthly, component_month, user_component):
+        self.users = users
+        self.components = components
+        self.months = months
+        self.monthly = monthly
+        self.component_month = component_month
+        self.user_component = user_component
+
+    @classmethod
+    def from_counts(cls, interaction_counts):
+        """
+        Build the cube from the interaction count table.
+        Args:
+            interaction_counts (pd.DataFrame): User_ID/Component/Month/Interaction_Count table.
+        Returns:
+            RollupCube: Cube over the users, components and months present.
+        """
+        counts = interaction_counts['Interaction_Count'].to_numpy(dtype=np.int64)
+        user_codes, users = codes_and_labels(interaction_counts['User_ID'])
+        component_codes, components = codes_and_labels(interaction_counts['Component'])
+        month_codes, months = codes_and_labels(interaction_counts['Month'])
+
+        # Rows without a component or month drop out of every groupby, so of the cube too
+        valid = (component_codes >= 0) & (month_codes >= 0)
+        counts, user_codes = counts[valid], user_codes[valid]
+        component_codes, component_index = pd.factorize(component_codes[valid], sort=True)
+        month_codes, month_index = pd.factorize(month_codes[valid], sort=True)
+        components, months = components[component_index], months[month_index]
+
+        component_month = sparse.coo_matrix(
+            (counts, (component_codes, month_codes)), shape=(len(components), len(months))).toarray()
+
+        # The per-user matrices only cover rows with a user
+        has_user = user_codes >= 0
+        user_codes, user_index = pd.factorize(user_codes[has_user], sort=True)
+        counts, component_codes, month_codes = counts[has_user], component_codes[has_user], month_codes[has_user]
+        shape = (len(user_index), len(components))
+        monthly = []
+        for month in range(len(months)):
+            in_month = month_codes == month
+            monthly.append(sparse.coo_matrix(
+                (counts[in_month], (user_codes[in_month], component_codes[in_month])), shape=shape).tocsr())
+        user_component = sum(monthly, sparse.csr_matrix(shape, dtype=np.int64))
+        return cls(users[user_index], components, months, monthly, component_month, user_component)
+
+    def __len__(self):
+        """Number of (User_ID, Component, Month) cells with interactions."""
+        return sum(matrix.nnz for matrix in self.monthly)
+
+    def replace_users(self, users, interaction_counts):
+        """
+        Cube with the interactions of some users replaced, e.g. after appending their logs.
+
+        Only the months these users have interactions in, before or after,
+        are touched. Users, components and months not in the cube yet are
+        added after the existing ones, as align_categories adds categories.
+        Args:
+            users (list): Users whose interactions change.
+            interaction_counts (pd.DataFrame): All interaction rows of those users after the change.
+        Returns:
+            RollupCube: New cube; this one is left as it is.
+        """
+        rows = interaction_counts.dropna(subset=['User_ID', 'Component', 'Month'])
+        labels = {}
+        for name, current in [('User_ID', self.users), ('Component', self.components)]:
+            added = pd.Index(pd.unique(rows[name].to_numpy(dtype=object))).difference(current, sort=True)
+            labels[name] = current.append(added.astype(current.dtype)) if len(added) else current
+        users_index, components = labels['User_ID'], labels['Component']
+        months = self.months.union(pd.PeriodIndex(rows['Month'].unique(), freq='M')).sort_values()
+        shape = (len(users_index), len(components))
+
+        # Existing months keep their matrices; months new to the cube start empty
+        month_positions = months.get_indexer(self.months)
+        monthly = [sparse.csr_matrix(shape, dtype=np.int64) for _ in range(len(months))]
+        for old, new in enumerate(month_positions):
+            monthly[new] = grown(self.monthly[old], shape)
+        component_month = np.zeros((len(components), len(months)), dtype=np.int64)
+        component_month[:len(self.components)][:, month_positions] = self.component_month
+        user_component = grown(self.user_component, shape)
+
+        # The users' new rows as one matrix per month, over the users in the order given
+        users = pd.Index(list(users), dtype=object)
+        positions = users_index.get_indexer(users)
+        users = users[positions >= 0]
+        positions = positions[positions >= 0]
+        user_codes = users.get_indexer(rows['User_ID'].to_numpy(dtype=object))
+        component_codes = components.get_indexer(rows['Component'].to_numpy(dtype=object))
+        month_codes = months.get_indexer(pd.PeriodIndex(rows['Month'], freq='M'))
+        counts = rows['Interaction_Count'].to_numpy(dtype=np.int64)
+        place = sparse.csr_matrix((np.ones(len(positions), dtype=np.int64), (positions, np.arange(len(positions)))),
+                                  shape=(len(users_index), len(positions)))
+
+        for month in range(len(months)):
+            in_month = month_codes == month
+            before = monthly[month][positions]
+            if not in_month.any() and before.nnz == 0:
+                continue
+            after = sparse.coo_matrix((counts[in_month], (user_codes[in_month], component_codes[in_month])),
+                                      shape=(len(positions), len(components))).tocsr()
+            change = place @ (after - before)
+            monthly[month] = monthly[month] + change
+            monthly[month].eliminate_zeros()
+            user_component = user_component + change
+            component_month[:, month] += np.asarray(change.sum(axis=0)).ravel()
+        user_component.eliminate_zeros()
+        return RollupCube(users_index, components, months, monthly, component_month, user_component)
+
+    def _month_slice(self, start_month=None, end_month=None):
+        start = self.months.searchsorted(pd.Period(start_month, freq='M')) if start_month else 0
+        end = self.months.searchsorted(pd.Period(end_month, freq='M'), side='right') if end_month else len(self.months)
+        return slice(start, max(start, end))
+
+    def _component_positions(self, components=None):
+        # Positions in cube order, as groupby orders the components
+        if components is None:
+            return np.arange(len(self.components))
+        positions = self.components.get_indexer(pd.Index(list(components), dtype=object))
+        return np.unique(positions[positions >= 0])
+
+    def user_component_counts(self, components=None, start_month=None, end_month=None):
+        """
+        Interactions per user and component, summed over a month range.
+        Args:
+            components (list): Components to keep, or None for all.
+            start_month (str): First 'YYYY-MM' month, or None.
+            end_month (str): Last 'YYYY-MM' month, or None.
+        Returns:
+            tuple: (users x components csr_matrix, component labels)
+        """
+        months = self._month_slice(start_month, end_month)
+        positions = self._component_positions(components)
+        if months == slice(0, len(self.months)):
+            matrix = self.user_component
+        else:
+            matrix = sum(self.monthly[months], sparse.csr_matrix(self.user_component.shape, dtype=np.int64))
+        return matrix[:, positions], self.components[positions]
+
+    def component_month_totals(self, components, start_month=None, end_month=None):
+        """
+        Total interactions per (Component, Month), as analysis.component_month_totals.
+        Args:
+            components (list): Components to keep.
+            start_month (str): First 'YYYY-MM' month, or None.
+            end_month (str): Last 'YYYY-MM' month, or None.
+        Returns:
+            pd.DataFrame: Component, Month and Interactions columns.
+        """
+        positions = self._component_positions(components)
+        months = self._month_slice(start_month, end_month)
+        block = self.component_month[positions][:, months]
+        component_index, month_index = np.nonzero(block)
+        return pd.DataFrame({
+            'Component': self.components[positions][component_index].astype(object),
+            'Month': self.months[months][month_index],
+            'Interactions': block[component_index, month_index],
+        })
+
+    def interaction_matrix(self, components, start_month=None, end_month=None):
+        """
+        Users x components matrix for the correlation and chi-square, as InteractionMatrix.from_counts.
+        Args:
+            components (list): Components to keep.
+            start_month (str): First 'YYYY-MM' month, or None.
+            end_month (str): Last 'YYYY-MM' month, or None.
+        Returns:
+            InteractionMatrix: Users and components with at least one interaction.
+        """
+        matrix, labels = self.user_component_counts(components, start_month, end_month)
+        rows = np.flatnonzero(matrix.getnnz(axis=1))
+        columns = np.flatnonzero(matrix.getnnz(axis=0))
+        matrix = matrix[rows][:, columns].astype(np.float64)
+        return InteractionMatrix(matrix, self.users[rows], labels[columns].rename('Component'))
+
+    def pivot(self, components=None, start_month=None, end_month=None):
+        """
+        Wide User_ID x Month table with one column of counts per component, as the notebook's pivot_table.
+        Args:
+            components (list): Components to keep, or None for all.
+            start_month (str): First 'YYYY-MM' month, or None.
+            end_month (str): Last 'YYYY-MM' month, or None.
+        Returns:
+            pd.DataFrame: User_ID, Month and a column per component, zero where a user had no interactions.
+        """
+        positions = self._component_positions(components)
+        labels = list(self.components[positions])
+        frames = []
+        for month in range(len(self.months))[self._month_slice(start_month, end_month)]:
+            matrix = self.monthly[month][:, positions]
+            rows = np.flatnonzero(matrix.getnnz(axis=1))
+            frame = pd.DataFrame(matrix[rows].toarray(), columns=labels)
+            frame.insert(0, 'User_ID', self.users[rows])
+            frame.insert(1, 'Month', self.months[month])
+            frames.append(frame)
+        if not frames:
+            return pd.DataFrame(columns=['User_ID', 'Month'] + labels)
+        pivoted = pd.concat(frames, ignore_index=True)
+        return pivoted.sort_values(['User_ID', 'Month'], ignore_index=True)
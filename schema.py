@@ -0,0 +1,134 @@
+import pandas as pd
+
+from pipeline import USER_COLUMN
+
+CATEGORICAL_COLUMNS = ['User_ID', 'Component', 'Action', 'Target']
+COUNT_COLUMNS = ['Interaction_Count']
+
+
+def memory_usage(*frames):
+    """Deep memory usage of the given DataFrames in bytes."""
+    return int(sum(frame.memory_usage(deep=True).sum() for frame in frames))
+
+
+def component_categories(component_codes, *columns):
+    """
+    Component categories: the COMPONENT_CODES list plus any unknown components seen in the logs.
+    Args:
+        component_codes (pd.DataFrame): COMPONENT_CODES table.
+        *columns (pd.Series): Component columns from the logs.
+    Returns:
+        list: Sorted categories, so code order matches the string sort order.
+    """
+    categories = set(component_codes['Component'].dropna())
+    for column in columns:
+        categories.update(column.dropna().unique())
+    return sorted(categories)
+
+
+def to_category(column, categories):
+    """Encode a column as a categorical over a fixed category list."""
+    return pd.Categorical(column, categories=categories)
+
+
+def apply_schema(activity_df, user_df, component_df):
+    """
+    Convert identifier and text columns of the logs to shared categoricals.
+
+    User_ID uses the same categories in both logs so merges and groupbys
+    run on integer codes. Component is encoded against COMPONENT_CODES.
+    Works on raw exports (User Full Name *Anonymized) and cleaned frames.
+    Args:
+        activity_df (pd.DataFrame): Activity log.
+        user_df (pd.DataFrame): User log.
+        component_df (pd.DataFrame): COMPONENT_CODES table.
+    Returns:
+        tuple: (activity_df, user_df, report) where report has 'before',
+            'after' and 'saved' byte counts.
+    """
+    before = memory_usage(activity_df, user_df)
+    user_column = USER_COLUMN if USER_COLUMN in activity_df else 'User_ID'
+
+    activity_df = activity_df.copy()
+    user_df = user_df.copy()
+
+    # Shared User_ID categories across both logs
+    users = pd.concat([activity_df[user_column], user_df[user_column]]).dropna().unique()
+    user_categories = sorted(users)
+    activity_df[user_column] = to_category(activity_df[user_column], user_categories)
+    user_df[user_column] = to_category(user_df[user_column], user_categories)
+
+    # Component codes follow COMPONENT_CODES.csv
+    activity_df['Component'] = to_category(
+        activity_df['Component'], component_categories(component_df, activity_df['Component']))
+
+    for column in ['Action', 'Target']:
+        if column in activity_df:
+            activity_df[column] = activity_df[column].astype('category')
+
+    after = memory_usage(activity_df, user_df)
+    return activity_df, user_df, {'before': before, 'after': after, 'saved': before - after}
+
+
+def align_categories(base, *others, columns=CATEGORICAL_COLUMNS):
+    """
+    Encode frames over the categories of base so they can be concatenated as categoricals.
+
+    Values of others that base has not seen are appended to its categories,
+    which only changes the dtype of base, not its codes.
+    Args:
+        base (pd.DataFrame): Frame whose categorical columns set the categories.
+        *others (pd.DataFrame): Frames to encode alongside base.
+        columns (list): Columns to align; non-categorical columns of base are skipped.
+    Returns:
+        tuple: (base, *others) with shared categories.
+    """
+    base = base.copy()
+    others = list(others)
+    for column in columns:
+        if column not in base or not isinstance(base[column].dtype, pd.CategoricalDtype):
+            continue
+        known = set(base[column].cat.categories)
+        seen = set()
+        for other in others:
+            if column in other:
+                seen.update(other[column].dropna().unique())
+        new = sorted(seen - known)
+        if new:
+            base[column] = base[column].cat.add_categories(new)
+        categories = base[column].cat.categories
+        others = [
+            other.assign(**{column: to_category(other[column], categories)}) if column in other else other
+            for other in others
+        ]
+    return (base, *others)
+
+
+def downcast_counts(frame, columns=COUNT_COLUMNS):
+    """
+    Downcast count columns to the smallest integer type that holds them.
+    Args:
+        frame (pd.DataFrame): Frame with count columns.
+        columns (list): Count columns to downcast.
+    Returns:
+        pd.DataFrame: Frame with downcast columns.
+    """
+    frame = frame.copy()
+    for column in columns:
+        if column in frame:
+            frame[column] = pd.to_numeric(frame[column], downcast='unsigned')
+    return frame
+
+
+def format_bytes(size):
+    """Format a byte count as KB, MB or GB."""
+    for unit in ['KB', 'MB', 'GB']:
+        size /= 1024
+        if abs(size) < 1024 or unit == 'GB':
+            return f"{size:.1f} {unit}"
+
+
+def format_memory_report(report):
+    """Human readable summary of an apply_schema report."""
+    return (f"Memory: {format_bytes(report['before'])} -> {format_bytes(report['after'])} "
+            f"(saved {format_bytes(report['saved'])})")
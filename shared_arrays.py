@@ -0,0 +1,218 @@
+import json
+import os
+import shutil
+import tempfile
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from analysis import InteractionMatrix, codes_and_labels
+
+DEFAULT_MAX_ARRAY_SETS = 8
+LABELS_FILE = 'labels.json'
+# Array name -> dtype; counts keep the downcast dtype of Interaction_Count
+ARRAY_DTYPES = {
+    'user_codes': np.int32,
+    'component_codes': np.int32,
+    'month_ordinals': np.int32,
+    'counts': None,
+}
+
+
+def month_ordinal(month):
+    """Ordinal of a 'YYYY-MM' month, as stored in month_ordinals."""
+    return pd.Period(month, freq='M').ordinal
+
+
+class InteractionArrays:
+    """
+    The interaction count table as flat NumPy arrays in a per-dataset directory.
+
+    One .npy file each for user codes, component codes, month ordinals and
+    counts, plus the user and component labels as JSON. attach() maps the
+    files read-only, so every process that attaches shares the same
+    page-cache pages instead of unpickling its own copy of the table, and
+    resident memory stays flat as workers are added. Statistics and
+    correlation reads work on the codes directly.
+    """
+
+    def __init__(self, path, arrays, users, components):
+        self.path = path
+        self.user_codes = arrays['user_codes']
+        self.component_codes = arrays['component_codes']
+        self.month_ordinals = arrays['month_ordinals']
+        self.counts = arrays['counts']
+        self.users = users
+        self.components = components
+
+    def __len__(self):
+        return len(self.counts)
+
+    @staticmethod
+    def write(path, interaction_counts):
+        """
+        Encode an interaction count table into path, replacing what was there.
+
+        Rows without a component or month are left out, as every groupby
+        drops them; rows without a user keep user code -1.
+        Args:
+            path (str): Dataset directory.
+            interaction_counts (pd.DataFrame): User_ID/Component/Month/Interaction_Count table.
+        Returns:
+            str: path
+        """
+        user_codes, users = codes_and_labels(interaction_counts['User_ID'])
+        component_codes, components = codes_and_labels(interaction_counts['Component'])
+        months = interaction_counts['Month']
+        valid = (component_codes >= 0) & months.notna().to_numpy()
+        arrays = {
+            'user_codes': user_codes[valid],
+            'component_codes': component_codes[valid],
+            'month_ordinals': months[valid].array.asi8,
+            'counts': interaction_counts['Interaction_Count'].to_numpy()[valid],
+        }
+
+        # Write into a temporary directory and rename so attaching processes never see a partial set
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        staging = tempfile.mkdtemp(dir=parent, prefix='.tmp-')
+        try:
+            for name, dtype in ARRAY_DTYPES.items():
+                values = arrays[name] if dtype is None else arrays[name].astype(dtype)
+                np.save(os.path.join(staging, f'{name}.npy'), values)
+            with open(os.path.join(staging, LABELS_FILE), 'w') as handle:
+                json.dump({'users': [str(user) for user in users],
+                           'components': [str(component) for component in components]}, handle)
+            shutil.rmtree(path, ignore_errors=True)
+            os.replace(staging, path)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return path
+
+    @classmethod
+    def attach(cls, path):
+        """
+        Map a dataset directory written by write, without reading the arrays into memory.
+        Args:
+            path (str): Dataset directory.
+        Returns:
+            InteractionArrays: Read-only arrays.
+        """
+        arrays = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r') for name in ARRAY_DTYPES}
+        with open(os.path.join(path, LABELS_FILE)) as handle:
+            labels = json.load(handle)
+        return cls(path, arrays, pd.Index(labels['users'], dtype=object),
+                   pd.Index(labels['components'], dtype=object))
+
+    def _mask(self, components, start_month=None, end_month=None):
+        selected = np.zeros(len(self.components), dtype=bool)
+        positions = self.components.get_indexer(pd.Index(list(components), dtype=object))
+        selected[positions[positions >= 0]] = True
+        mask = selected[self.component_codes]
+        if start_month:
+            mask &= self.month_ordinals >= month_ordinal(start_month)
+        if end_month:
+            mask &= self.month_ordinals <= month_ordinal(end_month)
+        return mask
+
+    def component_month_totals(self, components, start_month=None, end_month=None):
+        """
+        Total interactions per (Component, Month), as analysis.component_month_totals.
+        Args:
+            components (list): Components to keep.
+            start_month (str): First 'YYYY-MM' month, or None.
+            end_month (str): Last 'YYYY-MM' month, or None.
+        Returns:
+            pd.DataFrame: Component, Month and Interactions columns.
+        """
+        mask = self._mask(components, start_month, end_month)
+        component_codes = self.component_codes[mask]
+        month_ordinals = self.month_ordinals[mask]
+        if len(month_ordinals) == 0:
+            return pd.DataFrame({'Component': pd.Series(dtype=object),
+                                 'Month': pd.PeriodIndex([], freq='M'),
+                                 'Interactions': pd.Series(dtype='int64')})
+        first = month_ordinals.min()
+        months = int(month_ordinals.max() - first) + 1
+        totals = sparse.coo_matrix(
+            (self.counts[mask].astype(np.int64), (component_codes, month_ordinals - first)),
+            shape=(len(self.components), months)).toarray()
+        component_index, month_index = np.nonzero(totals)
+        return pd.DataFrame({
+            'Component': self.components[component_index],
+            'Month': pd.PeriodIndex.from_ordinals(month_index + first, freq='M'),
+            'Interactions': totals[component_index, month_index],
+        })
+
+    def interaction_matrix(self, components, start_month=None, end_month=None):
+        """
+        Users x components matrix for the correlation and chi-square, as InteractionMatrix.from_counts.
+        Args:
+            components (list): Components to keep.
+            start_month (str): First 'YYYY-MM' month, or None.
+            end_month (str): Last 'YYYY-MM' month, or None.
+        Returns:
+            InteractionMatrix: Users and components with at least one interaction.
+        """
+        mask = self._mask(components, start_month, end_month) & (self.user_codes >= 0)
+        matrix = sparse.coo_matrix(
+            (self.counts[mask].astype(np.float64), (self.user_codes[mask], self.component_codes[mask])),
+            shape=(len(self.users), len(self.components))).tocsr()
+        rows = np.flatnonzero(matrix.getnnz(axis=1))
+        columns = np.flatnonzero(matrix.getnnz(axis=0))
+        return InteractionMatrix(matrix[rows][:, columns], self.users[rows],
+                                 self.components[columns].rename('Component'))
+
+
+@lru_cache(maxsize=DEFAULT_MAX_ARRAY_SETS)
+def attached(path):
+    """InteractionArrays for path, attached once per process."""
+    return InteractionArrays.attach(path)
+
+
+class ArrayStore:
+    """
+    Directory of InteractionArrays sets, one sub-directory per data fingerprint.
+
+    Sets are written once and reused by every process that attaches to
+    them. Only the max_entries most recently published sets are kept;
+    removing a set does not disturb processes that still have it mapped.
+    """
+
+    def __init__(self, root, max_entries=DEFAULT_MAX_ARRAY_SETS):
+        self.root = root
+        self.max_entries = max_entries
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.root, key)
+
+    def publish(self, key, interaction_counts):
+        """
+        Write the arrays for key unless they already exist.
+        Args:
+            key (str): Data fingerprint.
+            interaction_counts (pd.DataFrame): Interaction count table.
+        Returns:
+            str: Directory to attach to.
+        """
+        path = self.path(key)
+        if os.path.isdir(path):
+            os.utime(path)
+            return path
+        InteractionArrays.write(path, interaction_counts)
+        self.evict()
+        return path
+
+    def evict(self):
+        """Remove the least recently published sets beyond max_entries."""
+        entries = sorted(
+            (os.path.getmtime(self.path(key)), self.path(key))
+            for key in os.listdir(self.root)
+            if not key.startswith('.') and os.path.isdir(self.path(key))
+        )
+        for _, path in entries[:max(0, len(entries) - self.max_entries)]:
+            shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,165 @@
+import os
+import sqlite3
+import tempfile
+import weakref
+from datetime import datetime
+from functools import lru_cache
+
+import pandas as pd
+
+from pipeline import COUNT_KEYS, DATE_FORMAT, DEFAULT_CHUNKSIZE, EXCLUDED_COMPONENTS, USER_COLUMN
+from schema import component_categories, downcast_counts, to_category
+
+RAW_TABLES = {'activity': 'raw_activity', 'user': 'raw_user'}
+
+
+def quote(name):
+    """Quote an SQL identifier such as 'User Full Name *Anonymized'."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+@lru_cache(maxsize=4096)
+def parse_day(value):
+    """
+    ISO day of a USER_LOG Date string, as parse_timestamps reads it.
+    Args:
+        value (str): Date such as '21/11/2023 00:00'.
+    Returns:
+        str: 'YYYY-MM-DD', or None when missing or unparseable.
+    """
+    if not value or not value.split():
+        return None
+    try:
+        return datetime.strptime(value.split()[0], DATE_FORMAT).strftime('%Y-%m-%d')
+    except ValueError:
+        return None
+
+
+def close_database(connection, remove_path=None):
+    connection.close()
+    if remove_path is not None and os.path.exists(remove_path):
+        os.remove(remove_path)
+
+
+class SQLiteBackend:
+    """
+    Out-of-core clean/filter/dedup/merge/groupby over the CSV logs in a file-backed SQLite database.
+
+    The logs are imported chunk by chunk and never held in memory whole.
+    Cleaning, deduplication (first row per key, as drop_duplicates) and
+    the per-user aggregation run as SQL with indexes on the join and
+    filter columns. Only the interaction count table, which is small next
+    to the logs, and per-query results are read back into pandas.
+    """
+
+    def __init__(self, path=None, chunksize=DEFAULT_CHUNKSIZE):
+        self.chunksize = chunksize
+        temporary = path is None
+        if temporary:
+            handle, path = tempfile.mkstemp(prefix='analysis-', suffix='.sqlite3')
+            os.close(handle)
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.create_function('parse_day', 1, parse_day, deterministic=True)
+        # A temporary database is removed once the backend is closed or collected
+        self._finalizer = weakref.finalize(self, close_database, self.connection, path if temporary else None)
+
+    def close(self):
+        self._finalizer()
+
+    def import_csv(self, key, csv_path):
+        """
+        Load a raw CSV log into its raw table, replacing earlier contents.
+        Args:
+            key (str): 'activity' or 'user'.
+            csv_path (str): CSV file path or buffer.
+        Returns:
+            int: Rows imported.
+        """
+        table = RAW_TABLES[key]
+        rows = 0
+        with self.connection:
+            self.connection.execute(f'DROP TABLE IF EXISTS {table}')
+            # Text columns keep the raw values; cleaning happens in SQL
+            for chunk in pd.read_csv(csv_path, chunksize=self.chunksize, dtype=str):
+                chunk.to_sql(table, self.connection, if_exists='append', index=False)
+                rows += len(chunk)
+            if rows == 0:
+                pd.read_csv(csv_path, nrows=0, dtype=str).to_sql(table, self.connection, index=False)
+        return rows
+
+    def preview(self, key, rows=5):
+        """First rows of a raw table."""
+        return pd.read_sql_query(f'SELECT * FROM {RAW_TABLES[key]} LIMIT ?', self.connection, params=(rows,))
+
+    def clean_and_merge(self):
+        """
+        Build the cleaned logs and the interaction count table in SQL.
+
+        Mirrors clean_activity_log, clean_user_log and aggregate_interactions:
+        System/Folder rows are removed, the first row per dedup key is kept,
+        and counts are logins(User_ID, Month) x activities(User_ID, Component).
+        Returns:
+            dict: Row counts of the cleaned 'activity' and 'user' logs and of 'interactions'.
+        """
+        user = quote(USER_COLUMN)
+        excluded = ', '.join(f"'{component}'" for component in EXCLUDED_COMPONENTS)
+        statements = [
+            'DROP TABLE IF EXISTS activity_log',
+            'DROP TABLE IF EXISTS user_log',
+            'DROP TABLE IF EXISTS interaction_counts',
+            f'''CREATE TABLE activity_log AS
+                SELECT {user} AS User_ID, Component, Action, Target FROM raw_activity
+                WHERE rowid IN (
+                    SELECT MIN(rowid) FROM raw_activity
+                    WHERE Component IS NULL OR Component NOT IN ({excluded})
+                    GROUP BY {user}, Component, Action, Target
+                )
+                ORDER BY rowid''',
+            f'''CREATE TABLE user_log AS
+                SELECT Day AS Date, Time, User_ID, substr(Day, 1, 7) AS Month FROM (
+                    SELECT rowid AS row, parse_day(Date) AS Day, Time, {user} AS User_ID FROM raw_user
+                )
+                WHERE row IN (
+                    SELECT MIN(rowid) FROM raw_user GROUP BY parse_day(Date), Time, {user}
+                )
+                ORDER BY row''',
+            'CREATE INDEX activity_log_user ON activity_log (User_ID, Component)',
+            'CREATE INDEX user_log_user ON user_log (User_ID, Month)',
+            '''CREATE TABLE interaction_counts AS
+                WITH logins AS (
+                    SELECT User_ID, Month, COUNT(*) AS Logins FROM user_log
+                    WHERE User_ID IS NOT NULL AND Month IS NOT NULL GROUP BY User_ID, Month
+                ), activities AS (
+                    SELECT User_ID, Component, COUNT(*) AS Activities FROM activity_log
+                    WHERE User_ID IS NOT NULL AND Component IS NOT NULL GROUP BY User_ID, Component
+                )
+                SELECT logins.User_ID, Component, Month, Logins * Activities AS Interaction_Count
+                FROM logins JOIN activities ON logins.User_ID = activities.User_ID
+                ORDER BY logins.User_ID, Component, Month''',
+            'CREATE INDEX interaction_counts_component ON interaction_counts (Component, Month)',
+            'CREATE INDEX interaction_counts_user ON interaction_counts (User_ID)',
+        ]
+        with self.connection:
+            for statement in statements:
+                self.connection.execute(statement)
+        return {key: self.count(table) for key, table in
+                [('activity', 'activity_log'), ('user', 'user_log'), ('interactions', 'interaction_counts')]}
+
+    def count(self, table):
+        return self.connection.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+
+    def interaction_counts(self, component_codes):
+        """
+        The interaction count table in the pandas pipeline's layout.
+        Args:
+            component_codes (pd.DataFrame): COMPONENT_CODES table, for the Component categories.
+        Returns:
+            pd.DataFrame: User_ID/Component/Month/Interaction_Count, as aggregate_interactions.
+        """
+        counts = pd.read_sql_query('SELECT * FROM interaction_counts', self.connection)
+        counts['User_ID'] = to_category(counts['User_ID'], sorted(counts['User_ID'].dropna().unique()))
+        counts['Component'] = to_category(
+            counts['Component'], component_categories(component_codes, counts['Component']))
+        counts['Month'] = pd.PeriodIndex(counts['Month'], freq='M')
+        return downcast_counts(counts[COUNT_KEYS + ['Interaction_Count']])
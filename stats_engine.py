@@ -0,0 +1,164 @@
+import os
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+
+from analysis import monthly_statistics, semester_statistics, statistics_from_totals
+from shared_arrays import attached
+
+EXECUTORS = ['serial', 'thread', 'process']
+# Below this many interaction rows the pool overhead outweighs the split
+DEFAULT_MIN_PARALLEL_ROWS = 1_000_000
+
+
+def shutdown_pools(pools):
+    for pool in pools.values():
+        pool.shutdown(wait=False, cancel_futures=True)
+    pools.clear()
+
+
+def component_statistics(source, component, start_month=None, end_month=None):
+    """
+    Monthly totals and semester statistics of one component.
+    Args:
+        source: Object with component_month_totals, e.g. a RollupCube or ProcessedStore.
+        component (str): Component to aggregate.
+        start_month (str): First 'YYYY-MM' month, or None.
+        end_month (str): Last 'YYYY-MM' month, or None.
+    Returns:
+        tuple: (totals, semester_stats_df) for the component.
+    """
+    totals = source.component_month_totals([component], start_month, end_month)
+    return totals, semester_statistics(totals, [component])
+
+
+def attached_component_statistics(path, component, start_month=None, end_month=None):
+    """component_statistics on the InteractionArrays at path, for process workers."""
+    return component_statistics(attached(path), component, start_month, end_month)
+
+
+class WorkerPools:
+    """
+    Thread and process pools shared by every StatisticsEngine in the process.
+
+    Each session builds its own engine, but the pools behind the engines are
+    created once per kind and worker count, on first use, so concurrent
+    sessions queue on the same workers instead of starting a pool each.
+    They are shut down on close, at the latest on exit.
+    """
+
+    def __init__(self):
+        self._pools = {}
+        self._lock = threading.Lock()
+        self._finalizer = weakref.finalize(self, shutdown_pools, self._pools)
+
+    def __len__(self):
+        return len(self._pools)
+
+    def get(self, kind, max_workers=None):
+        """
+        Pool of the given kind, created on first use.
+        Args:
+            kind (str): 'thread' or 'process'.
+            max_workers (int): Worker count, or None for the executor default.
+        Returns:
+            Executor: The shared pool.
+        """
+        with self._lock:
+            pool = self._pools.get((kind, max_workers))
+            if pool is None:
+                if kind == 'process':
+                    pool = ProcessPoolExecutor(max_workers=max_workers)
+                else:
+                    pool = ThreadPoolExecutor(max_workers=max_workers or os.cpu_count(), thread_name_prefix='stats')
+                self._pools[(kind, max_workers)] = pool
+            return pool
+
+    def close(self):
+        with self._lock:
+            shutdown_pools(self._pools)
+
+
+statistics_pools = WorkerPools()
+
+
+class StatisticsEngine:
+    """
+    Semester and monthly statistics, partitioned by component over a thread or process pool.
+
+    Every component's semester statistics depend only on its own monthly
+    totals, so each component is aggregated as one task. Tasks are mapped
+    in selection order and merged in that order, and the monthly table is
+    built from the merged totals, so the output matches the serial path
+    exactly. Small inputs and single components run serially. Process
+    workers memory-map the shared InteractionArrays instead of receiving
+    a pickled copy of the data; without them the thread pool is used.
+    """
+
+    def __init__(self, executor='serial', max_workers=None, min_parallel_rows=DEFAULT_MIN_PARALLEL_ROWS,
+                 pools=statistics_pools):
+        if executor not in EXECUTORS:
+            raise ValueError(f"Unknown statistics executor: {executor}")
+        self.executor = executor
+        self.max_workers = max_workers
+        self.min_parallel_rows = min_parallel_rows
+        # The pools are shared with every other engine, so one engine never shuts them down
+        self.pools = pools
+
+    def mode(self, components, rows=None, arrays_path=None):
+        """
+        Executor a request runs on: 'serial', 'thread' or 'process'.
+        Args:
+            components (list): Selected components.
+            rows (int): Interaction rows behind the source, if known.
+            arrays_path (str): Shared InteractionArrays directory, if published.
+        Returns:
+            str: The executor to use.
+        """
+        if not self._parallel(components, rows):
+            return 'serial'
+        if self.executor == 'process' and arrays_path is None:
+            return 'thread'
+        return self.executor
+
+    def needs_arrays(self, components, rows=None):
+        """Whether a request would run on process workers, which read the shared InteractionArrays."""
+        return self.executor == 'process' and self._parallel(components, rows)
+
+    def _parallel(self, components, rows):
+        if self.executor == 'serial' or len(components) < 2:
+            return False
+        return rows is None or rows >= self.min_parallel_rows
+
+    def compute(self, source, components, start_month=None, end_month=None, rows=None, arrays_path=None):
+        """
+        Semester and monthly statistics for the selected components.
+        Args:
+            source: Object with component_month_totals, used by the serial path and threads.
+            components (list): Components in output order, without duplicates.
+            start_month (str): First 'YYYY-MM' month, or None.
+            end_month (str): Last 'YYYY-MM' month, or None.
+            rows (int): Interaction rows behind the source, for the serial fallback.
+            arrays_path (str): InteractionArrays directory of the same data, for process workers.
+        Returns:
+            tuple: (semester_stats_df, monthly_stats_df), as statistics_from_totals.
+        """
+        mode = self.mode(components, rows, arrays_path)
+        if mode == 'serial':
+            totals = source.component_month_totals(components, start_month, end_month)
+            return statistics_from_totals(totals, components)
+
+        if mode == 'process':
+            function, target = attached_component_statistics, arrays_path
+        else:
+            function, target = component_statistics, source
+        count = len(components)
+        # map returns results in submission order, whichever worker finishes first
+        results = list(self.pools.get(mode, self.max_workers).map(
+            function, [target] * count, components, [start_month] * count, [end_month] * count))
+
+        totals = pd.concat([totals for totals, _ in results], ignore_index=True)
+        semester_stats_df = pd.concat([semester for _, semester in results], ignore_index=True)
+        return semester_stats_df, monthly_statistics(totals, components)
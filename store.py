@@ -0,0 +1,248 @@
+import sqlite3
+
+import pandas as pd
+
+from pipeline import COUNT_KEYS
+from schema import downcast_counts, to_category
+
+DEFAULT_STORE_PATH = 'processed.sqlite3'
+DEFAULT_BATCH_SIZE = 10_000
+METADATA_TABLE = 'STORE_METADATA'
+
+# Table name -> [(column, SQL type)]
+STORE_SCHEMAS = {
+    'activity_log': [
+        ('User_ID', 'TEXT'),
+        ('Component', 'TEXT'),
+        ('Action', 'TEXT'),
+        ('Target', 'TEXT'),
+    ],
+    'user_log': [
+        ('User_ID', 'TEXT'),
+        ('Date', 'TEXT'),
+        ('Time', 'TEXT'),
+        ('Timestamp', 'TEXT'),
+    ],
+    'interaction_counts': [
+        ('User_ID', 'TEXT'),
+        ('Component', 'TEXT'),
+        ('Month', 'TEXT'),
+        ('Interaction_Count', 'INTEGER'),
+    ],
+}
+# Index name -> (table, columns)
+STORE_INDEXES = {
+    'activity_log_user': ('activity_log', ['User_ID']),
+    'user_log_user': ('user_log', ['User_ID']),
+    'user_log_date': ('user_log', ['Date']),
+    'interaction_counts_user': ('interaction_counts', ['User_ID']),
+    'interaction_counts_component_month': ('interaction_counts', ['Component', 'Month']),
+}
+
+
+def store_rows(frame, table_name):
+    """
+    Convert a processed frame to the text and integer columns of a store table.
+
+    Dates become 'YYYY-MM-DD', timestamps 'YYYY-MM-DD HH:MM:SS' and months
+    'YYYY-MM', so range filters in SQL compare them as strings.
+    Args:
+        frame (pd.DataFrame): Cleaned log or interaction counts.
+        table_name (str): Key of STORE_SCHEMAS.
+    Returns:
+        pd.DataFrame: Columns in schema order, with None for missing values.
+    """
+    rows = {}
+    for name, sql_type in STORE_SCHEMAS[table_name]:
+        column = frame[name]
+        if name == 'Date':
+            column = column.dt.strftime('%Y-%m-%d')
+        elif name == 'Timestamp':
+            column = column.dt.strftime('%Y-%m-%d %H:%M:%S')
+        elif name == 'Month':
+            column = column.dt.strftime('%Y-%m')
+        elif sql_type == 'INTEGER':
+            column = column.astype('int64')
+        else:
+            # Logs read by the Arrow reader hold Time as time32 values
+            column = column.astype(str).where(column.notna())
+        rows[name] = column.astype(object)
+    rows = pd.DataFrame(rows)
+    return rows.where(rows.notna(), None)
+
+
+def month_filter(start_month=None, end_month=None, column='Month'):
+    """
+    SQL condition and parameters for an inclusive 'YYYY-MM' month range.
+    Args:
+        start_month (str): First month, or None for no lower bound.
+        end_month (str): Last month, or None for no upper bound.
+        column (str): Column holding 'YYYY-MM' text.
+    Returns:
+        tuple: (list of conditions, list of parameters)
+    """
+    conditions, params = [], []
+    if start_month:
+        conditions.append(f'{column} >= ?')
+        params.append(str(pd.Period(start_month, freq='M')))
+    if end_month:
+        conditions.append(f'{column} <= ?')
+        params.append(str(pd.Period(end_month, freq='M')))
+    return conditions, params
+
+
+class ProcessedStore:
+    """
+    Indexed SQLite store for the cleaned logs and the interaction count table.
+
+    Writes replace the stored data in one transaction with executemany
+    batches; indexes on (User_ID), (Component, Month) and (Date) are built
+    after the bulk insert. The statistics and heatmap reads filter on
+    components and months in SQL and return only what they need.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        # Autocommit mode: save opens its own transaction, which also covers the DROP and CREATE statements
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+
+    def close(self):
+        self.connection.close()
+
+    def save(self, interaction_counts, activity_log=None, user_log=None, fingerprint=None,
+             batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Replace the stored data with the given frames, in one transaction.
+
+        If anything fails the transaction is rolled back and the previously
+        stored data is kept.
+        Args:
+            interaction_counts (pd.DataFrame): Interaction count table.
+            activity_log (pd.DataFrame): Cleaned activity log, if available.
+            user_log (pd.DataFrame): Cleaned user log, if available.
+            fingerprint (str): Data fingerprint, kept so memoized results stay valid after a reload.
+            batch_size (int): Rows per executemany call.
+        Returns:
+            dict: Rows written per table.
+        """
+        frames = {'activity_log': activity_log, 'user_log': user_log, 'interaction_counts': interaction_counts}
+        written = {}
+        cursor = self.connection.cursor()
+        cursor.execute('BEGIN')
+        try:
+            for table_name, columns in STORE_SCHEMAS.items():
+                cursor.execute(f'DROP TABLE IF EXISTS {table_name}')
+                definition = ', '.join(f'{name} {sql_type}' for name, sql_type in columns)
+                cursor.execute(f'CREATE TABLE {table_name} ({definition})')
+                frame = frames[table_name]
+                written[table_name] = 0 if frame is None else self._insert(cursor, frame, table_name, batch_size)
+            for index_name, (table_name, columns) in STORE_INDEXES.items():
+                cursor.execute(f"CREATE INDEX {index_name} ON {table_name} ({', '.join(columns)})")
+            cursor.execute(f'CREATE TABLE IF NOT EXISTS {METADATA_TABLE} (key TEXT PRIMARY KEY, value TEXT)')
+            cursor.execute(f'REPLACE INTO {METADATA_TABLE} VALUES (?, ?)', ('fingerprint', fingerprint))
+        except BaseException:
+            cursor.execute('ROLLBACK')
+            raise
+        cursor.execute('COMMIT')
+        return written
+
+    def _insert(self, cursor, frame, table_name, batch_size):
+        rows = store_rows(frame, table_name)
+        markers = ', '.join('?' * len(rows.columns))
+        sql = f"INSERT INTO {table_name} ({', '.join(rows.columns)}) VALUES ({markers})"
+        for start in range(0, len(rows), batch_size):
+            batch = rows.iloc[start:start + batch_size]
+            cursor.executemany(sql, batch.itertuples(index=False, name=None))
+        return len(rows)
+
+    def fingerprint(self):
+        """Fingerprint saved with the data, or None."""
+        row = self.connection.execute(
+            f'SELECT value FROM {METADATA_TABLE} WHERE key = ?', ('fingerprint',)).fetchone()
+        return row[0] if row else None
+
+    def preview(self, rows=5):
+        """First rows of the interaction count table."""
+        return pd.read_sql_query('SELECT * FROM interaction_counts LIMIT ?', self.connection, params=(rows,))
+
+    def count(self, table_name):
+        return self.connection.execute(f'SELECT COUNT(*) FROM {table_name}').fetchone()[0]
+
+    def _query(self, select, components=None, start_month=None, end_month=None, group_by=None):
+        conditions, params = month_filter(start_month, end_month)
+        if components is not None:
+            conditions.append(f"Component IN ({', '.join('?' * len(components))})")
+            params.extend(components)
+        sql = f'{select} FROM interaction_counts'
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        if group_by:
+            sql += f' GROUP BY {group_by} ORDER BY {group_by}'
+        return pd.read_sql_query(sql, self.connection, params=params)
+
+    def interaction_counts(self, components=None, start_month=None, end_month=None):
+        """
+        Interaction count rows, filtered in SQL.
+        Args:
+            components (list): Components to keep, or None for all.
+            start_month (str): First 'YYYY-MM' month, or None.
+            end_month (str): Last 'YYYY-MM' month, or None.
+        Returns:
+            pd.DataFrame: User_ID/Component/Month/Interaction_Count, as aggregate_interactions.
+        """
+        counts = self._query('SELECT *', components, start_month, end_month)
+        counts = counts.sort_values(COUNT_KEYS, ignore_index=True)
+        for column in ['User_ID', 'Component']:
+            counts[column] = to_category(counts[column], sorted(counts[column].dropna().unique()))
+        counts['Month'] = pd.PeriodIndex(counts['Month'], freq='M')
+        return downcast_counts(counts)
+
+    def component_month_totals(self, components, start_month=None, end_month=None):
+        """
+        Total interactions per (Component, Month), as analysis.component_month_totals.
+        Args:
+            components (list): Components to keep.
+            start_month (str): First 'YYYY-MM' month, or None.
+            end_month (str): Last 'YYYY-MM' month, or None.
+        Returns:
+            pd.DataFrame: Component, Month and Interactions columns.
+        """
+        totals = self._query('SELECT Component, Month, SUM(Interaction_Count) AS Interactions',
+                             components, start_month, end_month, group_by='Component, Month')
+        totals['Month'] = pd.PeriodIndex(totals['Month'], freq='M')
+        return totals
+
+    def user_component_counts(self, components, start_month=None, end_month=None):
+        """
+        Interactions per (User_ID, Component) summed over the months, for InteractionMatrix.from_counts.
+        Args:
+            components (list): Components to keep.
+            start_month (str): First 'YYYY-MM' month, or None.
+            end_month (str): Last 'YYYY-MM' month, or None.
+        Returns:
+            pd.DataFrame: User_ID, Component and Interaction_Count columns.
+        """
+        return self._query('SELECT User_ID, Component, SUM(Interaction_Count) AS Interaction_Count',
+                           components, start_month, end_month, group_by='User_ID, Component')
+
+    def user_log(self, start_date=None, end_date=None):
+        """
+        Cleaned user log rows in a date range, using the (Date) index.
+        Args:
+            start_date (str): First 'YYYY-MM-DD' day, or None.
+            end_date (str): Last 'YYYY-MM-DD' day, or None.
+        Returns:
+            pd.DataFrame: User_ID, Date, Time and Timestamp columns.
+        """
+        conditions, params = [], []
+        if start_date:
+            conditions.append('Date >= ?')
+            params.append(str(pd.Timestamp(start_date).date()))
+        if end_date:
+            conditions.append('Date <= ?')
+            params.append(str(pd.Timestamp(end_date).date()))
+        sql = 'SELECT * FROM user_log' + (' WHERE ' + ' AND '.join(conditions) if conditions else '')
+        user_log = pd.read_sql_query(sql, self.connection, params=params)
+        user_log['Date'] = pd.to_datetime(user_log['Date'])
+        user_log['Timestamp'] = pd.to_datetime(user_log['Timestamp'])
+        return user_log
@@ -0,0 +1,109 @@
+import argparse
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from pipeline import DATE_FORMAT, USER_COLUMN
+
+COMPONENT_CODES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'inputs', 'COMPONENT_CODES.csv')
+ACTIONS = ['viewed', 'submitted', 'uploaded', 'started', 'graded', 'created', 'updated']
+TARGETS_PER_COMPONENT = 20
+DEFAULT_START_DATE = '2023-09-04'
+
+
+def user_names(users):
+    """Anonymized user names in the export style."""
+    return [f"User {index:06d}" for index in range(users)]
+
+
+def generate_logs(users=100, days=90, events_per_user=50, seed=0, start_date=DEFAULT_START_DATE,
+                  components=None):
+    """
+    Synthetic ACTIVITY_LOG and USER_LOG frames in the raw export layout.
+
+    Each user gets events_per_user activity rows and as many logins spread
+    over days. Component popularity follows a skewed distribution and
+    about 5% of rows are exact duplicates, as in real exports.
+    Args:
+        users (int): Number of users.
+        days (int): Number of days covered by the user log.
+        events_per_user (int): Activity rows and logins per user.
+        seed (int): Random seed.
+        start_date (str): First day of the semester.
+        components (list): Component names; defaults to COMPONENT_CODES.csv.
+    Returns:
+        tuple: (activity_df, user_df)
+    """
+    rng = np.random.default_rng(seed)
+    if components is None:
+        components = pd.read_csv(COMPONENT_CODES_PATH)['Component'].tolist()
+    names = np.array(user_names(users), dtype=object)
+    rows = users * events_per_user
+
+    # Activity log: skewed component popularity, a few targets per component
+    weights = 1.0 / np.arange(1, len(components) + 1)
+    component_index = rng.choice(len(components), rows, p=weights / weights.sum())
+    activity_df = pd.DataFrame({
+        USER_COLUMN: np.repeat(names, events_per_user),
+        'Component': np.array(components, dtype=object)[component_index],
+        'Action': rng.choice(ACTIONS, rows),
+        'Target': [f"{components[c]}_{t}" for c, t in
+                   zip(component_index, rng.integers(0, TARGETS_PER_COMPONENT, rows))],
+    })
+
+    # User log: logins on random days and times, Date as 'dd/mm/YYYY HH:MM'
+    day_offsets = rng.integers(0, days, rows)
+    dates = pd.Timestamp(start_date) + pd.to_timedelta(day_offsets, unit='D')
+    seconds = rng.integers(0, 24 * 60 * 60, rows)
+    user_df = pd.DataFrame({
+        'Date': dates.strftime(DATE_FORMAT + ' 00:00'),
+        'Time': [f"{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}" for s in seconds],
+        USER_COLUMN: np.repeat(names, events_per_user),
+    })
+
+    return add_duplicates(activity_df, rng), add_duplicates(user_df, rng)
+
+
+def add_duplicates(frame, rng, fraction=0.05):
+    """Append a random sample of existing rows and shuffle, so deduplication has work to do."""
+    duplicates = frame.iloc[rng.integers(0, len(frame), int(len(frame) * fraction))]
+    combined = pd.concat([frame, duplicates], ignore_index=True)
+    return combined.iloc[rng.permutation(len(combined))].reset_index(drop=True)
+
+
+def write_logs(output_dir, **options):
+    """
+    Write ACTIVITY_LOG.csv, USER_LOG.csv and COMPONENT_CODES.csv to output_dir.
+    Args:
+        output_dir (str): Directory to write to.
+        **options: Keyword arguments for generate_logs.
+    Returns:
+        dict: 'activity', 'user' and 'component' file paths.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    activity_df, user_df = generate_logs(**options)
+    paths = {
+        'activity': os.path.join(output_dir, 'ACTIVITY_LOG.csv'),
+        'user': os.path.join(output_dir, 'USER_LOG.csv'),
+        'component': os.path.join(output_dir, 'COMPONENT_CODES.csv'),
+    }
+    activity_df.to_csv(paths['activity'], index=False)
+    user_df.to_csv(paths['user'], index=False)
+    shutil.copyfile(COMPONENT_CODES_PATH, paths['component'])
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Generate synthetic ACTIVITY_LOG and USER_LOG exports.')
+    parser.add_argument('output_dir', help='Directory for the generated CSV files')
+    parser.add_argument('--users', type=int, default=100, help='Number of users')
+    parser.add_argument('--days', type=int, default=90, help='Days covered by the user log')
+    parser.add_argument('--events-per-user', type=int, default=50, help='Activity rows and logins per user')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    args = parser.parse_args()
+
+    paths = write_logs(args.output_dir, users=args.users, days=args.days,
+                       events_per_user=args.events_per_user, seed=args.seed)
+    print(f"Wrote {paths['activity']}, {paths['user']} and {paths['component']}")
@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pipeline import aggregate_interactions, clean_activity_log, clean_user_log  # noqa: E402
+from synthetic import generate_logs  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def raw_logs():
+    """Small synthetic (activity_df, user_df) export spanning three months."""
+    return generate_logs(users=40, days=75, events_per_user=20, seed=1)
+
+
+@pytest.fixture(scope='session')
+def cleaned_logs(raw_logs):
+    activity_df, user_df = raw_logs
+    return clean_activity_log(activity_df.copy()), clean_user_log(user_df.copy())
+
+
+@pytest.fixture(scope='session')
+def interaction_counts(cleaned_logs):
+    activity_log, user_log = cleaned_logs
+    return aggregate_interactions(user_log, activity_log)
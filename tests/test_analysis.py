@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from analysis import InteractionMatrix, compute_statistics
+from pipeline import explode_merge
+
+COMPONENTS = ['Quiz', 'Lecture', 'Assignment', 'Attendence', 'Survey', 'Missing']
+
+
+def legacy_statistics(merged_data, target_components):
+    """The per-component loop generate_statistics ran on the exploded merge."""
+    filtered_data = merged_data[merged_data['Component'].isin(target_components)]
+    semester_stats = {}
+    for component in target_components:
+        comp_data = filtered_data[filtered_data['Component'] == component]
+        semester_interactions = comp_data.groupby('Month').size()
+        semester_stats[component] = {
+            'mean': semester_interactions.mean(),
+            'median': semester_interactions.median(),
+            'mode': semester_interactions.mode().values[0] if not semester_interactions.mode().empty else np.nan
+        }
+    semester_stats_df = pd.DataFrame(semester_stats).T.reset_index().rename(columns={'index': 'Component'})
+
+    monthly_stats = {}
+    for component in target_components:
+        comp_data = filtered_data[filtered_data['Component'] == component]
+        for month, month_data in comp_data.groupby('Month'):
+            monthly_interactions = month_data.groupby('Component').size()
+            monthly_stats.setdefault(month, {})[component] = {
+                'mean': monthly_interactions.mean(),
+                'median': monthly_interactions.median(),
+                'mode': monthly_interactions.mode().values[0],
+            }
+    flattened_stats = [{'Month': month, 'Component': component, **metrics}
+                       for month, components in monthly_stats.items() for component, metrics in components.items()]
+    return semester_stats_df, pd.DataFrame(flattened_stats)
+
+
+def test_compute_statistics_matches_legacy_loop(cleaned_logs, interaction_counts):
+    activity_log, user_log = cleaned_logs
+    expected_semester, expected_monthly = legacy_statistics(explode_merge(user_log, activity_log), COMPONENTS)
+    semester, monthly = compute_statistics(interaction_counts, COMPONENTS)
+
+    assert list(semester['Component']) == COMPONENTS
+    np.testing.assert_allclose(semester[['mean', 'median', 'mode']].to_numpy(dtype=float),
+                               expected_semester[['mean', 'median', 'mode']].to_numpy(dtype=float))
+    assert list(monthly['Month']) == list(expected_monthly['Month'])
+    assert list(monthly['Component']) == list(expected_monthly['Component'])
+    np.testing.assert_allclose(monthly[['mean', 'median', 'mode']].to_numpy(dtype=float),
+                               expected_monthly[['mean', 'median', 'mode']].to_numpy(dtype=float))
+
+
+def test_sparse_correlation_matches_pandas(interaction_counts):
+    components = ['Quiz', 'Lecture', 'Assignment', 'Book', 'Project']
+    matrix = InteractionMatrix.from_counts(interaction_counts, components)
+    filtered_data = interaction_counts[interaction_counts['Component'].isin(components)]
+    pivot = filtered_data.pivot_table(index='User_ID', columns='Component', values='Interaction_Count',
+                                      aggfunc='sum', fill_value=0)
+
+    correlation = matrix.correlation()
+    expected = pivot.corr()
+    pd.testing.assert_frame_equal(correlation.loc[expected.index, expected.columns], expected,
+                                  check_names=False, check_index_type=False, check_column_type=False)
+
+
+@pytest.mark.parametrize('components', [['Quiz', 'Lecture', 'Assignment', 'Book'], ['Quiz', 'Lecture']])
+def test_sparse_chi_square_matches_scipy(interaction_counts, components):
+    matrix = InteractionMatrix.from_counts(interaction_counts, components)
+    chi2, p_value, dof = matrix.chi_square()
+    expected_chi2, expected_p, expected_dof, _ = stats.chi2_contingency(matrix.matrix.toarray())
+    assert dof == expected_dof
+    assert chi2 == pytest.approx(expected_chi2)
+    assert p_value == pytest.approx(expected_p)
@@ -0,0 +1,177 @@
+import os
+import shutil
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from main import DataAnalysisApp
+from pipeline import COUNT_KEYS, USER_COLUMN
+from synthetic import write_logs
+
+
+@pytest.fixture(scope='module')
+def log_paths(tmp_path_factory):
+    return write_logs(str(tmp_path_factory.mktemp('logs')), users=30, days=60, events_per_user=15, seed=2)
+
+
+def load(app, paths):
+    app.load_csv_files(paths['activity'], paths['user'], paths['component'])
+    message, _ = app.clean_and_merge_data()
+    assert message == "Data cleaned and merged successfully!"
+
+
+def test_cache_eviction_leaves_spilled_fingerprints_alone(tmp_path, log_paths):
+    app = DataAnalysisApp(cache_dir=str(tmp_path), cache_max_bytes=1, shared_datasets=None)
+    spill_dir = app.dedup_options['spill_dir']
+    os.makedirs(spill_dir)
+    spilled = os.path.join(spill_dir, 'seen-test.npy')
+    open(spilled, 'wb').close()
+
+    # Over budget, the cache evicts its own entries on every put
+    load(app, log_paths)
+    assert os.path.exists(spilled)
+
+
+def process_app(tmp_path, **options):
+    app = DataAnalysisApp(cache_dir=str(tmp_path), shared_datasets=None, stats_executor='process', **options)
+    app.stats_engine.min_parallel_rows = 0
+    return app
+
+
+def test_cache_eviction_leaves_shared_arrays_alone(tmp_path, log_paths):
+    app = process_app(tmp_path, cache_max_bytes=1)
+    load(app, log_paths)
+    app.generate_statistics(['Quiz', 'Survey'])
+    arrays_path = app.arrays_path
+    assert not arrays_path.startswith(app.cache.cache_dir + os.sep)
+
+    # Over budget, the next load evicts every cached dataset
+    load(app, log_paths)
+    assert os.path.isdir(arrays_path)
+
+
+def test_shared_arrays_are_only_written_for_process_workers(tmp_path, log_paths):
+    app = DataAnalysisApp(cache_dir=str(tmp_path), shared_datasets=None)
+    load(app, log_paths)
+    app.generate_statistics(['Quiz', 'Survey'])
+    assert app.arrays_path is None and os.listdir(app.arrays.root) == []
+
+    app = process_app(tmp_path)
+    load(app, log_paths)
+    assert app.arrays_path is None
+    app.generate_statistics(['Quiz', 'Survey'])
+    assert os.path.isdir(app.arrays_path)
+
+
+def test_missing_shared_arrays_are_published_again(tmp_path, log_paths):
+    app = process_app(tmp_path)
+    load(app, log_paths)
+    app.generate_statistics(['Quiz', 'Survey'])
+    shutil.rmtree(app.arrays_path)
+
+    message, *_ = app.generate_statistics(['Quiz', 'Lecture'])
+    assert message == "Statistics generated successfully:"
+    assert os.path.isdir(app.arrays_path)
+
+
+@pytest.mark.parametrize('contents', ['text', 'other tables'])
+def test_a_file_that_is_not_a_store_is_not_opened(tmp_path, log_paths, contents):
+    path = str(tmp_path / 'other.sqlite3')
+    if contents == 'text':
+        with open(path, 'w') as file:
+            file.write('not a database')
+    else:
+        connection = sqlite3.connect(path)
+        connection.execute('CREATE TABLE notes (text TEXT)')
+        connection.close()
+
+    app = DataAnalysisApp(cache_dir=None, shared_datasets=None)
+    message, rows = app.open_store(path)
+    assert message.startswith("Error opening store") and rows is None
+    assert app.store is None
+    assert app.generate_statistics(['Quiz'])[0] == "Please process data first."
+
+    # Data already in the session stays usable
+    load(app, log_paths)
+    app.open_store(path)
+    assert app.store is None
+    assert app.generate_statistics(['Quiz'])[0] == "Statistics generated successfully:"
+
+
+def split_logs(paths, directory):
+    """Write the logs as a first export and two appended deltas that repeat some earlier rows."""
+    activity_df, user_df = pd.read_csv(paths['activity']), pd.read_csv(paths['user'])
+    # The second delta brings a new user with logins in a month not seen before
+    new_activity = pd.DataFrame({USER_COLUMN: ['Late User'] * 3, 'Component': ['Quiz', 'Quiz', 'Survey'],
+                                 'Action': ['viewed'] * 3, 'Target': ['x', 'y', 'x']})
+    new_logins = pd.DataFrame({'Date': ['01/02/2024 00:00', '02/02/2024 00:00'], 'Time': ['10:00', '11:00:00'],
+                               USER_COLUMN: ['Late User', 'User 000001']})
+    parts = {
+        'activity': activity_df.iloc[:len(activity_df) // 2],
+        'user': user_df.iloc[:len(user_df) // 3],
+        'activity_delta': pd.concat([activity_df.iloc[len(activity_df) // 2:], activity_df.iloc[:40]]),
+        'user_delta': user_df.iloc[len(user_df) // 3:],
+        'activity_late': new_activity,
+        'user_late': pd.concat([new_logins, user_df.iloc[:10]]),
+        'activity_all': pd.concat([activity_df, new_activity]),
+        'user_all': pd.concat([user_df, new_logins]),
+    }
+    written = {}
+    for name, frame in parts.items():
+        written[name] = os.path.join(directory, f'{name}.csv')
+        frame.to_csv(written[name], index=False)
+    return written
+
+
+def sorted_counts(interaction_counts):
+    counts = interaction_counts.astype({'User_ID': str, 'Component': str, 'Interaction_Count': 'int64'})
+    return counts.sort_values(COUNT_KEYS, ignore_index=True)
+
+
+def rollup_cells(rollup):
+    cells = rollup.pivot().melt(['User_ID', 'Month'], var_name='Component', value_name='Interaction_Count')
+    return sorted_counts(cells[cells['Interaction_Count'] > 0])
+
+
+def test_appended_logs_match_a_full_load(tmp_path, log_paths):
+    parts = split_logs(log_paths, str(tmp_path))
+    components = ['Quiz', 'Survey', 'Lecture', 'Book']
+
+    full = DataAnalysisApp(cache_dir=None, shared_datasets=None)
+    load(full, {'activity': parts['activity_all'], 'user': parts['user_all'], 'component': log_paths['component']})
+    appended = DataAnalysisApp(cache_dir=None, shared_datasets=None)
+    load(appended, {'activity': parts['activity'], 'user': parts['user'], 'component': log_paths['component']})
+    appended.generate_statistics(components)
+    for activity_log, user_log in [(parts['activity_delta'], None), (None, parts['user_delta']),
+                                   (parts['activity_late'], parts['user_late'])]:
+        message, _ = appended.append_logs(activity_log, user_log)
+        assert message.startswith("Appended"), message
+
+    pd.testing.assert_frame_equal(sorted_counts(appended.interaction_counts), sorted_counts(full.interaction_counts))
+    for app in [full, appended]:
+        app.generate_statistics(components, '2023-10')
+    pd.testing.assert_frame_equal(appended.semester_stats_df, full.semester_stats_df)
+    pd.testing.assert_frame_equal(appended.monthly_stats_df.astype({'Component': str}),
+                                  full.monthly_stats_df.astype({'Component': str}))
+    pd.testing.assert_frame_equal(rollup_cells(appended.rollup), rollup_cells(full.rollup))
+    expected = full.rollup.interaction_matrix(components).correlation()
+    correlation = appended.rollup.interaction_matrix(components).correlation()
+    pd.testing.assert_frame_equal(correlation.loc[expected.index, expected.columns], expected)
+
+
+def test_appends_after_streaming_match_a_full_load(tmp_path, log_paths):
+    parts = split_logs(log_paths, str(tmp_path))
+
+    full = DataAnalysisApp(cache_dir=None, shared_datasets=None)
+    load(full, {'activity': parts['activity_all'], 'user': parts['user_all'], 'component': log_paths['component']})
+    streamed = DataAnalysisApp(cache_dir=None, shared_datasets=None, chunksize=100)
+    message, _ = streamed.stream_csv_files(parts['activity'], parts['user'], log_paths['component'])
+    assert message.startswith("Data streamed"), message
+    for activity_log, user_log in [(parts['activity_delta'], parts['user_delta']),
+                                   (parts['activity_late'], parts['user_late'])]:
+        message, _ = streamed.append_logs(activity_log, user_log)
+        assert message.startswith("Appended"), message
+
+    pd.testing.assert_frame_equal(sorted_counts(streamed.interaction_counts), sorted_counts(full.interaction_counts))
+    pd.testing.assert_frame_equal(rollup_cells(streamed.rollup), rollup_cells(full.rollup))
@@ -0,0 +1,95 @@
+import sqlite3
+
+import pandas as pd
+
+from backup_to_mysql import backup_tables, incremental_backup, insert_data, load_tables, table_rows
+from pipeline import USER_COLUMN, clean_activity_log, clean_user_log
+
+
+def test_backup_writes_every_row(raw_logs):
+    activity_df, user_df = raw_logs
+    activity_log, user_log = clean_activity_log(activity_df.copy()), clean_user_log(user_df.copy())
+    component_df = activity_log[['Component']].drop_duplicates().assign(Code=lambda frame: frame['Component'].str[:3])
+    connection = sqlite3.connect(':memory:')
+    try:
+        backup_tables(connection, {'USER_LOG': user_log, 'ACTIVITY_LOG': activity_log,
+                                   'COMPONENT_CODES': component_df})
+        counts = {table: connection.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                  for table in ['USER_LOG', 'ACTIVITY_LOG', 'COMPONENT_CODES']}
+        dates = [date for date, in connection.execute('SELECT date FROM USER_LOG')]
+    finally:
+        connection.close()
+
+    assert counts == {'USER_LOG': len(user_log), 'ACTIVITY_LOG': len(activity_log),
+                      'COMPONENT_CODES': len(component_df)}
+    assert dates == list(user_log['Date'].dt.strftime('%Y-%m-%d'))
+
+
+def test_backup_and_reload_round_trip(raw_logs):
+    activity_df, user_df = raw_logs
+    activity_log, user_log = clean_activity_log(activity_df.copy()), clean_user_log(user_df.copy())
+    component_df = activity_log[['Component']].drop_duplicates().assign(Code=lambda frame: frame['Component'].str[:3])
+    connection = sqlite3.connect(':memory:')
+    try:
+        backup_tables(connection, {'USER_LOG': user_log, 'ACTIVITY_LOG': activity_log,
+                                   'COMPONENT_CODES': component_df})
+        frames = load_tables(connection)
+    finally:
+        connection.close()
+
+    # The reloaded frames are in the raw export layout and clean to the same logs
+    assert USER_COLUMN in frames['user'] and USER_COLUMN in frames['activity']
+    reloaded_user = clean_user_log(frames['user'])
+    reloaded_activity = clean_activity_log(frames['activity'])
+    assert len(reloaded_user) == len(user_log)
+    assert list(reloaded_user['Timestamp']) == list(user_log['Timestamp'])
+    assert reloaded_activity.values.tolist() == activity_log.values.tolist()
+    assert len(frames['component']) == len(component_df)
+
+
+def test_short_times_are_backed_up_as_seconds():
+    user_df = pd.DataFrame({USER_COLUMN: ['a', 'b', 'c'], 'Date': ['04/09/2023 00:00'] * 3,
+                            'Time': ['10:05', '10:05:30', None]})
+    rows = table_rows(user_df, 'USER_LOG')
+    assert list(rows['time']) == ['10:05:00', '10:05:30', None]
+    assert list(rows['date']) == ['2023-09-04'] * 3
+
+
+def test_conversion_error_only_skips_its_table():
+    user_df = pd.DataFrame({USER_COLUMN: ['a'], 'Date': ['04/09/2023 00:00'], 'Time': ['10:05']})
+    broken_activity = pd.DataFrame({USER_COLUMN: ['a'], 'Component': ['Quiz']})
+    connection = sqlite3.connect(':memory:')
+    try:
+        assert insert_data(connection, broken_activity, 'ACTIVITY_LOG') == 0
+        inserted = incremental_backup(connection, {'ACTIVITY_LOG': broken_activity, 'USER_LOG': user_df})
+        assert inserted == {'ACTIVITY_LOG': 0, 'USER_LOG': 1}
+        assert connection.execute('SELECT time FROM USER_LOG').fetchall() == [('10:05:00',)]
+    finally:
+        connection.close()
+
+
+def test_logins_at_the_high_water_second_are_not_dropped():
+    first = pd.DataFrame({USER_COLUMN: ['a'], 'Date': ['04/09/2023 00:00'], 'Time': ['10:00:00']})
+    later = pd.DataFrame({USER_COLUMN: ['a', 'b', 'c'], 'Date': ['04/09/2023 00:00'] * 2 + ['03/09/2023 00:00'],
+                          'Time': ['10:00:00', '10:00:00', '23:00:00']})
+    connection = sqlite3.connect(':memory:')
+    try:
+        assert incremental_backup(connection, {'USER_LOG': first}) == {'USER_LOG': 1}
+        assert incremental_backup(connection, {'USER_LOG': later}) == {'USER_LOG': 1}
+        assert incremental_backup(connection, {'USER_LOG': later}) == {'USER_LOG': 0}
+        stored = connection.execute('SELECT user_id, date, time FROM USER_LOG ORDER BY user_id').fetchall()
+        assert stored == [('a', '2023-09-04', '10:00:00'), ('b', '2023-09-04', '10:00:00')]
+    finally:
+        connection.close()
+
+
+def test_export_and_iso_dates_are_read_the_same(tmp_path, cleaned_logs):
+    user_df = pd.DataFrame({USER_COLUMN: ['a', 'b', 'c'], 'Date': ['04/09/2023 00:00', '2023-09-04', '2023-10-12'],
+                            'Time': ['10:00:00'] * 3})
+    assert list(table_rows(user_df, 'USER_LOG')['date']) == ['2023-09-04', '2023-09-04', '2023-10-12']
+
+    # A cleaned log written to CSV, as the script's own input, keeps its dates
+    _, user_log = cleaned_logs
+    user_log[['User_ID', 'Date', 'Time']].to_csv(tmp_path / 'USER_LOG_cleaned.csv', index=False)
+    rows = table_rows(pd.read_csv(tmp_path / 'USER_LOG_cleaned.csv'), 'USER_LOG')
+    assert list(rows['date']) == list(user_log['Date'].dt.strftime('%Y-%m-%d'))
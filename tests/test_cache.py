@@ -0,0 +1,61 @@
+import pandas as pd
+
+from cache import DatasetCache, LRUCache, content_hash
+from pipeline import aggregate_interactions, clean_activity_log, clean_user_log, read_csv
+
+
+def test_put_and_get_round_trip(tmp_path, cleaned_logs, interaction_counts):
+    activity_log, user_log = cleaned_logs
+    cache = DatasetCache(str(tmp_path / 'cache'))
+    frames = {'activity': activity_log, 'user': user_log, 'interactions': interaction_counts}
+    cache.put('key', frames)
+    loaded = cache.get('key')
+    assert set(loaded) == set(frames)
+    for name, frame in frames.items():
+        pd.testing.assert_frame_equal(loaded[name].reset_index(drop=True), frame.reset_index(drop=True),
+                                      check_dtype=False)
+    assert cache.get('other') is None
+
+
+def test_arrow_backed_frames_round_trip(tmp_path, raw_logs):
+    activity_df, user_df = raw_logs
+    activity_df.to_csv(tmp_path / 'activity.csv', index=False)
+    user_df.to_csv(tmp_path / 'user.csv', index=False)
+    activity_log = clean_activity_log(read_csv(str(tmp_path / 'activity.csv'), dtype_backend='pyarrow'))
+    user_log = clean_user_log(read_csv(str(tmp_path / 'user.csv'), dtype_backend='pyarrow'))
+    frames = {'activity': activity_log, 'user': user_log,
+              'interactions': aggregate_interactions(user_log, activity_log)}
+
+    cache = DatasetCache(str(tmp_path / 'cache'))
+    cache.put('key', frames)
+    loaded = cache.get('key')
+    assert loaded is not None
+    for name, frame in frames.items():
+        # Parquet has no seconds time unit, so only Time comes back at another resolution
+        expected = frame.drop(columns='Time', errors='ignore')
+        pd.testing.assert_frame_equal(loaded[name].drop(columns='Time', errors='ignore'), expected)
+    assert list(loaded['user']['Time']) == list(user_log['Time'])
+
+
+def test_evicts_least_recently_used_entries(tmp_path, interaction_counts):
+    cache = DatasetCache(str(tmp_path / 'cache'), max_bytes=1)
+    cache.put('old', {'interactions': interaction_counts})
+    cache.put('new', {'interactions': interaction_counts})
+    assert cache.get('old') is None
+    assert cache.get('new') is None
+
+
+def test_content_hash_depends_on_file_boundaries(tmp_path):
+    paths = [tmp_path / name for name in ['a', 'b', 'c', 'd']]
+    for path, text in zip(paths, ['ab', 'c', 'a', 'bc']):
+        path.write_text(text)
+    assert content_hash(*map(str, paths[:2])) != content_hash(*map(str, paths[2:]))
+
+
+def test_lru_cache_evicts_oldest_entry():
+    cache = LRUCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+    assert cache.get('b') is None and cache.get('a') == 1 and cache.get('c') == 3
@@ -0,0 +1,27 @@
+import pandas as pd
+
+from dedup import HashDeduplicator
+from pipeline import ACTIVITY_KEYS, USER_COLUMN
+
+
+def test_drop_seen_matches_drop_duplicates_across_chunks(raw_logs):
+    activity_df = raw_logs[0].rename(columns={USER_COLUMN: 'User_ID'})
+    deduplicator = HashDeduplicator(ACTIVITY_KEYS)
+    kept = pd.concat([deduplicator.drop_seen(chunk) for chunk in
+                      [activity_df.iloc[start:start + 97] for start in range(0, len(activity_df), 97)]])
+    expected = activity_df.drop_duplicates(subset=ACTIVITY_KEYS)
+    assert kept.index.equals(expected.index)
+    assert deduplicator.duplicates == len(activity_df) - len(expected)
+
+
+def test_spilled_and_saved_fingerprints_round_trip(tmp_path, raw_logs):
+    activity_df = raw_logs[0].rename(columns={USER_COLUMN: 'User_ID'})
+    deduplicator = HashDeduplicator(ACTIVITY_KEYS, spill_dir=str(tmp_path / 'spill'), max_memory_bytes=0)
+    deduplicator.drop_seen(activity_df)
+    deduplicator.compact()
+    assert len(list((tmp_path / 'spill').iterdir())) == 1
+
+    deduplicator.save(str(tmp_path / 'seen.npy'))
+    loaded = HashDeduplicator.load(str(tmp_path / 'seen.npy'), ACTIVITY_KEYS)
+    assert loaded.drop_seen(activity_df).empty
+    assert len(loaded) == len(activity_df.drop_duplicates(subset=ACTIVITY_KEYS))
@@ -0,0 +1,87 @@
+import threading
+import time
+
+from jobs import JobManager
+from main import DataAnalysisApp
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "condition not reached"
+        time.sleep(0.01)
+
+
+def slow_job(release, progress):
+    """Report progress every 10 ms until release is set."""
+    rows = 0
+    while not release.is_set():
+        rows += 100
+        progress('parse activity', rows)
+        time.sleep(0.01)
+    progress('merge', rows)
+    return rows
+
+
+def test_completed_job_keeps_progress_and_result():
+    manager = JobManager()
+    release = threading.Event()
+    job = manager.submit('Load files', slow_job, release)
+    wait_until(lambda: job.rows.get('parse activity', 0) >= 300)
+    assert job.status == 'running' and job.stage == 'parse activity'
+    assert 'parse activity' in job.describe()
+
+    release.set()
+    job.future.result(timeout=5)
+    assert job.status == 'done' and job.stage == 'merge'
+    assert job.result == job.rows['merge'] == job.rows['parse activity']
+    assert manager.summary([job.id])['status'].tolist() == ['done']
+
+
+def test_cancel_stops_a_running_job_at_its_next_report():
+    manager = JobManager()
+    job = manager.submit('Load files', slow_job, threading.Event())
+    wait_until(lambda: job.status == 'running')
+    assert manager.cancel(job.id)
+    job.future.result(timeout=5)
+    assert job.status == 'cancelled' and job.result is None
+    assert not manager.cancel(job.id)
+
+
+def test_queued_job_is_dropped_when_cancelled():
+    manager = JobManager(max_workers=1)
+    release = threading.Event()
+    running = manager.submit('First', slow_job, release)
+    queued = manager.submit('Second', slow_job, release)
+    assert queued.status == 'queued'
+    assert manager.cancel(queued.id)
+    assert queued.status == 'cancelled'
+    release.set()
+    running.future.result(timeout=5)
+    assert running.status == 'done'
+
+
+def test_job_past_its_timeout_stops():
+    manager = JobManager(timeout=0.1)
+    job = manager.submit('Load files', slow_job, threading.Event())
+    job.future.result(timeout=5)
+    assert job.status == 'timed out'
+    assert job.rows['parse activity'] > 0
+
+
+def test_one_job_per_session():
+    release = threading.Event()
+    app = DataAnalysisApp(cache_dir=None, shared_datasets=None, jobs=JobManager())
+    message, job_id = app._submit_job('Slow', lambda app, progress: slow_job(release, progress))
+    assert message.startswith("Started job")
+    message, second_id = app._submit_job('Slow', lambda app, progress: slow_job(release, progress))
+    assert message.startswith(f"Job {job_id} is still running") and second_id is None
+    assert app.job_status(job_id)[2] is False
+
+    release.set()
+    wait_until(lambda: app.job_status(job_id)[2])
+    status, result, over = app.job_status(job_id)
+    assert result > 0 and over
+    message, third_id = app._submit_job('Slow', lambda app, progress: slow_job(release, progress))
+    assert message.startswith("Started job") and third_id not in (None, job_id)
+    wait_until(lambda: app.job_status(third_id)[2])
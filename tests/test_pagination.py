@@ -0,0 +1,36 @@
+import pandas as pd
+import pytest
+
+from pagination import filter_mask, table_view
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({
+        'Component': pd.Categorical(['Quiz', 'Lecture', None, 'Quiz']),
+        'Month': pd.PeriodIndex(['2023-09', '2023-10', '2023-11', '2023-11'], freq='M'),
+        'mean': [1.5, None, 20.0, 7.0],
+    })
+
+
+@pytest.mark.parametrize('where, expected', [
+    (('Component', '==', 'Quiz'), [True, False, False, True]),
+    (('Component', '!=', 'Quiz'), [False, True, False, False]),
+    (('Component', 'contains', 'ect'), [False, True, False, False]),
+    (('Month', '>=', '2023-10'), [False, True, True, True]),
+    (('mean', '>', '5'), [False, False, True, True]),
+])
+def test_filter_mask_compares_by_column_type(frame, where, expected):
+    assert filter_mask(frame, *where).tolist() == expected
+
+
+def test_filter_rejects_expressions(frame):
+    with pytest.raises(ValueError):
+        filter_mask(frame, 'mean.__class__.__init__.__globals__', '==', '1')
+    with pytest.raises(ValueError):
+        filter_mask(frame, 'mean', '== 1 or', '1')
+
+
+def test_table_view_filters_then_sorts(frame):
+    view = table_view(frame, 'mean', ascending=False, where=('Component', '==', 'Quiz'))
+    assert view['mean'].tolist() == [7.0, 1.5]
@@ -0,0 +1,40 @@
+import pandas as pd
+import pytest
+
+from main import DataAnalysisApp
+from pipeline import COUNT_KEYS
+from synthetic import write_logs
+
+COMPONENTS = ['Quiz', 'Lecture', 'Assignment', 'Survey', 'Book']
+
+
+@pytest.fixture(scope='module')
+def log_paths(tmp_path_factory):
+    return write_logs(str(tmp_path_factory.mktemp('logs')), users=30, days=75, events_per_user=20, seed=3)
+
+
+def processed(paths, **options):
+    app = DataAnalysisApp(cache_dir=None, shared_datasets=None, **options)
+    app.load_csv_files(paths['activity'], paths['user'], paths['component'])
+    message, _ = app.clean_and_merge_data()
+    assert message == "Data cleaned and merged successfully!"
+    return app
+
+
+def plain(frame):
+    return frame.astype({column: str for column in ['User_ID', 'Component'] if column in frame})
+
+
+def test_sqlite_backend_matches_pandas(tmp_path, log_paths):
+    pandas_app = processed(log_paths)
+    sqlite_app = processed(log_paths, backend='sqlite', sqlite_path=str(tmp_path / 'backend.sqlite3'))
+
+    counts = [plain(app.interaction_counts).astype({'Interaction_Count': 'int64'})
+              .sort_values(COUNT_KEYS, ignore_index=True) for app in [sqlite_app, pandas_app]]
+    pd.testing.assert_frame_equal(*counts)
+
+    for app in [sqlite_app, pandas_app]:
+        message, *_ = app.generate_statistics(COMPONENTS)
+        assert message == "Statistics generated successfully:"
+    pd.testing.assert_frame_equal(plain(sqlite_app.semester_stats_df), plain(pandas_app.semester_stats_df))
+    pd.testing.assert_frame_equal(plain(sqlite_app.monthly_stats_df), plain(pandas_app.monthly_stats_df))
@@ -0,0 +1,41 @@
+import pandas as pd
+import pytest
+
+from rollup import RollupCube
+from shared_arrays import ArrayStore
+from stats_engine import StatisticsEngine, WorkerPools
+
+COMPONENTS = ['Quiz', 'Lecture', 'Assignment', 'Survey', 'Missing']
+
+
+@pytest.fixture(scope='module')
+def rollup(interaction_counts):
+    return RollupCube.from_counts(interaction_counts)
+
+
+@pytest.mark.parametrize('executor', ['thread', 'process'])
+@pytest.mark.parametrize('months', [(None, None), ('2023-10', '2023-11')])
+def test_parallel_statistics_match_serial(tmp_path, interaction_counts, rollup, executor, months):
+    arrays_path = ArrayStore(str(tmp_path)).publish('key', interaction_counts)
+    pools = WorkerPools()
+    engine = StatisticsEngine(executor, max_workers=2, min_parallel_rows=0, pools=pools)
+    try:
+        assert engine.mode(COMPONENTS, len(interaction_counts), arrays_path) == executor
+        semester, monthly = engine.compute(rollup, COMPONENTS, *months, rows=len(interaction_counts),
+                                           arrays_path=arrays_path)
+    finally:
+        pools.close()
+    expected_semester, expected_monthly = StatisticsEngine().compute(rollup, COMPONENTS, *months)
+    pd.testing.assert_frame_equal(semester, expected_semester)
+    pd.testing.assert_frame_equal(monthly, expected_monthly)
+
+
+def test_engines_share_their_pools(rollup):
+    pools = WorkerPools()
+    engines = [StatisticsEngine('thread', min_parallel_rows=0, pools=pools) for _ in range(3)]
+    try:
+        for engine in engines:
+            engine.compute(rollup, COMPONENTS)
+        assert len(pools) == 1
+    finally:
+        pools.close()
@@ -0,0 +1,53 @@
+import pandas as pd
+import pytest
+
+from analysis import component_month_totals
+from store import ProcessedStore
+
+COMPONENTS = ['Quiz', 'Lecture', 'Survey']
+
+
+def test_save_and_read_round_trip(tmp_path, cleaned_logs, interaction_counts):
+    activity_log, user_log = cleaned_logs
+    store = ProcessedStore(str(tmp_path / 'processed.sqlite3'))
+    try:
+        written = store.save(interaction_counts, activity_log, user_log, fingerprint='abc')
+        assert written == {'activity_log': len(activity_log), 'user_log': len(user_log),
+                           'interaction_counts': len(interaction_counts)}
+        assert store.fingerprint() == 'abc'
+
+        counts = store.interaction_counts()
+        assert len(counts) == len(interaction_counts)
+        assert counts['Interaction_Count'].sum() == interaction_counts['Interaction_Count'].sum()
+
+        totals = store.component_month_totals(COMPONENTS, '2023-10', '2023-11')
+        expected = component_month_totals(interaction_counts, COMPONENTS)
+        expected = expected[expected['Month'] >= pd.Period('2023-10', freq='M')]
+        assert sorted(zip(totals['Component'], totals['Month'], totals['Interactions'])) == \
+            sorted(zip(expected['Component'].astype(str), expected['Month'], expected['Interactions']))
+
+        logins = store.user_log('2023-10-01', '2023-10-31')
+        assert len(logins) == user_log['Date'].between('2023-10-01', '2023-10-31').sum()
+    finally:
+        store.close()
+
+
+def test_failed_save_keeps_the_stored_data(tmp_path, cleaned_logs, interaction_counts):
+    activity_log, user_log = cleaned_logs
+    path = str(tmp_path / 'processed.sqlite3')
+    store = ProcessedStore(path)
+    try:
+        store.save(interaction_counts, activity_log, user_log, fingerprint='good')
+        with pytest.raises(KeyError):
+            store.save(interaction_counts.drop(columns='Month'), activity_log, user_log, fingerprint='bad')
+    finally:
+        store.close()
+
+    store = ProcessedStore(path)
+    try:
+        assert store.fingerprint() == 'good'
+        assert store.count('activity_log') == len(activity_log)
+        assert store.count('user_log') == len(user_log)
+        assert store.count('interaction_counts') == len(interaction_counts)
+    finally:
+        store.close()